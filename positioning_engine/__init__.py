@@ -0,0 +1,28 @@
+"""
+Neobank Positioning Engine
+
+Scrape competitor websites, analyze positioning, and render messaging briefs.
+
+Importing this package is deliberately cheap: it pulls in no third-party
+modules. Playwright, the LLM SDKs and WeasyPrint are imported only by the
+stage that needs them. Run `python -m positioning_engine --help` for the CLI.
+"""
+
+from positioning_engine.core import (
+    EXAMPLES_DIR,
+    OUTPUT_DIR,
+    PROJECT_DIR,
+    REFERENCES_DIR,
+    slugify,
+)
+
+__version__ = "0.1.0"
+
+__all__ = [
+    "EXAMPLES_DIR",
+    "OUTPUT_DIR",
+    "PROJECT_DIR",
+    "REFERENCES_DIR",
+    "__version__",
+    "slugify",
+]
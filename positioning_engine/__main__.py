@@ -0,0 +1,3 @@
+from positioning_engine.cli import main
+
+main()
@@ -0,0 +1,900 @@
+"""
+Positioning Brief Analyzer
+
+Usage:
+    python -m positioning_engine analyze output/kast-positioning.json --competitors revolut crypto-com
+
+Takes scraped JSON from the scrape stage, calls an LLM to extract positioning
+elements, map territories, find white space, and generate a messaging framework.
+Outputs a structured brief JSON matching the kast-brief.json schema.
+
+Requires: pip install anthropic openai
+Auth: Set ANTHROPIC_API_KEY or OPENROUTER_API_KEY in environment / .env
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from positioning_engine import trace
+from positioning_engine.core import (
+    EXAMPLES_DIR,
+    OUTPUT_DIR,
+    PROJECT_DIR,
+    REFERENCES_DIR,
+    load_env,
+    load_text_file,
+    resolve_path,
+    slugify,
+)
+
+DEFAULT_MODEL_ANTHROPIC = "claude-sonnet-4-5-20250514"
+DEFAULT_MODEL_OPENROUTER = "anthropic/claude-sonnet-4-5-20250514"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+MAX_BODY_CHARS_PER_PAGE = 2000
+MAX_RETRIES = 1
+
+
+def load_context_files() -> dict:
+    """Load SKILL.md (phases 2-5 only) and the positioning frameworks reference."""
+    skill_text = load_text_file(PROJECT_DIR / "SKILL.md")
+
+    # Extract phases 2-5 from SKILL.md
+    phases_text = ""
+    if skill_text:
+        # Find from Phase 2 through end of Phase 5 (before Phase 6)
+        match = re.search(
+            r"(### Phase 2: Extract Positioning Elements.*?)(?=### Phase 6:|## Rules|$)",
+            skill_text,
+            re.DOTALL,
+        )
+        if match:
+            phases_text = match.group(1).strip()
+        else:
+            # Fallback: use everything after Phase 1
+            match = re.search(r"(### Phase 2:.*)", skill_text, re.DOTALL)
+            if match:
+                phases_text = match.group(1).strip()
+
+    frameworks = load_text_file(REFERENCES_DIR / "positioning-frameworks.md")
+
+    # The messaging map goes into the user prompt, cut to the players of each run
+    # (see messaging_map.py), so the system prompt stays identical across runs.
+    return {
+        "phases": phases_text,
+        "frameworks": frameworks,
+    }
+
+
+def load_example_brief() -> str:
+    """Load kast-brief.json as a few-shot example for the output schema."""
+    path = EXAMPLES_DIR / "kast-brief.json"
+    if not path.exists():
+        return ""
+    return path.read_text(encoding="utf-8")
+
+
+def load_scraped_data(input_path: Path, competitor_slugs: list[str]) -> dict:
+    """Load target scraped JSON and any competitor scraped JSONs.
+
+    A company without a JSON file falls back to the pages of its scrape stream.
+    """
+    from positioning_engine.stream import load_unfinished
+
+    if input_path.exists():
+        with open(input_path) as f:
+            target = json.load(f)
+    else:
+        target = load_unfinished(input_path)
+        if target is None:
+            print(f"Error: {input_path} not found")
+            sys.exit(1)
+
+    competitors = {}
+    for slug in competitor_slugs:
+        comp_path = OUTPUT_DIR / f"{slug}-positioning.json"
+        if comp_path.exists():
+            with open(comp_path) as f:
+                competitors[slug] = json.load(f)
+            continue
+        comp_data = load_unfinished(comp_path)
+        if comp_data is not None:
+            competitors[slug] = comp_data
+        else:
+            print(f"Warning: competitor data not found at {comp_path}, skipping {slug}")
+
+    return {"target": target, "competitors": competitors}
+
+
+def load_scraped_data_from_store(db_path: Path, target: str, competitor_slugs: list[str]) -> dict:
+    """Load the latest snapshots from the SQLite store, reading only prompt-sized bodies."""
+    from positioning_engine import store
+
+    conn = store.connect(db_path)
+    target_slug = slugify(target.removesuffix("-positioning.json").rsplit("/", 1)[-1])
+    target_data = store.load_snapshot(conn, target_slug, body_chars=MAX_BODY_CHARS_PER_PAGE)
+    if target_data is None:
+        print(f"Error: no snapshot for {target_slug} in {db_path}")
+        sys.exit(1)
+
+    competitors = {}
+    for slug in competitor_slugs:
+        comp_data = store.load_snapshot(conn, slug, body_chars=MAX_BODY_CHARS_PER_PAGE)
+        if comp_data is not None:
+            competitors[slug] = comp_data
+        else:
+            print(f"Warning: no snapshot for {slug} in {db_path}, skipping {slug}")
+
+    return {"target": target_data, "competitors": competitors}
+
+
+def truncate_page(page: dict, include_body: bool = True) -> str:
+    """Format a scraped page for the prompt, truncating body text."""
+    lines = []
+    lines.append(f"URL: {page.get('url', 'N/A')}")
+    lines.append(f"Page type: {page.get('page_type', 'unknown')}")
+
+    title = page.get("title", "")
+    if title:
+        lines.append(f"Title: {title}")
+
+    meta = page.get("meta_description", "")
+    if meta:
+        lines.append(f"Meta description: {meta}")
+
+    headings = page.get("headings", [])
+    if headings:
+        heading_strs = [f"  {h.get('tag', '?')}: {h.get('text', '')}" for h in headings[:20]]
+        lines.append("Headings:\n" + "\n".join(heading_strs))
+
+    ctas = page.get("links_text", [])
+    if ctas:
+        lines.append("CTAs/buttons: " + " | ".join(ctas[:15]))
+
+    body = page.get("body_text", "") if include_body else ""
+    if body:
+        # Stores that load bodies pre-cut report the full length separately
+        body_length = page.get("body_length", len(body))
+        truncated = body[:MAX_BODY_CHARS_PER_PAGE]
+        if body_length > MAX_BODY_CHARS_PER_PAGE:
+            truncated += f"\n[...truncated, {body_length} chars total]"
+        lines.append(f"Body text:\n{truncated}")
+
+    return "\n".join(lines)
+
+
+def format_company_data(
+    data: dict,
+    include_body: bool = True,
+    signals: dict | None = None,
+    bodies: list[str] | None = None,
+) -> str:
+    """Format a company's scraped data for the prompt.
+
+    `bodies` replace the pages' body text (see passages.py). With `signals`
+    (see extract.py) the pre-extracted summary leads and each page is sent
+    in its reduced form (extract.prompt_page).
+    """
+    company = data.get("company", "Unknown")
+    website = data.get("website", "N/A")
+    pages = data.get("pages", [])
+    if bodies is not None:
+        pages = [{**page, "body_text": body} for page, body in zip(pages, bodies)]
+
+    sections = [f"## {company} ({website})", f"Scraped {len(pages)} pages."]
+    if signals:
+        from positioning_engine.extract import format_summary, prompt_page
+
+        sections.append(format_summary(signals))
+        pages = [prompt_page(page, signals) for page in pages]
+    for page in pages:
+        sections.append(f"\n### {page.get('page_type', 'unknown').title()} page")
+        sections.append(truncate_page(page, include_body))
+
+    return "\n".join(sections)
+
+
+def build_system_prompt(context: dict, example_brief: str, compact: bool = False) -> str:
+    """Build the system prompt from reference files and schema.
+
+    With `compact`, the schema section asks for the compact wire schema
+    (see wire.py) and shows a shortened example in that form.
+    """
+    parts = [
+        "You are a positioning strategist. Your task is to analyze scraped website data "
+        "for a crypto neobank and its competitors, then produce a structured positioning brief.",
+        "",
+        "Follow these analytical phases:",
+        "",
+        context["phases"],
+        "",
+        "---",
+        "",
+        "# Reference: Positioning Frameworks",
+        context["frameworks"],
+    ]
+
+    if example_brief and compact:
+        from positioning_engine.wire import schema_prompt
+
+        parts.extend(["", "---", "", schema_prompt(example_brief)])
+    elif example_brief:
+        parts.extend([
+            "",
+            "---",
+            "",
+            "# Output Schema (follow this structure exactly)",
+            "Here is a complete example of the expected JSON output. Your output must have the same "
+            "top-level keys and nested structure. All text values should be specific, evidence-based, "
+            "and grounded in the scraped data.",
+            "",
+            "```json",
+            example_brief,
+            "```",
+        ])
+
+    parts.extend([
+        "",
+        "---",
+        "",
+        "# Output Rules",
+        "1. Return ONLY valid JSON. No markdown fencing, no commentary before or after.",
+        "2. Match the compact schema above exactly: c, d, w, k, x, pe, tm, ws, mf. Minified, no whitespace."
+        if compact else
+        "2. Match the schema above exactly: company, date, website, competitors, executive_summary, "
+        "positioning_elements, territory_map, white_space, messaging_framework.",
+        "3. Every claim must trace to scraped data or the reference files. No invented stats.",
+        "4. The competitor test: if a competitor could say the same thing, push harder.",
+        "5. No AI slop: no 'in today\'s competitive landscape', no 'it\'s worth noting'.",
+        "6. Be specific and direct. This goes to a CMO, not a chatbot.",
+    ])
+
+    return "\n".join(parts)
+
+
+def build_user_prompt(
+    scraped_data: dict,
+    territory_scores: dict | None = None,
+    messaging_map: str | None = None,
+    signals: dict[str, dict] | None = None,
+    passages: dict[str, list[str]] | None = None,
+) -> str:
+    """Format all scraped data into the user prompt.
+
+    The messaging map excerpt defaults to the sections for this run's companies.
+    With `territory_scores` (see territory.py) the local pre-scores are included
+    and competitor pages are sent without body text. With `signals` (from
+    extract.extract_all) each company's pre-extracted summary replaces most of
+    its body text. `passages` (from passages.select_bodies) are the page
+    bodies to send instead of their leading characters.
+    """
+    signals = signals or {}
+    passages = passages or {}
+    target = scraped_data["target"]
+    competitors = scraped_data["competitors"]
+    if messaging_map is None:
+        messaging_map = messaging_map_excerpt(scraped_data)
+
+    parts = []
+    if messaging_map:
+        parts.extend([
+            "# Reference: Neobank Messaging Map (known positioning of major players)",
+            messaging_map,
+            "",
+            "---",
+            "",
+        ])
+    parts.extend([
+        "Analyze the following scraped website data and produce a positioning brief JSON.",
+        "",
+        "# Target Company",
+        format_company_data(target, signals=signals.get("target"), bodies=passages.get("target")),
+    ])
+
+    if competitors:
+        parts.append("\n# Competitors")
+        if territory_scores:
+            parts.append("(Body text omitted; see the territory pre-scores below.)")
+        for slug, comp_data in competitors.items():
+            parts.append("")
+            parts.append(format_company_data(comp_data, not territory_scores, signals.get(slug), passages.get(slug)))
+
+    if territory_scores:
+        from positioning_engine.territory import format_scores
+
+        parts.extend([
+            "",
+            "# Local Territory Pre-Scores",
+            "Keyword-lexicon placements from the scraped copy, with the terms behind them. "
+            "Use them as a baseline for territory_map.scores and explain any placement you move "
+            "by more than 2 points.",
+            format_scores(territory_scores),
+        ])
+
+    competitor_names = []
+    for comp_data in competitors.values():
+        competitor_names.append(comp_data.get("company", "Unknown"))
+    if not competitor_names:
+        competitor_names = ["(use reference data from the messaging map)"]
+
+    parts.extend([
+        "",
+        "# Instructions",
+        f"Target company: {target.get('company', 'Unknown')}",
+        f"Website: {target.get('website', 'N/A')}",
+        f"Competitors to analyze against: {', '.join(competitor_names)}",
+        f"Date: {datetime.now().strftime('%Y-%m-%d')}",
+    ])
+    if signals:
+        parts.append(
+            "Proof points under \"Pre-extracted signals\" are quoted verbatim from the pages. Every "
+            "number, count, percentage or licence you cite must appear there, in the page text above "
+            "or in the messaging map."
+        )
+    parts.extend([
+        "",
+        "Produce the complete positioning brief JSON now.",
+    ])
+
+    return "\n".join(parts)
+
+
+def messaging_map_excerpt(scraped_data: dict) -> str:
+    """Messaging map sections for the target, the competitors and their nearest players."""
+    from positioning_engine.messaging_map import relevant_messaging_map
+
+    target = scraped_data["target"].get("company", "")
+    competitors = [d.get("company", slug) for slug, d in scraped_data["competitors"].items()]
+    return relevant_messaging_map(target, competitors)
+
+
+def build_delta_prompt(
+    previous_brief: dict, change_sets: list[dict], scraped_data: dict, compact: bool = False
+) -> str:
+    """Ask for an updated brief from the previous one plus what changed on each site.
+
+    With `compact` the previous brief is shown in the compact wire schema.
+    """
+    from positioning_engine.diff import format_change_set
+
+    target = scraped_data["target"]
+    changed = [c for c in change_sets if c["changed"]]
+    unchanged = [c["company"] for c in change_sets if not c["changed"]]
+
+    # The local territory baseline is recomputed after every run; the model never sees it here
+    territory_map = previous_brief.get("territory_map")
+    if isinstance(territory_map, dict) and "baseline" in territory_map:
+        territory_map = {k: v for k, v in territory_map.items() if k != "baseline"}
+        previous_brief = {**previous_brief, "territory_map": territory_map}
+
+    parts = [
+        "The positioning brief below was generated from earlier scrapes of these websites. "
+        "Since then, the sites changed as listed. Update the brief to reflect the changes: "
+        "revise only the claims, proof points, territory scores, white space and messaging "
+        "the changes affect, and keep everything else as it is.",
+        "",
+        "# Previous Brief",
+        "```json",
+        compact_text(previous_brief) if compact else json.dumps(previous_brief, ensure_ascii=False),
+        "```",
+        "",
+        "# Website Changes Since That Brief",
+    ]
+    for change_set in changed:
+        parts.extend(["", format_change_set(change_set)])
+    if unchanged:
+        parts.extend(["", f"No changes: {', '.join(unchanged)}"])
+
+    parts.extend([
+        "",
+        "# Instructions",
+        f"Target company: {target.get('company', 'Unknown')}",
+        f"Date: {datetime.now().strftime('%Y-%m-%d')}",
+        "",
+        "Produce the complete updated positioning brief JSON now, in the same schema.",
+    ])
+
+    return "\n".join(parts)
+
+
+def compact_text(brief: dict) -> str:
+    from positioning_engine import wire
+
+    return wire.dumps(wire.compact_brief(brief))
+
+
+def prepare_delta(db_path: Path, scraped_data: dict) -> tuple[dict, list[dict]] | None:
+    """
+    The latest stored brief for the target and a change set per company since it.
+
+    Returns None when a full analysis is needed: no stored brief yet, or the
+    competitor set differs from the one the brief was built from.
+    """
+    from positioning_engine import store
+    from positioning_engine.diff import diff_store_snapshots
+
+    conn = store.connect(db_path)
+    target_slug = slugify(scraped_data["target"]["company"])
+    previous = store.latest_brief(conn, target_slug)
+    if previous is None:
+        print(f"No stored brief for {target_slug} yet, running full analysis")
+        return None
+
+    previous_brief, previous_ids = previous
+    current_ids = snapshot_ids(scraped_data)
+    if set(previous_ids) != set(current_ids):
+        print("Competitor set differs from the stored brief, running full analysis")
+        return None
+
+    change_sets = [
+        diff_store_snapshots(conn, previous_ids[slug], snapshot_id)
+        for slug, snapshot_id in current_ids.items()
+    ]
+    return previous_brief, change_sets
+
+
+def snapshot_ids(scraped_data: dict) -> dict[str, int]:
+    """Store snapshot id of the target and each competitor, keyed by slug."""
+    companies = [scraped_data["target"], *scraped_data["competitors"].values()]
+    return {slugify(data["company"]): data["snapshot_id"] for data in companies}
+
+
+def build_repair_prompt(raw_response: str, error: str) -> str:
+    """Prompt for retrying after JSON parse failure."""
+    return (
+        f"Your previous response was not valid JSON. Error: {error}\n\n"
+        f"Here is what you returned:\n{raw_response[:3000]}\n\n"
+        "Please return ONLY the valid JSON positioning brief. "
+        "No markdown fencing, no extra text."
+    )
+
+
+REQUIRED_KEYS = {
+    "company", "date", "competitors", "executive_summary",
+    "positioning_elements", "territory_map", "white_space",
+    "messaging_framework",
+}
+
+REQUIRED_FRAMEWORK_KEYS = {
+    "positioning_statements", "one_liners", "value_propositions",
+    "what_not_to_say", "competitive_responses",
+}
+
+
+def parse_and_validate(text: str) -> dict:
+    """Parse JSON from response text and validate required keys.
+
+    A response in the compact wire schema is expanded to the full brief first.
+    """
+    # Strip markdown fencing if present
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        # Remove first line (```json or ```)
+        cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    cleaned = cleaned.strip()
+
+    brief = json.loads(cleaned)
+    if not isinstance(brief, dict):
+        raise ValueError("Expected a JSON object")
+
+    from positioning_engine import wire
+
+    if wire.is_compact(brief):
+        brief = wire.expand_brief(brief)
+
+    missing = REQUIRED_KEYS - set(brief.keys())
+    if missing:
+        raise ValueError(f"Missing required keys: {missing}")
+
+    framework = brief.get("messaging_framework", {})
+    missing_fw = REQUIRED_FRAMEWORK_KEYS - set(framework.keys())
+    if missing_fw:
+        raise ValueError(f"Missing messaging_framework keys: {missing_fw}")
+
+    return brief
+
+
+_clients: dict[tuple, object] = {}
+_clients_lock = threading.Lock()
+CLIENT_ENV = {
+    "anthropic": ("ANTHROPIC_API_KEY", "ANTHROPIC_BASE_URL"),
+    "openrouter": ("OPENROUTER_API_KEY", "OPENROUTER_BASE_URL"),
+}
+
+
+def get_client(provider: str):
+    """One SDK client (and so one HTTP connection pool) per provider, reused across calls.
+
+    Clients are keyed by the provider's key and base URL variables, so changing
+    them (the benchmarks point them at a local mock) gets a fresh client.
+    """
+    key = (provider, *(os.environ.get(name) for name in CLIENT_ENV[provider]))
+    with _clients_lock:
+        if key not in _clients:
+            if provider == "anthropic":
+                try:
+                    from anthropic import Anthropic
+                except ImportError:
+                    print("Error: pip install anthropic")
+                    sys.exit(1)
+                _clients[key] = Anthropic()
+            else:
+                try:
+                    from openai import OpenAI
+                except ImportError:
+                    print("Error: pip install openai")
+                    sys.exit(1)
+                _clients[key] = OpenAI(
+                    api_key=os.environ["OPENROUTER_API_KEY"],
+                    base_url=os.environ.get("OPENROUTER_BASE_URL", OPENROUTER_BASE_URL),
+                )
+        return _clients[key]
+
+
+def anthropic_request(system: str, user: str, model: str) -> dict:
+    """Messages API arguments; the system prompt is the same for every run, so let the API cache it."""
+    return {
+        "model": model,
+        "max_tokens": 8192,
+        "system": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}],
+        "messages": [{"role": "user", "content": user}],
+    }
+
+
+def openrouter_request(system: str, user: str, model: str) -> dict:
+    """Chat completions arguments for OpenRouter."""
+    return {
+        "model": model,
+        "max_tokens": 8192,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+    }
+
+
+def response_text(provider: str, response: Any, span: trace.Span) -> str:
+    """Text of a provider response, recording its token usage on `span`."""
+    if provider == "anthropic":
+        span.set(
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens,
+            cache_read_tokens=getattr(response.usage, "cache_read_input_tokens", None) or 0,
+            stop_reason=response.stop_reason,
+        )
+        return response.content[0].text
+
+    if response.usage:
+        span.set(
+            input_tokens=response.usage.prompt_tokens,
+            output_tokens=response.usage.completion_tokens,
+        )
+    span.set(stop_reason=response.choices[0].finish_reason)
+    return response.choices[0].message.content
+
+
+def call_anthropic(system: str, user: str, model: str) -> str:
+    """Call the Anthropic API directly."""
+    client: Any = get_client("anthropic")
+    print(f"Calling Anthropic API ({model})...")
+
+    with trace.span("call_anthropic", model=model, prompt_chars=len(system) + len(user)) as span:
+        response = client.messages.create(**anthropic_request(system, user, model))
+        return response_text("anthropic", response, span)
+
+
+def call_openrouter(system: str, user: str, model: str) -> str:
+    """Call OpenRouter API via the OpenAI SDK."""
+    client: Any = get_client("openrouter")
+    print(f"Calling OpenRouter API ({model})...")
+
+    with trace.span("call_openrouter", model=model, prompt_chars=len(system) + len(user)) as span:
+        response = client.chat.completions.create(**openrouter_request(system, user, model))
+        return response_text("openrouter", response, span)
+
+
+CALLS = {"anthropic": call_anthropic, "openrouter": call_openrouter}
+
+
+def lint_and_repair(brief: dict, provider: str, model: str, repair: bool) -> dict:
+    """Lint the brief for banned phrases; optionally rewrite just the offending fields."""
+    from positioning_engine import lint
+
+    with trace.span("lint_brief") as span:
+        violations, paths = lint.lint_brief(brief)
+        span.set(violations=len(violations))
+    if not violations:
+        return brief
+
+    print(f"Lint: {len(violations)} banned phrase(s) in {len(paths)} field(s)")
+    lint.print_violations(violations)
+    if not repair:
+        return brief
+
+    call_fn = CALLS[provider]
+    system = "You are a positioning copy editor. You rewrite fields of a JSON brief and return JSON."
+    prompt = lint.build_lint_repair_prompt(brief, violations, paths)
+    with trace.span("lint_repair", fields=len(paths)) as span:
+        patched = lint.apply_repairs(brief, call_fn(system, prompt, model), paths)
+        span.set(patched=len(patched))
+
+    remaining, _ = lint.lint_brief(brief)
+    print(f"Lint: rewrote {len(patched)} field(s), {len(remaining)} violation(s) left")
+    lint.print_violations(remaining)
+    return brief
+
+
+def check_competitor_overlap(brief: dict, scraped_data: dict, db_path: Path | None):
+    """Print messaging entries a competitor could say just as well (local, no API call)."""
+    if not scraped_data["competitors"]:
+        return
+    from positioning_engine import similarity
+
+    with trace.span("competitor_test") as span:
+        results, flagged = similarity.competitor_test(brief, scraped_data["competitors"], db_path=db_path)
+        span.set(entries=len(results), flagged=len(flagged))
+    if flagged:
+        names = {slug: d.get("company", slug) for slug, d in scraped_data["competitors"].items()}
+        print(f"Competitor test: {len(flagged)} of {len(results)} entries too close to competitor copy")
+        similarity.print_flagged(flagged, names)
+
+
+def run_analysis(system: str, user: str, provider: str, model: str, route: Any = None) -> dict:
+    """Run the LLM call with one retry on parse failure.
+
+    With a `router.Route` the first request goes through the provider router
+    (timeouts, circuit breakers, hedging and failover); a repair prompt goes
+    to whichever provider produced the unparseable response.
+    """
+    call_fn = CALLS[provider]
+
+    last_error: Exception | None = None
+    with trace.span("run_analysis", provider=provider, model=model) as span:
+        for attempt in range(1 + MAX_RETRIES):
+            if attempt == 0 and route is not None:
+                from positioning_engine import router
+
+                outcome = router.send(system, user, route)
+                span.set(provider=outcome.leg.provider, model=outcome.leg.model, hedged=outcome.hedged)
+                if outcome.brief is not None:
+                    return outcome.brief
+                raw, last_error = outcome.raw, outcome.error
+                call_fn, model = CALLS[outcome.leg.provider], outcome.leg.model
+                print(f"Parse error (attempt 1): {last_error}")
+                continue
+
+            if attempt == 0:
+                raw = call_fn(system, user, model)
+            else:
+                print(f"Retry {attempt}: sending repair prompt...")
+                span.add("retries")
+                repair = build_repair_prompt(raw, str(last_error))
+                raw = call_fn(system, repair, model)
+
+            try:
+                return parse_and_validate(raw)
+            except (json.JSONDecodeError, ValueError) as e:
+                last_error = e
+                print(f"Parse error (attempt {attempt + 1}): {e}")
+        span.set(parse_failed=True)
+
+    print("Error: failed to get valid JSON after retries")
+    print("Raw response (first 2000 chars):")
+    print(raw[:2000])
+    sys.exit(1)
+
+
+def resolve_provider(requested: str | None, model: str | None) -> tuple[str, str]:
+    """The provider to use (explicit or from the configured keys) and its model."""
+    has_anthropic = bool(os.environ.get("ANTHROPIC_API_KEY"))
+    has_openrouter = bool(os.environ.get("OPENROUTER_API_KEY"))
+
+    if requested:
+        provider = requested
+    elif has_anthropic:
+        provider = "anthropic"
+    elif has_openrouter:
+        provider = "openrouter"
+    else:
+        print("Error: set ANTHROPIC_API_KEY or OPENROUTER_API_KEY")
+        print("Copy .env.example to .env and fill in your key")
+        sys.exit(1)
+
+    if provider == "anthropic" and not has_anthropic:
+        print("Error: ANTHROPIC_API_KEY not set")
+        sys.exit(1)
+    if provider == "openrouter" and not has_openrouter:
+        print("Error: OPENROUTER_API_KEY not set")
+        sys.exit(1)
+
+    if not model:
+        model = DEFAULT_MODEL_ANTHROPIC if provider == "anthropic" else DEFAULT_MODEL_OPENROUTER
+    return provider, model
+
+
+def build_prompts(
+    scraped_data: dict,
+    context: dict,
+    example_brief: str,
+    territory_scores: dict | None = None,
+    compact: bool = False,
+    extract: bool = False,
+    db_path: Path | None = None,
+    passages: bool = False,
+) -> tuple[str, str]:
+    """System and user prompt of a full analysis; `territory_scores` only when pre-scoring."""
+    system_prompt = build_system_prompt(context, example_brief, compact)
+    signals = None
+    if extract:
+        from positioning_engine.extract import extract_all
+
+        with trace.span("extract_signals") as span:
+            signals = extract_all(scraped_data, db_path)
+            span.set(proof_points=sum(len(s["proof_points"]) for s in signals.values()))
+    bodies = None
+    if passages:
+        from positioning_engine.passages import select_bodies
+
+        with trace.span("select_passages"):
+            bodies = select_bodies(scraped_data, MAX_BODY_CHARS_PER_PAGE, db_path)
+    return system_prompt, build_user_prompt(scraped_data, territory_scores, signals=signals, passages=bodies)
+
+
+def complete_brief(
+    brief: dict,
+    company: str,
+    website: str,
+    competitor_names: list[str],
+    territory_scores: dict,
+) -> dict:
+    """Fill in metadata the model left out and attach the local territory pre-scores."""
+    brief.setdefault("company", company)
+    brief.setdefault("date", datetime.now().strftime("%Y-%m-%d"))
+    brief.setdefault("website", website)
+    if not brief.get("competitors") and competitor_names:
+        brief["competitors"] = competitor_names
+    if isinstance(brief.get("territory_map"), dict):
+        brief["territory_map"]["baseline"] = territory_scores
+    return brief
+
+
+def generate_brief(
+    scraped_data: dict,
+    provider: str,
+    model: str,
+    context: dict,
+    example_brief: str,
+    prescore: bool = False,
+    lint: str = "repair",
+    db_path: Path | None = None,
+    delta: bool = False,
+    route: Any = None,
+    compact: bool = False,
+    extract: bool = False,
+    passages: bool = False,
+) -> tuple[dict, bool]:
+    """Brief for the loaded scraped data, and whether a stored brief was reused unchanged.
+
+    `route` is an optional `router.Route` for the analysis request.
+    """
+    target_company = scraped_data["target"].get("company", "unknown")
+    competitor_names = [d.get("company", s) for s, d in scraped_data["competitors"].items()]
+
+    print(f"Target: {target_company}")
+    print(f"Competitors: {', '.join(competitor_names) if competitor_names else '(from reference data)'}")
+    print(f"Provider: {provider} ({model})")
+    print("=" * 50)
+
+    from positioning_engine.territory import score_companies, scraped_companies
+
+    territory_scores = score_companies(scraped_companies(scraped_data))
+
+    prepared = prepare_delta(db_path, scraped_data) if delta and db_path else None
+
+    reused = prepared is not None and not any(c["changed"] for c in prepared[1])
+    if prepared is not None and reused:
+        print("No positioning changes since the stored brief, reusing it")
+        brief = prepared[0]
+    else:
+        # Build prompts. In delta mode the previous brief already shows the schema,
+        # so the few-shot example is left out (the compact one is needed for its key spec).
+        if prepared:
+            previous_brief, change_sets = prepared
+            changed = [c["company"] for c in change_sets if c["changed"]]
+            print(f"Delta analysis: changes for {', '.join(changed)}")
+            system_prompt = build_system_prompt(context, example_brief if compact else "", compact)
+            user_prompt = build_delta_prompt(previous_brief, change_sets, scraped_data, compact)
+        else:
+            system_prompt, user_prompt = build_prompts(
+                scraped_data,
+                context,
+                example_brief,
+                territory_scores if prescore else None,
+                compact,
+                extract,
+                db_path,
+                passages,
+            )
+
+        # Estimate tokens (rough: 4 chars per token)
+        est_tokens = (len(system_prompt) + len(user_prompt)) // 4
+        print(f"Estimated input: ~{est_tokens:,} tokens")
+
+        # Run analysis
+        brief = run_analysis(system_prompt, user_prompt, provider, model, route)
+        if route is not None and route.winner is not None:
+            # Follow-up calls go to the provider that answered
+            provider, model = route.winner.provider, route.winner.model
+        if lint != "off":
+            brief = lint_and_repair(brief, provider, model, repair=lint == "repair")
+        check_competitor_overlap(brief, scraped_data, db_path)
+
+    # Ensure metadata is set
+    website = scraped_data["target"].get("website", "")
+    return complete_brief(brief, target_company, website, competitor_names, territory_scores), reused
+
+
+def run(args):
+    load_env()
+
+    provider, model = resolve_provider(args.provider, args.model)
+
+    if args.delta and args.store != "sqlite":
+        print("Error: --delta needs the snapshot history of --store sqlite")
+        sys.exit(1)
+
+    # Load everything
+    print("Loading context files...")
+    context = load_context_files()
+    example_brief = load_example_brief()
+    db_path = None
+    if args.store == "sqlite":
+        from positioning_engine.store import store_path
+
+        db_path = store_path(args)
+        scraped_data = load_scraped_data_from_store(db_path, args.input, args.competitors)
+    else:
+        scraped_data = load_scraped_data(resolve_path(args.input), args.competitors)
+
+    from positioning_engine.router import plan_route
+
+    brief, reused = generate_brief(
+        scraped_data,
+        provider,
+        model,
+        context,
+        example_brief,
+        prescore=args.prescore,
+        lint=args.lint,
+        db_path=db_path,
+        delta=args.delta,
+        route=plan_route(provider, model, args.hedge_after, args.timeout, args.failover),
+        compact=args.compact,
+        extract=args.extract,
+        passages=args.passages,
+    )
+
+    # Save output
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    slug = slugify(scraped_data["target"].get("company", "unknown"))
+    output_path = Path(args.output) if args.output else OUTPUT_DIR / f"{slug}-brief.json"
+
+    with open(output_path, "w") as f:
+        json.dump(brief, f, indent=2, ensure_ascii=False)
+
+    if db_path and not reused:
+        from positioning_engine import store
+
+        brief_id = store.save_brief(store.connect(db_path), slug, brief, snapshot_ids(scraped_data))
+        print(f"Stored as brief {brief_id} in {db_path}")
+
+    print("=" * 50)
+    print(f"Brief saved to: {output_path}")
+    print(f"\nNext: python -m positioning_engine render {output_path}")
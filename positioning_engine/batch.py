@@ -0,0 +1,288 @@
+"""
+Batch Analysis
+
+Usage:
+    python -m positioning_engine batch runs.txt                  # submit, then wait for the briefs
+    python -m positioning_engine batch runs.txt --store sqlite --compact --no-wait
+    python -m positioning_engine batch                           # resume waiting on unfinished batches
+    python -m positioning_engine batch --status
+
+For overnight refreshes of many briefs, where nobody waits on the answer.
+Every line of the runs file is one analysis, written like the arguments of
+`analyze`: the target's scraped JSON (or its slug with --store sqlite)
+followed by competitor slugs:
+
+    output/kast-positioning.json revolut crypto-com
+    output/revolut-positioning.json kast wise
+
+All prompts go to the Anthropic Message Batches API as one batch, which
+costs half the price of the same requests made one by one. The batch id
+and what is needed to finish each brief are saved to
+output/batches/{batch_id}.json before any waiting starts, so the process can
+be stopped and `batch` run again later to pick the batch up. Polling starts
+at `--poll` seconds and doubles up to POLL_MAX. Once the batch has ended its
+results are streamed; each one is validated with parse_and_validate, linted,
+and saved to output/{slug}-brief.json (and the store) as it is read, and
+the state file records it, so a restart never writes a brief twice.
+
+A response that does not parse is saved next to the state file instead of
+being repaired, since a repair prompt would be a new synchronous request;
+re-run `analyze` for that company. For the same reason `--lint` defaults to
+report here: `--lint repair` sends each brief with a banned phrase through
+a synchronous, full-price repair call while the results are collected.
+
+Each request's custom_id is the company slug cut to CUSTOM_ID_MAX
+characters, or run-{n} when the slug is empty (a name in a non-Latin
+script) or already taken, since the API rejects the whole batch over one
+invalid id.
+"""
+
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from positioning_engine import trace
+from positioning_engine.core import OUTPUT_DIR, load_env, resolve_path, slugify, write_json_atomic
+
+BATCH_DIR = OUTPUT_DIR / "batches"
+POLL_MAX = 600.0
+CUSTOM_ID_MAX = 64  # custom_id must match ^[a-zA-Z0-9_-]{1,64}$
+
+
+def read_runs(path: Path) -> list[list[str]]:
+    """(input, *competitors) of every run in a runs file."""
+    with open(path) as f:
+        return [line.split() for line in f if line.strip() and not line.startswith("#")]
+
+
+def state_path(batch_id: str) -> Path:
+    return BATCH_DIR / f"{batch_id}.json"
+
+
+def save_state(state: dict):
+    write_json_atomic(state_path(state["id"]), state, indent=2, ensure_ascii=False)
+
+
+def load_states() -> list[dict]:
+    states = []
+    for path in sorted(BATCH_DIR.glob("msgbatch_*.json")):
+        with open(path) as f:
+            states.append(json.load(f))
+    return states
+
+
+def custom_id_for(slug: str, n: int, taken) -> str:
+    """A valid, unused custom_id for the n-th run (slugs are already [a-z0-9-])."""
+    custom_id = slug[:CUSTOM_ID_MAX].strip("-")
+    suffix = 0
+    while not custom_id or custom_id in taken:
+        suffix += 1
+        custom_id = f"run-{n}" if suffix == 1 else f"run-{n}-{suffix}"
+    return custom_id
+
+
+def submit(args, client: Any, model: str, db_path: Path | None) -> dict:
+    """Build every run's prompts, send them as one batch and save its state."""
+    from positioning_engine.analyze import (
+        anthropic_request,
+        build_prompts,
+        load_context_files,
+        load_example_brief,
+        load_scraped_data,
+        load_scraped_data_from_store,
+        snapshot_ids,
+    )
+    from positioning_engine.territory import score_companies, scraped_companies
+
+    context = load_context_files()
+    example_brief = load_example_brief()
+    requests = []
+    pending: dict[str, dict] = {}
+    for n, (target, *competitors) in enumerate(read_runs(resolve_path(args.runs)), 1):
+        if db_path:
+            scraped_data = load_scraped_data_from_store(db_path, target, competitors)
+        else:
+            scraped_data = load_scraped_data(resolve_path(target), competitors)
+        company = scraped_data["target"].get("company", "unknown")
+        slug = slugify(company)
+        if slug and any(r["slug"] == slug for r in pending.values()):
+            print(f"Error: {company} is listed twice in {args.runs}")
+            sys.exit(1)
+        custom_id = custom_id_for(slug, n, pending)
+
+        territory_scores = score_companies(scraped_companies(scraped_data))
+        system, user = build_prompts(
+            scraped_data,
+            context,
+            example_brief,
+            territory_scores if args.prescore else None,
+            args.compact,
+            args.extract,
+            db_path,
+            args.passages,
+        )
+        requests.append({"custom_id": custom_id, "params": anthropic_request(system, user, model)})
+        pending[custom_id] = {
+            "company": company,
+            "slug": slug,
+            "website": scraped_data["target"].get("website", ""),
+            "competitors": [d.get("company", s) for s, d in scraped_data["competitors"].items()],
+            "baseline": territory_scores,
+            "snapshot_ids": snapshot_ids(scraped_data) if db_path else None,
+            "output": str(OUTPUT_DIR / f"{slug or custom_id}-brief.json"),
+            "status": "pending",
+            "error": None,
+        }
+        print(f"{company}: ~{(len(system) + len(user)) // 4:,} input tokens")
+
+    if not requests:
+        print(f"Error: no runs in {args.runs}")
+        sys.exit(1)
+
+    with trace.span("batch_submit", requests=len(requests), model=model) as span:
+        batch = client.messages.batches.create(requests=requests)
+        span.set(batch_id=batch.id)
+    state = {
+        "id": batch.id,
+        "model": model,
+        "submitted_at": datetime.now().isoformat(),
+        "status": "submitted",
+        "lint": args.lint,
+        "db": str(db_path) if db_path else None,
+        "requests": pending,
+    }
+    save_state(state)
+    print(f"Submitted batch {batch.id} with {len(requests)} request(s), state in {state_path(batch.id)}")
+    return state
+
+
+def collect(client: Any, state: dict):
+    """Validate, lint and save each result of an ended batch as it streams in."""
+    from positioning_engine.analyze import complete_brief, lint_and_repair, parse_and_validate
+
+    for entry in client.messages.batches.results(state["id"]):
+        request = state["requests"].get(entry.custom_id)
+        if request is None or request["status"] != "pending":
+            continue
+
+        with trace.span("batch_result", custom_id=entry.custom_id, result=entry.result.type) as span:
+            if entry.result.type != "succeeded":
+                error = getattr(entry.result, "error", None)
+                request.update(status="failed", error=f"{entry.result.type}: {error}" if error else entry.result.type)
+                print(f"{request['company']}: {request['error']}")
+                save_state(state)
+                continue
+
+            message = entry.result.message
+            span.set(input_tokens=message.usage.input_tokens, output_tokens=message.usage.output_tokens)
+            raw = message.content[0].text
+            try:
+                brief = parse_and_validate(raw)
+            except (json.JSONDecodeError, ValueError) as e:
+                raw_path = BATCH_DIR / f"{state['id']}-{entry.custom_id}.txt"
+                raw_path.write_text(raw, encoding="utf-8")
+                request.update(status="failed", error=f"parse error: {e} (response in {raw_path})")
+                print(f"{request['company']}: {request['error']}")
+                save_state(state)
+                continue
+
+            if state["lint"] != "off":
+                brief = lint_and_repair(brief, "anthropic", state["model"], repair=state["lint"] == "repair")
+            complete_brief(brief, request["company"], request["website"], request["competitors"], request["baseline"])
+            write_json_atomic(Path(request["output"]), brief, indent=2, ensure_ascii=False)
+            if state["db"]:
+                from positioning_engine import store
+
+                conn = store.connect(Path(state["db"]))
+                brief_id = store.save_brief(conn, slugify(request["company"]), brief, request["snapshot_ids"])
+                print(f"{request['company']}: stored as brief {brief_id}")
+            request["status"] = "done"
+            save_state(state)
+            print(f"{request['company']}: brief saved to {request['output']}")
+
+    state["status"] = "done"
+    save_state(state)
+
+
+def wait(client: Any, states: list[dict], poll: float):
+    """Poll the open batches with a doubling delay and collect each one once it has ended."""
+    from anthropic import APIConnectionError, APIStatusError
+
+    delay = poll
+    open_states = [s for s in states if s["status"] != "done"]
+    while open_states:
+        for state in open_states:
+            try:
+                batch = client.messages.batches.retrieve(state["id"])
+            except (APIConnectionError, APIStatusError) as e:
+                print(f"{state['id']}: poll failed ({type(e).__name__}), retrying in {delay:g}s")
+                continue
+            counts = batch.request_counts
+            print(
+                f"{state['id']}: {batch.processing_status} - {counts.succeeded} succeeded, "
+                f"{counts.errored + counts.expired + counts.canceled} failed, {counts.processing} processing",
+                flush=True,
+            )
+            if batch.processing_status == "ended":
+                state["status"] = "ended"
+                collect(client, state)
+
+        open_states = [s for s in open_states if s["status"] != "done"]
+        if open_states:
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX)
+
+
+def print_status(states: list[dict]):
+    if not states:
+        print(f"No batches in {BATCH_DIR}")
+    for state in states:
+        counts: dict[str, int] = {}
+        for request in state["requests"].values():
+            counts[request["status"]] = counts.get(request["status"], 0) + 1
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+        print(f"{state['id']} ({state['submitted_at'][:16]}, {state['model']}): {state['status']} - {summary}")
+        for request in state["requests"].values():
+            if request["error"]:
+                print(f"  {request['company']}: {request['error']}")
+
+
+def run(args):
+    load_env()
+    if args.status:
+        print_status(load_states())
+        return
+
+    from positioning_engine.analyze import get_client, resolve_provider
+
+    # Message Batches is an Anthropic API; OpenRouter has no batch endpoint
+    _, model = resolve_provider("anthropic", args.model)
+    client = get_client("anthropic")
+
+    states = [s for s in load_states() if s["status"] != "done"]
+    if args.runs:
+        db_path = None
+        if args.store == "sqlite":
+            from positioning_engine.store import store_path
+
+            db_path = store_path(args)
+        states.append(submit(args, client, model, db_path))
+        if args.no_wait:
+            print("Collect the briefs later with: python -m positioning_engine batch")
+            return
+    elif not states:
+        print("No unfinished batches; give a runs file to submit one")
+        return
+
+    print(f"Waiting for {len(states)} batch(es)...")
+    wait(client, states, args.poll)
+
+    failed = sum(r["status"] == "failed" for s in states for r in s["requests"].values())
+    done = sum(r["status"] == "done" for s in states for r in s["requests"].values())
+    print("=" * 50)
+    print(f"Briefs saved: {done}, failed: {failed}")
+    if done:
+        print("\nNext: python -m positioning_engine render output/{slug}-brief.json")
@@ -0,0 +1,8 @@
+"""
+Offline benchmark harness.
+
+Everything here runs without live websites or paid API keys: `fixtures`
+serves recorded neobank pages from a local HTTP server, `mock_llm` stands in
+for the Anthropic and OpenRouter endpoints, and `runner` times each pipeline
+stage against them and writes a JSON report.
+"""
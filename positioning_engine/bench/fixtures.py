@@ -0,0 +1,212 @@
+"""
+Local fixture web server for recorded neobank pages.
+
+Serves every site in fixtures/sites.json under its own path prefix, so a
+scrape of `{base_url}/kast` walks the same candidate pages it would on the
+live site. Besides the recorded sites it serves synthetic ones that exercise
+the scraper's edge cases:
+
+    heavy   - a homepage with thousands of sections (large DOM)
+    slow    - the KAST pages, each delayed by `slow_delay` seconds
+    broken  - a homepage that returns HTTP 500
+
+Unknown paths return 404 and `redirects` entries return 301, matching what
+the scraper sees on real sites.
+"""
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+DEFAULT_HEAVY_SECTIONS = 2000
+DEFAULT_SLOW_DELAY = 1.5
+
+SYNTHETIC_SITES = ("heavy", "slow", "broken")
+
+
+@cache
+def load_sites() -> dict:
+    with open(FIXTURES_DIR / "sites.json") as f:
+        return json.load(f)
+
+
+def heavy_page(sections: int) -> dict:
+    """A homepage spec with `sections` heading/paragraph/button blocks."""
+    return {
+        "title": "Heavy Neobank | Everything, everywhere",
+        "meta_description": "A deliberately large page for scraper benchmarks.",
+        "headings": [["H2", f"Feature {i}: multi-currency account tier {i}"] for i in range(sections)],
+        "ctas": [f"Open account {i}" for i in range(sections)],
+        "paragraphs": [
+            f"Section {i} explains how card spending, yield and transfers work together across {i % 180} countries."
+            for i in range(sections)
+        ],
+    }
+
+
+def page_blocks(spec: dict) -> Iterator[tuple[str, str, str]]:
+    """Yield (kind, tag, text) for a page spec in document order."""
+    for text in spec.get("ctas", [])[:3]:
+        yield "cta", "a", text
+    headings = spec.get("headings", [])
+    paragraphs = spec.get("paragraphs", [])
+    for i in range(max(len(headings), len(paragraphs))):
+        if i < len(headings):
+            tag, text = headings[i]
+            yield "heading", tag, text
+        if i < len(paragraphs):
+            yield "paragraph", "p", paragraphs[i]
+        if i < len(spec.get("ctas", [])) and i >= 3:
+            yield "cta", "button", spec["ctas"][i]
+
+
+def render_page(spec: dict) -> str:
+    """Render a page spec as the HTML the fixture server returns."""
+    body = []
+    for kind, tag, text in page_blocks(spec):
+        if kind == "cta" and tag == "a":
+            body.append(f'<a class="btn btn-primary" href="#">{escape(text)}</a>')
+        elif kind == "cta":
+            body.append(f"<button>{escape(text)}</button>")
+        else:
+            body.append(f"<{tag.lower()}>{escape(text)}</{tag.lower()}>")
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{escape(spec.get('title', ''))}</title>"
+        f'<meta name="description" content="{escape(spec.get("meta_description", ""))}">'
+        "</head><body><main>"
+        + "\n".join(body)
+        + "</main></body></html>"
+    )
+
+
+def page_record(spec: dict, url: str, page_type: str) -> dict:
+    """The record scrape_page would extract from a fixture page, without a browser."""
+    headings = [
+        {"tag": tag, "text": text}
+        for kind, tag, text in page_blocks(spec)
+        if kind == "heading" and 0 < len(text) < 200
+    ]
+    ctas: list[str] = []
+    for kind, _, text in page_blocks(spec):
+        if kind == "cta" and 0 < len(text) < 60 and text not in ctas:
+            ctas.append(text)
+    body = [text for _, _, text in page_blocks(spec) if 10 < len(text) < 500]
+    return {
+        "url": url,
+        "page_type": page_type,
+        "title": spec.get("title", ""),
+        "meta_description": spec.get("meta_description", ""),
+        "headings": headings[:30],
+        "body_text": "\n".join(body)[:15000],
+        "links_text": ctas[:20],
+        "error": None,
+    }
+
+
+def resolve(site: str, path: str, heavy_sections: int = DEFAULT_HEAVY_SECTIONS) -> tuple[int, dict | str | None]:
+    """Resolve a site-relative path to (status, page spec | redirect target | None)."""
+    if site == "heavy":
+        return (200, heavy_page(heavy_sections)) if path == "" else (404, None)
+    if site == "broken":
+        return 500, None
+    sites = load_sites()
+    recorded = sites.get("kast" if site == "slow" else site)
+    if recorded is None:
+        return 404, None
+    if path in recorded.get("redirects", {}):
+        return 301, recorded["redirects"][path]
+    spec = recorded["pages"].get(path)
+    return (200, spec) if spec is not None else (404, None)
+
+
+def scraped_fixture(site: str, base_url: str = "http://fixtures.local") -> dict:
+    """
+    The positioning JSON a scrape of `site` would produce, built offline.
+
+    Follows the same candidate-page order, redirect, de-duplication and
+    thin-content rules as scrape_company.
+    """
+    from positioning_engine.scrape import candidate_pages
+
+    website = f"{base_url}/{site}"
+    company = load_sites()[site]["company"] if site in load_sites() else site.title()
+    data: dict = {"company": company, "website": website, "scraped_at": "fixture", "pages": []}
+
+    seen_types: set[str] = set()
+    for url, page_type in candidate_pages(website):
+        if page_type in seen_types and page_type != "homepage":
+            continue
+        path = url[len(website):].strip("/")
+        status, target = resolve(site, path)
+        if status == 301 and isinstance(target, str):
+            status, target = resolve(site, target)
+        if status >= 400 or not isinstance(target, dict):
+            continue
+        record = page_record(target, url, page_type)
+        if len(record["body_text"]) < 200 and page_type != "homepage":
+            continue
+        data["pages"].append(record)
+        seen_types.add(page_type)
+    return data
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server: "FixtureServer"
+
+    def do_GET(self):
+        site, _, path = self.path.split("?", 1)[0].strip("/").partition("/")
+        if site == "slow":
+            time.sleep(self.server.slow_delay)
+
+        status, target = resolve(site, path.strip("/"), self.server.heavy_sections)
+        if status == 301:
+            self.send_response(301)
+            self.send_header("Location", f"/{site}/{target}")
+            self.end_headers()
+            return
+
+        body = render_page(target) if isinstance(target, dict) else f"<h1>{status}</h1>"
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, heavy_sections: int, slow_delay: float):
+        super().__init__(address, FixtureHandler)
+        self.heavy_sections = heavy_sections
+        self.slow_delay = slow_delay
+
+
+@contextmanager
+def serve_fixtures(
+    port: int = 0,
+    heavy_sections: int = DEFAULT_HEAVY_SECTIONS,
+    slow_delay: float = DEFAULT_SLOW_DELAY,
+) -> Iterator[str]:
+    """Run the fixture server on a background thread and yield its base URL."""
+    server = FixtureServer(("127.0.0.1", port), heavy_sections, slow_delay)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,294 @@
+"""
+Local stand-in for the Anthropic and OpenRouter APIs.
+
+Speaks just enough of each wire format for the official SDKs:
+
+    POST /v1/messages          Anthropic Messages API
+    POST /v1/messages/batches  Anthropic Message Batches API (create, retrieve, results)
+    POST /v1/chat/completions  OpenAI-compatible chat completions (OpenRouter)
+
+Responses are the recorded briefs in examples/, picked by the "Target
+company:" line of the user prompt (falling back to kast-brief.json), in the
+compact wire schema when the prompt asks for it; lint repair prompts get
+their fields back with the banned phrases cut. Latency
+is a fixed delay plus an optional output-token generation rate, so runs are
+timed as if a real model were producing the brief. A non-200 `status` turns
+every answer into an API error, for failover tests. A batch stays
+"in_progress" for `batch_delay` seconds after it is created and then ends
+with one succeeded result per request; batches live as long as the server,
+so a client can be stopped and resumed against it. Point the analyzer at it
+with the variables from `mock_env()`.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from positioning_engine.core import EXAMPLES_DIR, slugify
+from positioning_engine.wire import WIRE_MARKER, compact_brief, dumps
+
+TARGET_RE = re.compile(r"^Target company: (.+)$", re.MULTILINE)
+CUSTOM_ID_RE = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")  # the API rejects the whole batch otherwise
+BATCH_PATH_RE = re.compile(r"/messages/batches/([\w-]+)(/results)?$")
+LINT_REPAIR_MARKER = "mapping each field path to its rewritten text"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (4 chars per token), matching the analyzer's estimate."""
+    return max(1, len(text) // 4)
+
+
+def load_recorded_briefs() -> dict[str, str]:
+    """Map company slug to the raw text of each examples/{slug}-brief.json."""
+    return {
+        path.name[: -len("-brief.json")]: path.read_text(encoding="utf-8")
+        for path in sorted(EXAMPLES_DIR.glob("*-brief.json"))
+    }
+
+
+@dataclass
+class MockLLMConfig:
+    latency: float = 0.0  # seconds before the first byte
+    tokens_per_second: float | None = None  # output generation rate; None = instant
+    status: int = 200  # any other status answers every request with an API error
+    batch_delay: float = 0.0  # seconds a message batch stays in_progress
+    briefs: dict[str, str] = field(default_factory=load_recorded_briefs)
+
+
+def flatten_content(content) -> str:
+    """Text of a string or a list of content blocks."""
+    if isinstance(content, str):
+        return content
+    return "\n".join(block.get("text", "") for block in content or [] if isinstance(block, dict))
+
+
+def anthropic_message(request: dict, reply_for) -> tuple[dict, str]:
+    """Messages API response body for a request, and its text."""
+    prompt = flatten_content(request.get("system")) + "\n" + "\n".join(
+        flatten_content(m.get("content")) for m in request.get("messages", [])
+    )
+    text = reply_for(prompt)
+    body = {
+        "id": f"msg_mock_{uuid.uuid4().hex[:12]}",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model", "mock"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": estimate_tokens(prompt),
+            "output_tokens": estimate_tokens(text),
+        },
+    }
+    return body, text
+
+
+def iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    server: "MockLLMServer"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        match = BATCH_PATH_RE.search(path)
+        batch = self.server.batches.get(match.group(1)) if match else None
+        if match is None or batch is None:
+            self.send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+            return
+        self.server.record(path, {})
+        status = self.server.config.status
+        if status != 200:
+            self.send_json(status, {"type": "error", "error": {"type": "api_error", "message": f"mock status {status}"}})
+            return
+        if not match.group(2):
+            self.send_json(200, self.server.batch_object(batch, f"http://{self.headers.get('Host')}"))
+            return
+
+        lines = "".join(json.dumps(result) + "\n" for result in batch["results"])
+        payload = lines.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        path = self.path.split("?", 1)[0].rstrip("/")
+
+        if path.endswith("/messages/batches"):
+            invalid = [r["custom_id"] for r in request["requests"] if not CUSTOM_ID_RE.match(r["custom_id"])]
+            if invalid:
+                message = f"invalid custom_id: {invalid[0]!r}"
+                self.send_json(400, {"type": "error", "error": {"type": "invalid_request_error", "message": message}})
+                return
+            batch = self.server.create_batch(request["requests"])
+            body = self.server.batch_object(batch, f"http://{self.headers.get('Host')}")
+            text = ""
+        elif path.endswith("/messages"):
+            body, text = anthropic_message(request, self.server.reply_for)
+        elif path.endswith("/chat/completions"):
+            prompt = "\n".join(flatten_content(m.get("content")) for m in request.get("messages", []))
+            text = self.server.reply_for(prompt)
+            body = {
+                "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": estimate_tokens(prompt),
+                    "completion_tokens": estimate_tokens(text),
+                    "total_tokens": estimate_tokens(prompt) + estimate_tokens(text),
+                },
+            }
+        else:
+            self.send_json(404, {"error": {"type": "not_found", "message": self.path}})
+            return
+
+        self.server.record(path, request)
+        self.server.simulate_latency(text)
+        status = self.server.config.status
+        if status != 200:
+            body = {"type": "error", "error": {"type": "api_error", "message": f"mock status {status}"}}
+        self.send_json(status, body)
+
+    def send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the request (timeout, or a hedged request that lost)
+            self.server.dropped += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def lint_repair_reply(prompt: str) -> str:
+    """Answer a lint repair prompt by deleting each field's banned phrases."""
+    fields = json.JSONDecoder().raw_decode(prompt, prompt.index("{"))[0]
+    rewrites = {}
+    for path, entry in fields.items():
+        text = entry["text"]
+        for phrase in entry["banned"]:
+            text = re.sub(re.escape(phrase), "", text, flags=re.IGNORECASE)
+        rewrites[path] = re.sub(r"\s{2,}", " ", text).strip()
+    return json.dumps(rewrites)
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockLLMConfig):
+        super().__init__(address, MockLLMHandler)
+        self.config = config
+        self.requests: list[tuple[str, dict]] = []
+        self.dropped = 0  # responses the client no longer waited for
+        self.batches: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def create_batch(self, requests: list[dict]) -> dict:
+        """Answer every request of a batch up front; they are released after `batch_delay`."""
+        results = []
+        for item in requests:
+            message, _ = anthropic_message(item["params"], self.reply_for)
+            results.append({"custom_id": item["custom_id"], "result": {"type": "succeeded", "message": message}})
+        batch: dict = {"id": f"msgbatch_mock_{uuid.uuid4().hex[:12]}", "created": time.time(), "results": results}
+        with self._lock:
+            self.batches[batch["id"]] = batch
+        return batch
+
+    def batch_object(self, batch: dict, base: str) -> dict:
+        ended = time.time() >= batch["created"] + self.config.batch_delay
+        count = len(batch["results"])
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else count,
+                "succeeded": count if ended else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": iso(batch["created"]),
+            "ended_at": iso(batch["created"] + self.config.batch_delay) if ended else None,
+            "expires_at": iso(batch["created"] + timedelta(days=1).total_seconds()),
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{base}/v1/messages/batches/{batch['id']}/results" if ended else None,
+        }
+
+    def reply_for(self, prompt: str) -> str:
+        if LINT_REPAIR_MARKER in prompt:
+            return lint_repair_reply(prompt)
+        briefs = self.config.briefs
+        match = TARGET_RE.search(prompt)
+        slug = slugify(match.group(1)) if match else ""
+        text = briefs[slug] if slug in briefs else briefs.get("kast") or next(iter(briefs.values()))
+        if WIRE_MARKER in prompt:
+            return dumps(compact_brief(json.loads(text)))
+        return text
+
+    def simulate_latency(self, text: str):
+        delay = self.config.latency
+        if self.config.tokens_per_second:
+            delay += estimate_tokens(text) / self.config.tokens_per_second
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, path: str, request: dict):
+        with self._lock:
+            self.requests.append((path, request))
+
+
+@contextmanager
+def serve_mock_llm(config: MockLLMConfig | None = None, port: int = 0) -> Iterator[MockLLMServer]:
+    """Run the mock LLM server on a background thread and yield it."""
+    server = MockLLMServer(("127.0.0.1", port), config or MockLLMConfig())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def base_url(server: MockLLMServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def mock_env(server: MockLLMServer, openrouter: MockLLMServer | None = None) -> dict[str, str]:
+    """Environment that points both analyzer providers at the mock server.
+
+    With `openrouter`, OpenRouter requests go to that second server instead,
+    so the two providers can be given different latencies or failures.
+    """
+    return {
+        "ANTHROPIC_API_KEY": "mock-key",
+        "ANTHROPIC_BASE_URL": base_url(server),
+        "OPENROUTER_API_KEY": "mock-key",
+        "OPENROUTER_BASE_URL": f"{base_url(openrouter or server)}/v1",
+    }
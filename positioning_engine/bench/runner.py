@@ -0,0 +1,514 @@
+"""
+Offline Benchmark Runner
+
+Usage:
+    python -m positioning_engine bench
+    python -m positioning_engine bench --only prompt render --iterations 50
+    python -m positioning_engine bench --baseline output/bench/bench-20260301-120000.json
+    python -m positioning_engine bench --serve
+
+Times each pipeline stage against local stand-ins, never the live web or a
+paid API:
+
+    scrape    scrape_company against the fixture web server (needs Chromium)
+    prompt    load_context_files + build_system_prompt/build_user_prompt
+    analysis  run_analysis through both SDKs against the mock LLM server
+    hedge     run_analysis routed across two mock servers, the primary slowed
+              down, so the hedged request to the second one wins; also
+              checks that a half-open primary recovers after its trial
+              request loses a hedge (the run exits 1 if it stays locked out)
+    wire      output/prompt tokens and mock generation latency of the full
+              brief schema versus the compact wire schema
+    render    render_html (and WeasyPrint, when installed) on the example briefs
+
+Writes a JSON report to output/bench/. With --baseline, every p50 and wall
+time is compared against an earlier report and the run exits 1 if any
+regressed by more than --tolerance.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from datetime import datetime
+from importlib.util import find_spec
+from pathlib import Path
+
+from positioning_engine import __version__
+from positioning_engine.bench.fixtures import (
+    SYNTHETIC_SITES,
+    load_sites,
+    scraped_fixture,
+    serve_fixtures,
+)
+from positioning_engine.bench.mock_llm import MockLLMConfig, mock_env, serve_mock_llm
+from positioning_engine.core import EXAMPLES_DIR, OUTPUT_DIR, PROJECT_DIR, resolve_path
+
+BENCHMARKS = ("scrape", "prompt", "analysis", "hedge", "wire", "render")
+HEDGE_SLOW_S = 1.0  # extra latency of the primary provider in the hedge benchmark
+HEDGE_AFTER_S = 0.2
+WIRE_TOKENS_PER_SECOND = 5000.0  # mock generation rate for the wire benchmark, unless set
+WIRE_MAX_ITERATIONS = 3  # each iteration generates a whole brief at that rate
+NOISE_FLOOR_MS = 1.0  # slowdowns smaller than this are never reported as regressions
+TARGET_SITE = "kast"
+COMPETITOR_SITES = ("revolut", "crypto-com")
+
+
+def summarize(samples: list[float], **extra) -> dict:
+    """Latency stats in milliseconds for a list of durations in seconds."""
+    ms = sorted(s * 1000 for s in samples)
+    p95 = statistics.quantiles(ms, n=20, method="inclusive")[18] if len(ms) > 1 else ms[0]
+    return {
+        "status": "ok",
+        "iterations": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(p95, 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+        **extra,
+    }
+
+
+def skipped(reason: str) -> dict:
+    return {"status": "skipped", "reason": reason}
+
+
+def time_calls(fn: Callable[[], object], iterations: int, warmup: int = 1) -> list[float]:
+    """Durations of `iterations` calls, after `warmup` untimed calls (imports, caches)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+@contextlib.contextmanager
+def quiet() -> Iterator[None]:
+    """Swallow the stages' progress prints while they are being timed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@contextlib.contextmanager
+def patched_env(values: dict[str, str]) -> Iterator[None]:
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@contextlib.contextmanager
+def scratch_output() -> Iterator[Path]:
+    """Point the scraper's page streams at a temporary directory instead of output/.
+
+    Otherwise bench streams for the fixture sites would be left in output/,
+    where analyze falls back to them.
+    """
+    from positioning_engine import scrape, stream
+
+    saved = scrape.OUTPUT_DIR, stream.OUTPUT_DIR
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        scrape.OUTPUT_DIR = stream.OUTPUT_DIR = Path(tmp)
+        try:
+            yield Path(tmp)
+        finally:
+            scrape.OUTPUT_DIR, stream.OUTPUT_DIR = saved
+
+
+async def launch_chromium():
+    """Start and stop Chromium once, so a missing browser skips the bench up front."""
+    from positioning_engine.scrape import load_playwright
+
+    async with load_playwright()() as p:
+        await (await p.chromium.launch(headless=True)).close()
+
+
+def fixture_dataset() -> dict:
+    """Scraped data for the target and competitor fixture sites, in analyzer shape."""
+    return {
+        "target": scraped_fixture(TARGET_SITE),
+        "competitors": {site: scraped_fixture(site) for site in COMPETITOR_SITES},
+    }
+
+
+def bench_scrape(heavy_sections: int, slow_delay: float) -> dict:
+    if find_spec("playwright") is None:
+        return skipped("playwright not installed")
+
+    from playwright.async_api import Error as PlaywrightError
+
+    from positioning_engine.scrape import scrape_company
+
+    try:
+        asyncio.run(launch_chromium())
+    except PlaywrightError as e:
+        return skipped(f"browser unavailable: {str(e).splitlines()[0]}")
+
+    sites = [*load_sites(), *SYNTHETIC_SITES]
+    per_site = {}
+    total_pages = 0
+    start_all = time.perf_counter()
+    with serve_fixtures(heavy_sections=heavy_sections, slow_delay=slow_delay) as base_url, scratch_output():
+        for site in sites:
+            start = time.perf_counter()
+            with quiet():
+                data = asyncio.run(scrape_company(site, f"{base_url}/{site}"))
+            elapsed = time.perf_counter() - start
+            pages = len(data["pages"])
+            total_pages += pages
+            per_site[site] = {
+                "wall_ms": round(elapsed * 1000, 1),
+                "pages": pages,
+                "body_chars": sum(len(p["body_text"]) for p in data["pages"]),
+            }
+    total = time.perf_counter() - start_all
+    return {
+        "status": "ok",
+        "wall_ms": round(total * 1000, 1),
+        "pages": total_pages,
+        "pages_per_s": round(total_pages / total, 3),
+        "per_site": per_site,
+    }
+
+
+def bench_prompt(iterations: int) -> dict:
+    from positioning_engine.analyze import (
+        build_system_prompt,
+        build_user_prompt,
+        load_context_files,
+        load_example_brief,
+    )
+
+    data = fixture_dataset()
+    with quiet():
+        load_samples = time_calls(lambda: (load_context_files(), load_example_brief()), iterations)
+    context = load_context_files()
+    example = load_example_brief()
+
+    def build():
+        return build_system_prompt(context, example), build_user_prompt(data)
+
+    system, user = build()
+    return summarize(
+        time_calls(build, iterations),
+        context_load_p50_ms=round(statistics.median(load_samples) * 1000, 3),
+        system_chars=len(system),
+        user_chars=len(user),
+        est_input_tokens=(len(system) + len(user)) // 4,
+    )
+
+
+def bench_analysis(iterations: int, config: MockLLMConfig) -> dict:
+    from positioning_engine.analyze import (
+        build_system_prompt,
+        build_user_prompt,
+        load_context_files,
+        load_example_brief,
+        run_analysis,
+    )
+
+    providers = {"anthropic": "anthropic", "openrouter": "openai"}
+    with quiet():
+        system = build_system_prompt(load_context_files(), load_example_brief())
+    user = build_user_prompt(fixture_dataset())
+
+    results = {}
+    with serve_mock_llm(config) as server, patched_env(mock_env(server)):
+        for provider, sdk in providers.items():
+            if find_spec(sdk) is None:
+                results[provider] = skipped(f"{sdk} SDK not installed")
+                continue
+            served_before = len(server.requests)
+            with quiet():
+                samples = time_calls(lambda: run_analysis(system, user, provider, "mock-model"), iterations)
+            results[provider] = summarize(samples, requests=len(server.requests) - served_before)
+
+    ran = [r for r in results.values() if r["status"] == "ok"]
+    if not ran:
+        return {"status": "skipped", "reason": "no LLM SDK installed", "providers": results}
+    return {
+        "status": "ok",
+        "mock_latency_s": config.latency,
+        "mock_tokens_per_second": config.tokens_per_second,
+        "providers": results,
+    }
+
+
+def bench_hedge(iterations: int, config: MockLLMConfig) -> dict:
+    from positioning_engine.analyze import (
+        build_system_prompt,
+        build_user_prompt,
+        load_context_files,
+        load_example_brief,
+        run_analysis,
+    )
+    from positioning_engine.router import Leg, Route, breaker
+
+    missing = [sdk for sdk in ("anthropic", "openai") if find_spec(sdk) is None]
+    if missing:
+        return skipped(f"{', '.join(missing)} SDK not installed")
+
+    with quiet():
+        system = build_system_prompt(load_context_files(), load_example_brief())
+    user = build_user_prompt(fixture_dataset())
+
+    slow = MockLLMConfig(latency=config.latency + HEDGE_SLOW_S, tokens_per_second=config.tokens_per_second)
+    wins: dict[str, int] = {}
+
+    def call():
+        route = Route([Leg("anthropic", "mock-model"), Leg("openrouter", "mock-model")], HEDGE_AFTER_S)
+        run_analysis(system, user, "anthropic", "mock-model", route)
+        assert route.winner is not None
+        wins[route.winner.provider] = wins.get(route.winner.provider, 0) + 1
+
+    with serve_mock_llm(slow) as primary, serve_mock_llm(config) as secondary, \
+            patched_env(mock_env(primary, secondary)):
+        with quiet():
+            samples = time_calls(call, iterations)
+
+            # A half-open primary's trial request loses the hedge; the next request must still
+            # be let through as a trial, and close the breaker once it succeeds
+            primary_breaker = breaker("anthropic")
+            with primary_breaker.lock:
+                primary_breaker.failures = primary_breaker.threshold
+                primary_breaker.opened_at = time.monotonic() - primary_breaker.cooldown
+            run_analysis(system, user, "anthropic", "mock-model", Route(
+                [Leg("anthropic", "mock-model"), Leg("openrouter", "mock-model")], HEDGE_AFTER_S
+            ))
+            try:
+                run_analysis(system, user, "anthropic", "mock-model", Route([Leg("anthropic", "mock-model")]))
+            except SystemExit:
+                pass
+            recovered = primary_breaker.state == "closed"
+    return summarize(
+        samples,
+        primary_latency_s=slow.latency,
+        secondary_latency_s=config.latency,
+        hedge_after_s=HEDGE_AFTER_S,
+        wins=wins,
+        half_open_recovers=recovered,
+    )
+
+
+def bench_wire(iterations: int, config: MockLLMConfig) -> dict:
+    from positioning_engine import wire
+    from positioning_engine.analyze import (
+        build_system_prompt,
+        build_user_prompt,
+        load_context_files,
+        load_example_brief,
+        run_analysis,
+    )
+    from positioning_engine.bench.mock_llm import estimate_tokens, load_recorded_briefs
+
+    # Output size of every recorded brief in both forms
+    briefs = {}
+    for slug, text in load_recorded_briefs().items():
+        full, compact = estimate_tokens(text), estimate_tokens(wire.dumps(wire.compact_brief(json.loads(text))))
+        briefs[slug] = {"full_tokens": full, "compact_tokens": compact, "saved": round(1 - compact / full, 3)}
+
+    with quiet():
+        context, example_brief = load_context_files(), load_example_brief()
+    user = build_user_prompt(fixture_dataset())
+    systems = {mode: build_system_prompt(context, example_brief, mode == "compact") for mode in ("full", "compact")}
+    result: dict = {
+        "status": "ok",
+        "briefs": briefs,
+        "system_prompt_tokens": {mode: estimate_tokens(text) for mode, text in systems.items()},
+    }
+
+    if find_spec("anthropic") is None:
+        result["latency"] = skipped("anthropic SDK not installed")
+        return result
+
+    rate = config.tokens_per_second or WIRE_TOKENS_PER_SECOND
+    generating = MockLLMConfig(latency=config.latency, tokens_per_second=rate)
+    latency: dict = {"mock_tokens_per_second": rate}
+    with serve_mock_llm(generating) as server, patched_env(mock_env(server)):
+        for mode, system in systems.items():
+            with quiet():
+                samples = time_calls(
+                    lambda: run_analysis(system, user, "anthropic", "mock-model"),
+                    min(iterations, WIRE_MAX_ITERATIONS),
+                )
+            latency[mode] = summarize(samples)
+    latency["saved"] = round(1 - latency["compact"]["p50_ms"] / latency["full"]["p50_ms"], 3)
+    result["latency"] = latency
+    return result
+
+
+def bench_render(iterations: int) -> dict:
+    from positioning_engine.render import render_html
+
+    briefs = [json.loads(p.read_text(encoding="utf-8")) for p in sorted(EXAMPLES_DIR.glob("*-brief.json"))]
+    if not briefs:
+        return skipped("no example briefs")
+
+    samples = time_calls(lambda: [render_html(b) for b in briefs], iterations)
+    result = summarize(
+        [s / len(briefs) for s in samples],
+        briefs=len(briefs),
+        html_bytes=sum(len(render_html(b)) for b in briefs),
+    )
+
+    if find_spec("weasyprint") is None:
+        result["pdf"] = skipped("weasyprint not installed")
+    else:
+        from weasyprint import HTML
+
+        htmls = [render_html(b) for b in briefs]
+        pdf_samples = time_calls(lambda: [HTML(string=h).write_pdf() for h in htmls], min(iterations, 3))
+        result["pdf"] = summarize([s / len(htmls) for s in pdf_samples])
+    return result
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def iter_timings(node, path: str = "") -> Iterator[tuple[str, float]]:
+    """Yield (dotted path, ms) for every p50_ms / wall_ms in a report subtree."""
+    if not isinstance(node, dict) or node.get("status") == "skipped":
+        return
+    for key, value in node.items():
+        if key in ("p50_ms", "wall_ms") and isinstance(value, (int, float)):
+            yield f"{path}.{key}", float(value)
+        elif isinstance(value, dict):
+            yield from iter_timings(value, f"{path}.{key}" if path else key)
+
+
+def compare_reports(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Describe every timing that regressed by more than `tolerance` versus the baseline."""
+    before = dict(iter_timings(baseline.get("benchmarks", {})))
+    regressions = []
+    for path, value in iter_timings(current.get("benchmarks", {})):
+        old = before.get(path)
+        if old and value > old * (1 + tolerance) and value - old > NOISE_FLOOR_MS:
+            regressions.append(f"{path}: {old:.2f} ms -> {value:.2f} ms (+{(value / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def serve_forever(args):
+    config = MockLLMConfig(latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second)
+    with serve_fixtures(heavy_sections=args.heavy_sections, slow_delay=args.slow_delay) as fixtures_url, \
+            serve_mock_llm(config) as server:
+        print(f"Fixture sites: {fixtures_url}/<site>  ({', '.join([*load_sites(), *SYNTHETIC_SITES])})")
+        print("Mock LLM environment:")
+        for key, value in mock_env(server).items():
+            print(f"  export {key}={value}")
+        print("Ctrl-C to stop")
+        with contextlib.suppress(KeyboardInterrupt):
+            while True:
+                time.sleep(3600)
+
+
+def run(args):
+    if args.serve:
+        serve_forever(args)
+        return
+
+    selected = args.only or list(BENCHMARKS)
+    config = MockLLMConfig(latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second)
+
+    report = {
+        "engine_version": __version__,
+        "git_revision": git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "benchmarks": {},
+    }
+
+    for name in selected:
+        print(f"[bench] {name}...", flush=True)
+        if name == "scrape":
+            result = bench_scrape(args.heavy_sections, args.slow_delay)
+        elif name == "prompt":
+            result = bench_prompt(args.iterations)
+        elif name == "analysis":
+            result = bench_analysis(args.iterations, config)
+        elif name == "hedge":
+            result = bench_hedge(args.iterations, config)
+        elif name == "wire":
+            result = bench_wire(args.iterations, config)
+        else:
+            result = bench_render(args.iterations)
+        report["benchmarks"][name] = result
+
+        if result["status"] == "skipped":
+            print(f"  skipped: {result['reason']}")
+        elif name == "scrape":
+            print(f"  {result['pages']} pages in {result['wall_ms']:.0f} ms ({result['pages_per_s']} pages/s)")
+        elif name == "analysis":
+            for provider, stats in result["providers"].items():
+                if stats["status"] == "ok":
+                    print(f"  {provider}: p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms")
+        elif name == "hedge":
+            wins = ", ".join(f"{p} {n}" for p, n in result["wins"].items())
+            print(f"  p50 {result['p50_ms']:.2f} ms with a {result['primary_latency_s']:g}s primary (wins: {wins})")
+            print(f"  half-open primary recovers after losing a hedge: {'yes' if result['half_open_recovers'] else 'NO'}")
+        elif name == "wire":
+            for slug, sizes in result["briefs"].items():
+                print(f"  {slug}: ~{sizes['full_tokens']} -> ~{sizes['compact_tokens']} output tokens "
+                      f"({sizes['saved']:.0%} fewer)")
+            prompts = result["system_prompt_tokens"]
+            print(f"  system prompt: ~{prompts['full']} -> ~{prompts['compact']} tokens")
+            latency = result["latency"]
+            if latency.get("status") != "skipped":
+                print(f"  p50 {latency['full']['p50_ms']:.0f} -> {latency['compact']['p50_ms']:.0f} ms "
+                      f"at {latency['mock_tokens_per_second']:g} tokens/s ({latency['saved']:.0%} faster)")
+        else:
+            print(f"  p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms")
+
+    if args.report:
+        report_path = resolve_path(args.report)
+    else:
+        report_path = OUTPUT_DIR / "bench" / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("=" * 50)
+    print(f"Report saved to: {report_path}")
+
+    hedge = report["benchmarks"].get("hedge", {})
+    if hedge.get("status") == "ok" and not hedge["half_open_recovers"]:
+        print("Error: a half-open provider whose trial lost a hedge stayed locked out")
+        sys.exit(1)
+
+    if args.baseline:
+        with open(resolve_path(args.baseline)) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        print(f"Compared against {Path(args.baseline).name} (tolerance {args.tolerance:.0%})")
+        if regressions:
+            for line in regressions:
+                print(f"REGRESSION: {line}")
+            sys.exit(1)
+        print("No regressions")
@@ -0,0 +1,524 @@
+"""
+Positioning Engine CLI
+
+Usage:
+    python -m positioning_engine scrape "KAST" "https://kast.xyz"
+    python -m positioning_engine analyze output/kast-positioning.json --competitors revolut crypto-com
+    python -m positioning_engine render output/kast-brief.json
+    python -m positioning_engine pipeline "KAST" "https://kast.xyz" \\
+        --competitors "Revolut:https://revolut.com" "Crypto.com:https://crypto.com"
+    python -m positioning_engine --trace output/trace.jsonl pipeline ...
+
+All argument parsing lives here so that `--help` (and argument errors) never
+import a stage module. Each subcommand names its handler as "module:function";
+the module is imported only once the subcommand has been chosen, and the stage
+modules in turn import Playwright, the LLM SDKs and WeasyPrint only when they
+actually run.
+"""
+
+import argparse
+import importlib
+
+
+def add_provider_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--model",
+        default=None,
+        help="Model to use (default: claude-sonnet-4-5 for the chosen provider)",
+    )
+    parser.add_argument(
+        "--provider",
+        choices=["anthropic", "openrouter"],
+        default=None,
+        help="Force a specific provider (default: auto-detect from available API keys)",
+    )
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Also send the request to the other configured provider when the first has not "
+        "answered after SECONDS; the first valid brief wins (default: off)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=timeout_arg,
+        action="append",
+        default=None,
+        metavar="[PROVIDER=]SECONDS",
+        help="Request timeout for every provider or one of them (repeatable; default: 300)",
+    )
+    parser.add_argument(
+        "--failover",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Retry a failed request on the other configured provider (default: on)",
+    )
+
+
+def timeout_arg(value: str) -> tuple[str | None, float]:
+    provider, _, seconds = value.rpartition("=")
+    if provider and provider not in ("anthropic", "openrouter"):
+        raise argparse.ArgumentTypeError(f"unknown provider {provider!r}")
+    try:
+        limit = float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid timeout {value!r}") from None
+    if limit <= 0:
+        raise argparse.ArgumentTypeError("timeout must be positive")
+    return provider or None, limit
+
+
+def add_store_args(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--store",
+        choices=["json", "sqlite"],
+        default="json",
+        help="Scraped data backend: output/{slug}-positioning.json files or the "
+        "SQLite snapshot store (default: json)",
+    )
+    parser.add_argument(
+        "--db",
+        default=None,
+        help="SQLite store path (default: output/positioning.sqlite)",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="positioning-engine",
+        description="Scrape, analyze and render neobank positioning briefs",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        default=None,
+        help="Append per-stage timing spans to this JSONL file (see trace-summary)",
+    )
+    sub = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    # scrape
+    p = sub.add_parser(
+        "scrape",
+        help="Scrape a company website for positioning content",
+        description="Scrape a company's website and save output/{slug}-positioning.json",
+    )
+    p.add_argument("company", help='Company name (e.g. "KAST")')
+    p.add_argument("url", help='Company website URL (e.g. "https://kast.xyz")')
+    p.add_argument(
+        "--save-html",
+        action="store_true",
+        help="Also save each loaded page's rendered DOM under output/html/ for reextract",
+    )
+    add_store_args(p)
+    p.set_defaults(handler="positioning_engine.scrape:run")
+
+    # sweep
+    p = sub.add_parser(
+        "sweep",
+        help="Scrape many companies across worker processes from a SQLite job queue",
+        description="Queue one job per company page and scrape them on N worker processes, each with "
+        "its own Chromium, with per-domain politeness, retries with backoff and lease recovery",
+    )
+    p.add_argument("sites", nargs="*", help='Companies as "Name:URL" (none: resume unsaved companies)')
+    p.add_argument("--file", default=None, help='File with one "Name:URL" per line (# for comments)')
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument(
+        "--per-domain",
+        type=int,
+        default=1,
+        help="Pages of one domain loading at once across all workers (default: 1)",
+    )
+    p.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Minimum seconds between page loads on one domain (default: 1.0)",
+    )
+    p.add_argument("--retries", type=int, default=3, help="Attempts per page before it fails (default: 3)")
+    p.add_argument("--queue-db", default=None, help="Sweep queue database (default: output/sweep.sqlite)")
+    p.add_argument("--status", action="store_true", help="Print queue progress and exit")
+    add_store_args(p)
+    p.set_defaults(handler="positioning_engine.sweep:run")
+
+    # analyze
+    p = sub.add_parser(
+        "analyze",
+        help="Generate a positioning brief from scraped data",
+        description="Analyze scraped positioning data and generate a structured brief",
+    )
+    p.add_argument(
+        "input",
+        help="Path to scraped positioning JSON (e.g. output/kast-positioning.json), "
+        "or the company slug with --store sqlite",
+    )
+    p.add_argument(
+        "--competitors",
+        nargs="*",
+        default=[],
+        help="Slugs of competitor scraped JSONs (e.g. revolut crypto-com)",
+    )
+    add_provider_args(p)
+    add_store_args(p)
+    p.add_argument(
+        "--delta",
+        action="store_true",
+        help="With --store sqlite: send only what changed since the last stored brief",
+    )
+    p.add_argument(
+        "--prescore",
+        action="store_true",
+        help="Send local territory pre-scores instead of competitor body text (smaller prompt)",
+    )
+    p.add_argument(
+        "--extract",
+        action="store_true",
+        help="Send locally pre-extracted headlines, CTAs, proof points and claims in place of "
+        "most body text (smaller prompt)",
+    )
+    p.add_argument(
+        "--passages",
+        action="store_true",
+        help="Send each page's most positioning-relevant passages (BM25) instead of its first "
+        "characters, in the same budget",
+    )
+    p.add_argument(
+        "--compact",
+        action="store_true",
+        help="Have the model write the compact wire schema (fewer output tokens), expanded locally",
+    )
+    p.add_argument(
+        "--lint",
+        choices=["repair", "report", "off"],
+        default="repair",
+        help="Banned-phrase check on the generated brief: rewrite offending fields (default), "
+        "only report them, or skip",
+    )
+    p.add_argument(
+        "--output",
+        default=None,
+        help="Output path for brief JSON (default: output/{slug}-brief.json)",
+    )
+    p.set_defaults(handler="positioning_engine.analyze:run")
+
+    # batch
+    p = sub.add_parser(
+        "batch",
+        help="Analyze many companies in one Anthropic Message Batch",
+        description="Submit one analysis per line of a runs file as a Message Batch, then poll it "
+        "and save each brief as its result arrives; resumable after a restart",
+    )
+    p.add_argument(
+        "runs",
+        nargs="?",
+        default=None,
+        help='Runs file, one "INPUT [COMPETITOR ...]" per line as for analyze '
+        "(none: resume unfinished batches)",
+    )
+    p.add_argument("--model", default=None, help="Anthropic model ID (default: claude-sonnet-4-5-20250514)")
+    p.add_argument("--prescore", action="store_true", help="Send local territory pre-scores (as analyze)")
+    p.add_argument("--extract", action="store_true", help="Send pre-extracted signals (as analyze)")
+    p.add_argument("--passages", action="store_true", help="Send BM25-picked body passages (as analyze)")
+    p.add_argument("--compact", action="store_true", help="Ask for the compact wire schema (as analyze)")
+    p.add_argument(
+        "--lint",
+        choices=["repair", "report", "off"],
+        default="report",
+        help="Banned-phrase check on each brief (default: report; repair makes a synchronous call)",
+    )
+    add_store_args(p)
+    p.add_argument("--no-wait", action="store_true", help="Submit and exit; run batch again to collect")
+    p.add_argument("--poll", type=float, default=30.0, help="First poll delay in seconds, doubling (default: 30)")
+    p.add_argument("--status", action="store_true", help="List saved batches and exit")
+    p.set_defaults(handler="positioning_engine.batch:run")
+
+    # render
+    p = sub.add_parser(
+        "render",
+        help="Render a brief JSON to HTML/PDF",
+        description="Render a positioning brief JSON as styled HTML and PDF",
+    )
+    p.add_argument("brief", help="Path to brief JSON (e.g. output/kast-brief.json)")
+    p.set_defaults(handler="positioning_engine.render:run")
+
+    # pipeline
+    p = sub.add_parser(
+        "pipeline",
+        help="Run scrape → analyze → render",
+        description="Run the full positioning pipeline: scrape → analyze → render",
+    )
+    p.add_argument("company", help='Company name (e.g. "KAST")')
+    p.add_argument("url", help='Company website URL (e.g. "https://kast.xyz")')
+    p.add_argument(
+        "--competitors",
+        nargs="*",
+        default=[],
+        help='Competitors as "Name:URL" pairs (e.g. "Revolut:https://revolut.com")',
+    )
+    add_provider_args(p)
+    p.add_argument(
+        "--skip-scrape",
+        action="store_true",
+        help="Skip scraping (use existing output files)",
+    )
+    add_store_args(p)
+    p.set_defaults(handler="positioning_engine.pipeline:run")
+
+    # store
+    p = sub.add_parser(
+        "store",
+        help="Import, list and export snapshots in the SQLite store",
+        description="Manage the SQLite snapshot store for scraped positioning data",
+    )
+    p.add_argument("--db", default=None, help="SQLite store path (default: output/positioning.sqlite)")
+    store_sub = p.add_subparsers(dest="store_command", metavar="action", required=True)
+    sp = store_sub.add_parser("import", help="Import {slug}-positioning.json files as snapshots")
+    sp.add_argument("files", nargs="+", help="Scraped positioning JSON files")
+    sp = store_sub.add_parser("list", help="List snapshots")
+    sp.add_argument("slug", nargs="?", default=None, help="Only this company")
+    sp = store_sub.add_parser("export", help="Print a snapshot as positioning JSON")
+    sp.add_argument("slug", help="Company slug")
+    sp.add_argument("--snapshot", type=int, default=None, help="Snapshot id (default: latest)")
+    p.set_defaults(handler="positioning_engine.store:run")
+
+    # diff
+    p = sub.add_parser(
+        "diff",
+        help="Show what changed between two scrapes of a company",
+        description="Line- and heading-level diff between two snapshots of a company",
+    )
+    p.add_argument(
+        "targets",
+        nargs="+",
+        metavar="slug | OLD.json NEW.json",
+        help="Company slug in the SQLite store, or two scraped positioning JSON files",
+    )
+    p.add_argument("--from", dest="from_", type=int, default=None, help="Older snapshot id (default: previous)")
+    p.add_argument("--to", type=int, default=None, help="Newer snapshot id (default: latest)")
+    p.add_argument("--db", default=None, help="SQLite store path (default: output/positioning.sqlite)")
+    p.add_argument("--json", action="store_true", help="Print the change set as JSON")
+    p.set_defaults(handler="positioning_engine.diff:run")
+
+    # territory
+    p = sub.add_parser(
+        "territory",
+        help="Score companies on the territory map dimensions from keyword lexicons",
+        description="Local keyword-lexicon placement of the target and competitors on the four "
+        "territory_map dimensions (1 = left pole, 10 = right pole)",
+    )
+    p.add_argument(
+        "input",
+        help="Path to the target's scraped JSON, or the company slug with --store sqlite",
+    )
+    p.add_argument(
+        "--competitors",
+        nargs="*",
+        default=[],
+        help="Slugs of competitor scraped JSONs (e.g. revolut crypto-com)",
+    )
+    add_store_args(p)
+    p.add_argument("--json", action="store_true", help="Print scores and evidence as JSON")
+    p.set_defaults(handler="positioning_engine.territory:run")
+
+    # passages
+    p = sub.add_parser(
+        "passages",
+        help="Show the body passages --passages would send (BM25 over positioning topics)",
+        description="Pick each page's most positioning-relevant body passages within the prompt's "
+        "per-page budget",
+    )
+    p.add_argument(
+        "input",
+        help="Path to the target's scraped JSON, or the company slug with --store sqlite",
+    )
+    p.add_argument(
+        "--competitors",
+        nargs="*",
+        default=[],
+        help="Slugs of competitor scraped JSONs (e.g. revolut crypto-com)",
+    )
+    add_store_args(p)
+    p.add_argument("--json", action="store_true", help="Print the picked passages as JSON")
+    p.set_defaults(handler="positioning_engine.passages:run")
+
+    # lint
+    p = sub.add_parser(
+        "lint",
+        help="Check a brief for banned phrases",
+        description="Report slop and the brief's own what_not_to_say phrases used in generated copy",
+    )
+    p.add_argument("brief", help="Path to brief JSON (e.g. output/kast-brief.json)")
+    p.add_argument(
+        "--phrase",
+        action="append",
+        default=[],
+        help="Extra banned phrase (repeatable)",
+    )
+    p.add_argument("--json", action="store_true", help="Print violations as JSON")
+    p.set_defaults(handler="positioning_engine.lint:run")
+
+    # competitor-test
+    p = sub.add_parser(
+        "competitor-test",
+        help="Flag messaging a competitor could say just as well",
+        description="Score a brief's positioning statements, one-liners and value propositions "
+        "against scraped competitor copy (TF-IDF cosine) and flag the close ones",
+    )
+    p.add_argument("brief", help="Path to brief JSON (e.g. output/kast-brief.json)")
+    p.add_argument(
+        "--competitors",
+        nargs="*",
+        default=[],
+        help="Competitor slugs (default: the brief's competitors that have scraped data)",
+    )
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=0.5,
+        help="Flag entries whose closest competitor segment scores at least this (default: 0.5)",
+    )
+    add_store_args(p)
+    p.add_argument("--json", action="store_true", help="Print all scores as JSON")
+    p.set_defaults(handler="positioning_engine.similarity:run")
+
+    # extract
+    p = sub.add_parser(
+        "extract",
+        help="Pre-extract headlines, CTAs, proof points and feature claims (no API call)",
+        description="Rule-based extraction of hero headline, CTAs, proof points and feature claims "
+        "from scraped data",
+    )
+    p.add_argument(
+        "input",
+        help="Path to the target's scraped JSON, or the company slug with --store sqlite",
+    )
+    p.add_argument(
+        "--competitors",
+        nargs="*",
+        default=[],
+        help="Slugs of competitor scraped JSONs (e.g. revolut crypto-com)",
+    )
+    add_store_args(p)
+    p.add_argument("--json", action="store_true", help="Print the summaries as JSON")
+    p.set_defaults(handler="positioning_engine.extract:run")
+
+    # reextract
+    p = sub.add_parser(
+        "reextract",
+        help="Rebuild scraped data from saved page HTML, without a browser",
+        description="Parse the DOM snapshots saved by scrape --save-html across a process pool and "
+        "rebuild each scrape's page records with the current extraction code",
+    )
+    p.add_argument("companies", nargs="*", help="Company slugs (default: every company with saved HTML)")
+    p.add_argument("--latest", action="store_true", help="Only each company's most recent scrape")
+    p.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    p.add_argument(
+        "--check",
+        action="store_true",
+        help="Compare with the records the browser extracted instead of saving",
+    )
+    add_store_args(p)
+    p.set_defaults(handler="positioning_engine.reextract:run")
+
+    # tail
+    p = sub.add_parser(
+        "tail",
+        help="Follow a company's scrape as its pages are saved",
+        description="Print the page records of output/{slug}-positioning.jsonl as the scraper writes them",
+    )
+    p.add_argument("company", help="Company name or slug")
+    p.add_argument(
+        "--follow",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Wait for new records until the scrape is saved (default: on)",
+    )
+    p.add_argument("--json", action="store_true", help="Print the raw JSONL records")
+    p.set_defaults(handler="positioning_engine.stream:run")
+
+    # serve
+    p = sub.add_parser(
+        "serve",
+        help="Run the pipeline as a local service with a job queue",
+        description="Serve scrape → analyze → render jobs over local HTTP or a Unix socket, "
+        "with a persistent job queue, warm browsers and shared API clients",
+    )
+    p.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8765, help="HTTP port (default: 8765)")
+    p.add_argument("--socket", default=None, help="Serve on this Unix socket instead of TCP")
+    p.add_argument("--workers", type=int, default=2, help="Jobs run at once (default: 2)")
+    p.add_argument("--browsers", type=int, default=2, help="Warm Chromium instances (default: 2)")
+    p.add_argument(
+        "--queue-db",
+        default=None,
+        help="Job queue database (default: output/service.sqlite)",
+    )
+    add_provider_args(p)
+    add_store_args(p)
+    p.set_defaults(handler="positioning_engine.service:serve")
+
+    # bench
+    p = sub.add_parser(
+        "bench",
+        help="Run offline benchmarks against local fixtures and a mock LLM",
+        description="Time scrape, prompt build, analysis and render offline and write a JSON report",
+    )
+    p.add_argument(
+        "--only",
+        nargs="*",
+        choices=["scrape", "prompt", "analysis", "hedge", "wire", "render"],
+        default=None,
+        help="Benchmarks to run (default: all)",
+    )
+    p.add_argument("--iterations", type=int, default=20, help="Timed iterations per benchmark (default: 20)")
+    p.add_argument("--report", default=None, help="Report path (default: output/bench/bench-{timestamp}.json)")
+    p.add_argument("--baseline", default=None, help="Earlier report to check for regressions")
+    p.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed p50 slowdown versus --baseline, as a fraction (default: 0.25)",
+    )
+    p.add_argument("--llm-latency", type=float, default=0.0, help="Mock LLM delay per request in seconds")
+    p.add_argument(
+        "--llm-tokens-per-second",
+        type=float,
+        default=None,
+        help="Mock LLM output generation rate (default: instant)",
+    )
+    p.add_argument("--heavy-sections", type=int, default=2000, help="Sections on the heavy fixture page")
+    p.add_argument("--slow-delay", type=float, default=1.5, help="Response delay of the slow fixture site")
+    p.add_argument(
+        "--serve",
+        action="store_true",
+        help="Only run the fixture and mock LLM servers until Ctrl-C",
+    )
+    p.set_defaults(handler="positioning_engine.bench.runner:run")
+
+    # trace-summary
+    p = sub.add_parser(
+        "trace-summary",
+        help="Aggregate a --trace file into per-stage p50/p95",
+        description="Summarize spans from a --trace JSONL file per stage",
+    )
+    p.add_argument("trace_file", help="Trace file written with --trace")
+    p.add_argument("--run-id", default=None, help="Only include spans from this run")
+    p.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    p.set_defaults(handler="positioning_engine.trace:run_summary")
+
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        from positioning_engine.trace import enable
+
+        enable(args.trace)
+    module_name, _, func_name = args.handler.partition(":")
+    handler = getattr(importlib.import_module(module_name), func_name)
+    handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Shared paths and helpers used by every pipeline stage.
+
+Keep this module stdlib-only and cheap to import: the CLI loads it before
+it knows which subcommand will run.
+"""
+
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = PACKAGE_DIR.parent
+OUTPUT_DIR = PROJECT_DIR / "output"
+REFERENCES_DIR = PROJECT_DIR / "references"
+EXAMPLES_DIR = PROJECT_DIR / "examples"
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def resolve_path(path: str | Path) -> Path:
+    """Resolve a CLI path argument relative to the project directory."""
+    path = Path(path)
+    if not path.is_absolute():
+        path = PROJECT_DIR / path
+    return path
+
+
+def load_env():
+    """Load .env file if present (simple key=value parser, no dependency)."""
+    env_path = PROJECT_DIR / ".env"
+    if not env_path.exists():
+        return
+    for line in env_path.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        key, value = key.strip(), value.strip().strip('"').strip("'")
+        if key and value and key not in os.environ:
+            os.environ[key] = value
+
+
+def load_text_file(path: Path) -> str:
+    if not path.exists():
+        print(f"Warning: {path} not found, skipping")
+        return ""
+    return path.read_text(encoding="utf-8")
+
+
+def write_json_atomic(path: Path, data, **dump_args):
+    """Write JSON through a temporary file and a rename, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    tmp_path = Path(tmp)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_args)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,259 @@
+"""
+Positioning Change Detection
+
+Usage:
+    python -m positioning_engine diff kast                      # previous vs latest snapshot
+    python -m positioning_engine diff kast --from 3 --to 9 --json
+    python -m positioning_engine diff old-positioning.json new-positioning.json
+
+Compares two scrapes of the same company page by page (matched on page
+type) and produces a compact change set: title and meta changes, headings
+and CTAs added/removed, and body lines added/removed. Comparison is a
+multiset difference over block keys, so it is linear in page size and
+ignores blocks that only moved. For store snapshots the keys are the
+content-addressed line ids, so unchanged lines are never even read; text is
+fetched only for the lines that changed.
+
+`analyze --delta` sends these change sets to the model instead of the full
+scraped copy.
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+from collections import Counter
+from collections.abc import Hashable, Sequence
+from pathlib import Path
+
+from positioning_engine.core import resolve_path, slugify
+
+MAX_LINES_PER_PAGE = 40  # changed body lines kept per page in a change set
+
+
+def diff_blocks(old: Sequence[Hashable], new: Sequence[Hashable]) -> tuple[list, list]:
+    """(added, removed) blocks as a multiset difference, in document order."""
+    if old == new:
+        return [], []
+    added_counts = Counter(new) - Counter(old)
+    removed_counts = Counter(old) - Counter(new)
+
+    def pick(seq: Sequence[Hashable], counts: Counter) -> list:
+        picked = []
+        for block in seq:
+            if counts[block] > 0:
+                counts[block] -= 1
+                picked.append(block)
+        return picked
+
+    return pick(new, added_counts), pick(old, removed_counts)
+
+
+def heading_keys(page: dict) -> list[str]:
+    return [f"{h.get('tag', '?')}: {h.get('text', '')}" for h in page.get("headings", [])]
+
+
+def line_key(line: str) -> bytes:
+    return hashlib.blake2b(line.encode("utf-8"), digest_size=8).digest()
+
+
+def diff_page_fields(old: dict, new: dict) -> dict:
+    """Title, meta, heading and CTA changes between two versions of a page."""
+    change: dict = {}
+    for field in ("title", "meta_description"):
+        if old.get(field, "") != new.get(field, ""):
+            change[field] = [old.get(field, ""), new.get(field, "")]
+    for field, keys in (("headings", heading_keys), ("ctas", lambda p: p.get("links_text", []))):
+        added, removed = diff_blocks(keys(old), keys(new))
+        if added or removed:
+            change[field] = {"added": added, "removed": removed}
+    return change
+
+
+def with_body(change: dict, added: list[str], removed: list[str]) -> dict:
+    if added or removed:
+        change["body"] = {
+            "added": added[:MAX_LINES_PER_PAGE],
+            "removed": removed[:MAX_LINES_PER_PAGE],
+        }
+    return change
+
+
+def page_summary(page: dict) -> dict:
+    """What a newly added page contributes, for change sets."""
+    return {
+        "status": "added",
+        "title": page.get("title", ""),
+        "headings": heading_keys(page),
+        "ctas": page.get("links_text", []),
+        "body": {"added": page.get("body_text", "").split("\n")[:MAX_LINES_PER_PAGE], "removed": []},
+    }
+
+
+def build_change_set(company: str, source: dict, target: dict, pages: dict, stats: Counter) -> dict:
+    return {
+        "company": company,
+        "from": source,
+        "to": target,
+        "changed": any(p["status"] != "unchanged" for p in pages.values()),
+        "pages": {k: v for k, v in pages.items() if v["status"] != "unchanged"},
+        "stats": dict(stats),
+    }
+
+
+def diff_snapshots(old: dict, new: dict) -> dict:
+    """Change set between two scraped positioning dicts (JSON backend shape)."""
+    old_pages = {p["page_type"]: p for p in old.get("pages", [])}
+    new_pages = {p["page_type"]: p for p in new.get("pages", [])}
+    stats: Counter = Counter()
+    pages = {}
+
+    for page_type, new_page in new_pages.items():
+        old_page = old_pages.get(page_type)
+        if old_page is None:
+            pages[page_type] = page_summary(new_page)
+            continue
+        old_lines = old_page.get("body_text", "").split("\n")
+        new_lines = new_page.get("body_text", "").split("\n")
+        texts = {line_key(line): line for line in old_lines + new_lines}
+        added, removed = diff_blocks(
+            [line_key(line) for line in old_lines],
+            [line_key(line) for line in new_lines],
+        )
+        stats["blocks_compared"] += len(new_lines)
+        stats["blocks_changed"] += len(added) + len(removed)
+        change = with_body(diff_page_fields(old_page, new_page), [texts[k] for k in added], [texts[k] for k in removed])
+        pages[page_type] = {"status": "changed" if change else "unchanged", **change}
+
+    for page_type in old_pages.keys() - new_pages.keys():
+        pages[page_type] = {"status": "removed"}
+
+    return build_change_set(
+        new.get("company", old.get("company", "Unknown")),
+        {"scraped_at": old.get("scraped_at"), "snapshot_id": old.get("snapshot_id")},
+        {"scraped_at": new.get("scraped_at"), "snapshot_id": new.get("snapshot_id")},
+        pages,
+        stats,
+    )
+
+
+def diff_store_snapshots(conn: sqlite3.Connection, old_id: int, new_id: int) -> dict:
+    """Change set between two store snapshots, comparing line ids before reading any text."""
+    from positioning_engine import store
+
+    snapshots = {
+        row["id"]: row
+        for row in conn.execute("SELECT * FROM snapshots WHERE id IN (?, ?)", (old_id, new_id))
+    }
+    old_rows = {row["page_type"]: row for row in store.page_rows(conn, old_id)}
+    new_rows = {row["page_type"]: row for row in store.page_rows(conn, new_id)}
+
+    def as_page(row: sqlite3.Row, body: str = "") -> dict:
+        return {
+            "title": row["title"],
+            "meta_description": row["meta_description"],
+            "headings": json.loads(row["headings"]),
+            "links_text": json.loads(row["links_text"]),
+            "body_text": body,
+        }
+
+    stats: Counter = Counter()
+    pages = {}
+    for page_type, new_row in new_rows.items():
+        old_row = old_rows.get(page_type)
+        new_ids = store.unpack_blocks(new_row["body_blocks"])
+        if old_row is None:
+            texts = store.block_texts(conn, new_ids[:MAX_LINES_PER_PAGE])
+            pages[page_type] = page_summary(as_page(new_row, "\n".join(texts[i] for i in new_ids[:MAX_LINES_PER_PAGE])))
+            continue
+
+        # Identical rows share every line id: skip without unpacking anything else
+        same_body = old_row["body_blocks"] == new_row["body_blocks"]
+        added_ids, removed_ids = ([], []) if same_body else diff_blocks(
+            store.unpack_blocks(old_row["body_blocks"]), new_ids
+        )
+        stats["blocks_compared"] += len(new_ids)
+        stats["blocks_changed"] += len(added_ids) + len(removed_ids)
+        texts = store.block_texts(conn, added_ids[:MAX_LINES_PER_PAGE] + removed_ids[:MAX_LINES_PER_PAGE])
+        change = with_body(
+            diff_page_fields(as_page(old_row), as_page(new_row)),
+            [texts[i] for i in added_ids[:MAX_LINES_PER_PAGE]],
+            [texts[i] for i in removed_ids[:MAX_LINES_PER_PAGE]],
+        )
+        pages[page_type] = {"status": "changed" if change else "unchanged", **change}
+
+    for page_type in old_rows.keys() - new_rows.keys():
+        pages[page_type] = {"status": "removed"}
+
+    new_snapshot = snapshots[new_id]
+    return build_change_set(
+        new_snapshot["company"],
+        {"scraped_at": snapshots[old_id]["scraped_at"], "snapshot_id": old_id},
+        {"scraped_at": new_snapshot["scraped_at"], "snapshot_id": new_id},
+        pages,
+        stats,
+    )
+
+
+def format_change_set(change_set: dict) -> str:
+    """Render a change set as compact prompt text."""
+    source, target = change_set["from"], change_set["to"]
+    lines = [f"## {change_set['company']} (scraped {source['scraped_at']} → {target['scraped_at']})"]
+    if not change_set["changed"]:
+        lines.append("No changes.")
+        return "\n".join(lines)
+
+    for page_type, page in change_set["pages"].items():
+        lines.append(f"\n### {page_type.title()} page: {page['status']}")
+        if page["status"] == "removed":
+            continue
+        if page["status"] == "added" and page.get("title"):
+            lines.append(f"Title: {page['title']}")
+        for field in ("title", "meta_description"):
+            if isinstance(page.get(field), list):
+                old, new = page[field]
+                lines.append(f"{field.replace('_', ' ').capitalize()}: \"{old}\" → \"{new}\"")
+        for field, label in (("headings", "Headings"), ("ctas", "CTAs")):
+            value = page.get(field)
+            if isinstance(value, list):
+                if value:
+                    lines.append(f"{label}: " + " | ".join(value))
+            elif value:
+                if value["added"]:
+                    lines.append(f"{label} added: " + " | ".join(value["added"]))
+                if value["removed"]:
+                    lines.append(f"{label} removed: " + " | ".join(value["removed"]))
+        body = page.get("body")
+        if body:
+            lines.extend(f"+ {line}" for line in body["added"])
+            lines.extend(f"- {line}" for line in body["removed"])
+    return "\n".join(lines)
+
+
+def run(args):
+    if len(args.targets) == 2:
+        with open(resolve_path(args.targets[0])) as f:
+            old = json.load(f)
+        with open(resolve_path(args.targets[1])) as f:
+            new = json.load(f)
+        change_set = diff_snapshots(old, new)
+    else:
+        from positioning_engine import store
+
+        conn = store.connect(store.store_path(args))
+        slug = slugify(Path(args.targets[0]).name)
+        ids = [row["id"] for row in store.list_snapshots(conn, slug)]
+        new_id = args.to or (ids[-1] if ids else None)
+        older = [i for i in ids if new_id is not None and i < new_id]
+        old_id = args.from_ or (older[-1] if older else None)
+        if old_id is None or new_id is None:
+            print(f"Error: need two snapshots of {slug} to diff (found {len(ids)})")
+            sys.exit(1)
+        change_set = diff_store_snapshots(conn, old_id, new_id)
+
+    if args.json:
+        print(json.dumps(change_set, indent=2, ensure_ascii=False))
+    else:
+        print(format_change_set(change_set))
+        stats = change_set["stats"]
+        print(f"\n{stats.get('blocks_changed', 0)} of {stats.get('blocks_compared', 0)} body lines changed")
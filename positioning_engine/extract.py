@@ -0,0 +1,285 @@
+"""
+Positioning Signal Pre-Extraction
+
+Usage:
+    python -m positioning_engine extract output/kast-positioning.json --competitors revolut crypto-com
+    python -m positioning_engine extract kast --store sqlite --json
+
+Rule-based pass over a company's scraped headings, CTA text and body lines
+that pulls out what the analysis phases look for first:
+
+- hero headline and sub-headline (homepage H1 and the first line after it)
+- primary and secondary CTAs (CTA buttons ranked by how often and how early
+  they appear; "Get", "Download", "Open", ... outrank "Learn more")
+- proof points: lines with money amounts, percentages, user/country/merchant
+  counts, ratings, licences and regulators
+- feature claims: short headings and lines built on a product verb or a
+  benefit ("spend", "earn", "no fees", "instantly", "non-custodial", ...)
+
+Every signal pattern is compiled into one regex with a named group per kind,
+so each line of a page is scanned once. Proof points are quoted verbatim.
+
+`analyze --extract` sends these summaries in place of most body text: each
+page keeps its title, meta description and headings, its CTAs are left to
+the summary, and its body keeps only the lines that are not headings, CTAs,
+boilerplate or quoted in the summary, cut to EXTRACT_BODY_CHARS. The prompt also tells the model that the numbers it
+cites must come from the quoted proof points, the page text or the
+reference data.
+"""
+
+import json
+import re
+from collections import Counter
+
+from positioning_engine.core import resolve_path, slugify
+
+PROOF_LIMIT = 12
+FEATURE_LIMIT = 8
+SECONDARY_CTA_LIMIT = 4
+EXTRACT_BODY_CHARS = 400  # body text still sent per page with --extract
+MAX_LINE_CHARS = 220
+
+NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+SCALE = r"(?:[kmb]n?|million|billion|trillion)"
+COUNTED = (
+    r"users|customers|members|clients|people|countries|territories|regions|currencies|merchants|"
+    r"stores|shops|atms|cities|chains|networks|tokens|assets|cryptocurrencies|coins|businesses|"
+    r"companies|downloads|reviews|languages|transactions|partners|employees"
+)
+SIGNAL_PATTERNS = {
+    "money": rf"[$€£]\s?(?:{NUMBER})\s?{SCALE}?\+?|(?:{NUMBER})\s?{SCALE}?\+?\s?(?:usd|eur|gbp|usdc|usdt)\b",
+    "percent": rf"(?:{NUMBER})\s?%",
+    "count": rf"(?:{NUMBER})\s?{SCALE}?\+?\s+(?:[a-z-]+\s+)?(?:{COUNTED})\b|\b(?:millions|thousands) of (?:{COUNTED})\b",
+    "rating": rf"(?:{NUMBER})\s?(?:/\s?5|out of 5|stars?\b|★)",
+    "licence": (
+        r"\blicen[cs](?:e|ed|es|ing)\b|\bregulated\b|\bauthori[sz]ed\b|\bregistered with\b|"
+        r"\b(?:fca|mica|fincen|msb|emi|vasp|fintrac|sec|cftc|fdic|finra|mas|bafin|soc ?2|iso ?27001)\b|"
+        r"\baudit(?:ed|s)?\b|\binsured\b"
+    ),
+    "claim": (
+        r"\b(?:no|zero|low|without) (?:hidden |bank |monthly |fx )?fees?\b|\bfree\b|\binstant(?:ly)?\b|"
+        r"\b24/7\b|\banywhere\b|\bworldwide\b|\bglobal(?:ly)?\b|\bin (?:minutes|seconds)\b|"
+        r"\bnon-?custodial\b|\bself-?custod\w*\b|\bcashback\b|\bapy\b|\byield\b|\bearn\b|\bspend\b|"
+        r"\bsend\b|\bpay\b|\bswap\b|\bsave\b|\bwithdraw\b|\btop up\b|\bcards?\b|\bconvert\w*\b"
+    ),
+}
+SIGNAL_RE = re.compile("|".join(f"(?P<{kind}>{p})" for kind, p in SIGNAL_PATTERNS.items()), re.IGNORECASE)
+PROOF_KINDS = ("money", "percent", "count", "rating", "licence")
+
+STRONG_CTA_RE = re.compile(
+    r"^(?:get|download|open|sign ?up|join|start|try|apply|create|claim|order|activate|register)\b", re.IGNORECASE
+)
+CTA_RE = re.compile(
+    r"^(?:get|download|open|sign ?up|join|start|try|apply|create|claim|order|activate|register|book|"
+    r"request|see|learn|explore|discover|buy|trade|invest|earn|spend|send|view|compare|contact)\b",
+    re.IGNORECASE,
+)
+JUNK_RE = re.compile(r"cookie|privacy|terms (?:of|and)|©|all rights reserved|javascript", re.IGNORECASE)
+NAV_CTA_RE = re.compile(r"\b(?:team|careers?|jobs|log ?in|sign ?in|cookies?|press|blog)\b", re.IGNORECASE)
+TESTIMONIAL_RE = re.compile(r"^(?:I|I'm|I've|My|We've been)\b|^[\"“]")
+WORD_RE = re.compile(r"\w+")
+
+
+def clip(line: str, start: int, end: int) -> str:
+    """The sentence of `line` around a match, when the line is too long to quote whole."""
+    if len(line) <= MAX_LINE_CHARS:
+        return line
+    left = max(line.rfind(". ", 0, start), line.rfind("! ", 0, start), line.rfind("? ", 0, start))
+    stops = [i for i in (line.find(". ", end), line.find("! ", end), line.find("? ", end)) if i != -1]
+    right = min(stops) + 1 if stops else len(line)
+    sentence = line[left + 2 if left != -1 else 0 : right].strip()
+    return sentence[:MAX_LINE_CHARS]
+
+
+def page_lines(page: dict) -> list[tuple[str, str]]:
+    """(text, source) for every line of a page in reading order; source is heading, cta or body."""
+    headings = {h.get("text", "").strip() for h in page.get("headings", [])}
+    ctas = {t.strip() for t in page.get("links_text", [])}
+    lines: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    for raw in (page.get("body_text") or "").split("\n"):
+        text = " ".join(raw.split())
+        if text and text not in seen:
+            seen.add(text)
+            lines.append((text, "heading" if text in headings else "cta" if text in ctas else "body"))
+    # Headings and CTAs the body walk did not reach (body cut off or not rendered as text)
+    lines += [(t, "heading") for t in headings if t and t not in seen]
+    lines += [(t, "cta") for t in ctas if t and t not in seen]
+    return lines
+
+
+def hero(page: dict, lines: list[tuple[str, str]]) -> tuple[str, str]:
+    """Hero headline (first H1, else first heading) and the line that follows it."""
+    headings = page.get("headings", [])
+    first = next((h for h in headings if h.get("tag") == "H1"), headings[0] if headings else None)
+    if not first:
+        return "", page.get("meta_description", "")
+    headline = first.get("text", "").strip()
+
+    texts = [t for t, _ in lines]
+    if headline in texts:
+        for text, source in lines[texts.index(headline) + 1 :]:
+            if source != "cta" and not JUNK_RE.search(text) and len(WORD_RE.findall(text)) >= 3:
+                return headline, text
+    after = headings[headings.index(first) + 1 :]
+    return headline, after[0].get("text", "") if after else page.get("meta_description", "")
+
+
+def add_proof(proofs: list[dict], proof: dict):
+    """Add a proof point unless a kept one already quotes it; a longer quote replaces a shorter one."""
+    text = proof["text"].lower()
+    for i, kept in enumerate(proofs):
+        kept_text = kept["text"].lower()
+        if text in kept_text:
+            return
+        if kept_text in text:
+            proofs[i] = proof
+            return
+    proofs.append(proof)
+
+
+def extract_company(data: dict) -> dict:
+    """Positioning signals of one scraped company."""
+    pages: list[dict] = data.get("pages", [])
+    summary: dict = {
+        "company": data.get("company", "Unknown"),
+        "website": data.get("website", ""),
+        "pages": [p.get("page_type", "unknown") for p in pages],
+        "headline": "",
+        "subheadline": "",
+        "primary_cta": "",
+        "secondary_ctas": [],
+        "proof_points": [],
+        "feature_claims": [],
+    }
+    cta_counts: Counter = Counter()
+    cta_order: dict[str, int] = {}
+    seen: set[str] = set()
+
+    homepage = next((p for p in pages if p.get("page_type") == "homepage"), pages[0] if pages else None)
+    for page in pages:
+        lines = page_lines(page)
+        if page is homepage:
+            summary["headline"], summary["subheadline"] = hero(page, lines)
+
+        for text, source in lines:
+            if source == "cta":
+                if CTA_RE.match(text) and not NAV_CTA_RE.search(text):
+                    cta_counts[text] += 1
+                    cta_order.setdefault(text, len(cta_order))
+                continue
+            if JUNK_RE.search(text) or TESTIMONIAL_RE.match(text):
+                continue
+
+            kinds: list[str] = []
+            proof_span = None
+            for match in SIGNAL_RE.finditer(text):
+                kind = match.lastgroup or ""
+                if kind not in kinds:
+                    kinds.append(kind)
+                if kind in PROOF_KINDS and proof_span is None:
+                    proof_span = match.span()
+            if not kinds:
+                continue
+
+            if proof_span is not None:
+                add_proof(summary["proof_points"], {
+                    "text": clip(text, *proof_span),
+                    "kinds": [k for k in kinds if k in PROOF_KINDS],
+                    "page": page.get("page_type", "unknown"),
+                })
+            elif "claim" in kinds and text.lower() not in seen and 3 <= len(WORD_RE.findall(text)) <= 25:
+                seen.add(text.lower())
+                summary["feature_claims"].append({"text": text, "page": page.get("page_type", "unknown")})
+
+    summary["proof_points"] = summary["proof_points"][:PROOF_LIMIT]
+    summary["feature_claims"] = summary["feature_claims"][:FEATURE_LIMIT]
+
+    ranked = sorted(cta_counts, key=lambda t: (not STRONG_CTA_RE.match(t), -cta_counts[t], cta_order[t]))
+    if ranked:
+        summary["primary_cta"] = ranked[0]
+        summary["secondary_ctas"] = ranked[1 : 1 + SECONDARY_CTA_LIMIT]
+    return summary
+
+
+def extract_all(scraped_data: dict, db_path=None) -> dict[str, dict]:
+    """Summaries keyed "target" and by competitor slug.
+
+    Store snapshots loaded with prompt-sized bodies are read again in full.
+    """
+    companies = {"target": scraped_data["target"], **scraped_data["competitors"]}
+    summaries = {}
+    for key, data in companies.items():
+        truncated = any(p.get("body_length", 0) > len(p.get("body_text") or "") for p in data.get("pages", []))
+        if db_path and truncated and data.get("snapshot_id") is not None:
+            from positioning_engine import store
+
+            slug = slugify(data.get("company", key))
+            data = store.load_snapshot(store.connect(db_path), slug, data["snapshot_id"]) or data
+        summaries[key] = extract_company(data)
+    return summaries
+
+
+def quoted_lines(summary: dict) -> set[str]:
+    texts = [summary["headline"], summary["subheadline"]]
+    texts += [p["text"] for p in summary["proof_points"]] + [c["text"] for c in summary["feature_claims"]]
+    return {t for t in texts if t}
+
+
+def prompt_page(page: dict, summary: dict) -> dict:
+    """A page as sent with --extract: CTAs left to the summary, body cut to the lines nothing else carries."""
+    quoted = quoted_lines(summary)
+    body = page.get("body_text") or ""
+    rest = [
+        text for text, source in page_lines(page)
+        if source == "body" and text not in quoted and not JUNK_RE.search(text)
+    ]
+    return {
+        **page,
+        "links_text": [],
+        "body_text": "\n".join(rest)[:EXTRACT_BODY_CHARS],
+        "body_length": page.get("body_length", len(body)),
+    }
+
+
+def format_summary(summary: dict) -> str:
+    """Compact plain-text form of a company summary, used in the prompt and the CLI."""
+    lines = [f"Pre-extracted signals ({', '.join(summary['pages']) or 'no pages'}):"]
+    if summary["headline"]:
+        lines.append(f'Hero headline: "{summary["headline"]}"')
+    if summary["subheadline"]:
+        lines.append(f'Sub-headline: "{summary["subheadline"]}"')
+    if summary["primary_cta"]:
+        secondary = ", ".join(f'"{t}"' for t in summary["secondary_ctas"]) or "none"
+        lines.append(f'Primary CTA: "{summary["primary_cta"]}"; secondary: {secondary}')
+    if summary["proof_points"]:
+        lines.append("Proof points (verbatim):")
+        lines += [f'- "{p["text"]}" [{", ".join(p["kinds"])}; {p["page"]}]' for p in summary["proof_points"]]
+    else:
+        lines.append("Proof points: none found on the scraped pages")
+    if summary["feature_claims"]:
+        lines.append("Feature claims:")
+        lines += [f'- "{c["text"]}" [{c["page"]}]' for c in summary["feature_claims"]]
+    return "\n".join(lines)
+
+
+def run(args):
+    from positioning_engine.analyze import load_scraped_data, load_scraped_data_from_store
+
+    db_path = None
+    if args.store == "sqlite":
+        from positioning_engine.store import store_path
+
+        db_path = store_path(args)
+        scraped_data = load_scraped_data_from_store(db_path, args.input, args.competitors)
+    else:
+        scraped_data = load_scraped_data(resolve_path(args.input), args.competitors)
+
+    summaries = list(extract_all(scraped_data, db_path).values())
+    if args.json:
+        print(json.dumps(summaries, indent=2, ensure_ascii=False))
+        return
+    for summary in summaries:
+        print(f"## {summary['company']} ({summary['website']})")
+        print(format_summary(summary))
+        print()
@@ -0,0 +1,275 @@
+"""
+Banned-Phrase Linter
+
+Usage:
+    python -m positioning_engine lint output/kast-brief.json
+    python -m positioning_engine lint output/kast-brief.json --phrase "banking without the bank" --json
+
+Output Rule 5 ("no AI slop") and each brief's own `what_not_to_say` list are
+otherwise enforced only by asking the model. This module compiles the
+built-in slop list plus the brief's `what_not_to_say` phrases into one
+Aho-Corasick automaton and scans every generated string of the brief in a
+single linear pass, reporting the JSON path of each violation.
+
+`positioning_elements` (verbatim competitor copy) and `what_not_to_say`
+itself are not linted: quoting a banned phrase there is the point. Neither is
+the local `territory_map.baseline`, which is not generated copy. Elsewhere, a
+match inside quotes ("... buries it under generic 'spend crypto easily'
+messaging") is analysis citing the phrase, not using it, and is skipped.
+
+The analyzer runs the linter after every successful parse and, by default,
+asks the model to rewrite only the offending fields (see `--lint`).
+"""
+
+import json
+import re
+import sys
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+
+from positioning_engine.core import resolve_path
+
+# Rule 5 of the system prompt and the buzzword list of SKILL.md Phase 5
+SLOP_PHRASES = (
+    "in today's competitive landscape",
+    "in today's fast-paced",
+    "in today's digital age",
+    "it's worth noting",
+    "it is worth noting",
+    "it's important to note",
+    "in the ever-evolving",
+    "ever-changing landscape",
+    "navigate the complexities",
+    "unlock the power",
+    "game-changer",
+    "game changer",
+    "cutting-edge",
+    "revolutionary",
+    "revolutionize",
+    "next-gen",
+    "next-generation",
+    "seamless",
+    "seamlessly",
+    "delve into",
+    "a testament to",
+    "look no further",
+)
+
+# Generated-text sections only; see module docstring
+SKIP_PATHS = (
+    ("positioning_elements",),
+    ("messaging_framework", "what_not_to_say"),
+    ("territory_map", "baseline"),
+)
+
+# Straighten quotes and dashes so "today’s" matches "today's"
+_NORMALIZE = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"',
+                            "–": "-", "—": "-", " ": " "})
+_SPLIT_ALTERNATIVES = re.compile(r"\s+/\s+")
+# Quoted spans of normalized text; a single quote only opens or closes outside a word
+_QUOTED = re.compile(r"\"[^\"\n]*\"|(?<!\w)'[^'\n]*'(?!\w)")
+
+
+def normalize(text: str) -> str:
+    return text.translate(_NORMALIZE).lower()
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over a fixed set of phrases."""
+
+    def __init__(self, phrases: list[str]):
+        self.phrases = phrases
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[int]] = [[]]
+
+        for index, phrase in enumerate(phrases):
+            state = 0
+            for ch in phrase:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str) -> Iterator[tuple[int, int, int]]:
+        """Yield (start, end, phrase index) for every occurrence in `text`."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in out[state]:
+                yield i + 1 - len(self.phrases[index]), i + 1, index
+
+
+@dataclass
+class Violation:
+    path: str
+    phrase: str
+    source: str  # "slop" or "what_not_to_say"
+    excerpt: str
+
+
+def brief_phrases(brief: dict) -> list[str]:
+    """Phrases from the brief's own what_not_to_say list, "A / B" split into alternatives."""
+    phrases: list[str] = []
+    for item in brief.get("messaging_framework", {}).get("what_not_to_say", []):
+        phrase = item.get("phrase", "") if isinstance(item, dict) else str(item)
+        phrases.extend(p.strip(" '\"") for p in _SPLIT_ALTERNATIVES.split(phrase))
+    return [p for p in phrases if len(p) >= 3]
+
+
+def build_matcher(brief: dict, extra: list[str] | None = None) -> tuple[PhraseMatcher, list[str]]:
+    """Matcher over slop + the brief's phrases, and each phrase's source label."""
+    sources: dict[str, str] = {}
+    for phrase in [*brief_phrases(brief), *(extra or [])]:
+        sources.setdefault(normalize(phrase), "what_not_to_say")
+    for phrase in SLOP_PHRASES:
+        sources.setdefault(normalize(phrase), "slop")
+    phrases = list(sources)
+    return PhraseMatcher(phrases), [sources[p] for p in phrases]
+
+
+def format_path(keys: tuple) -> str:
+    return "$" + "".join(f"[{k}]" if isinstance(k, int) else f".{k}" for k in keys)
+
+
+def iter_strings(node, keys: tuple = ()) -> Iterator[tuple[tuple, str]]:
+    """Yield (key path, value) for every string leaf outside SKIP_PATHS."""
+    if keys in SKIP_PATHS:
+        return
+    if isinstance(node, str):
+        yield keys, node
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            yield from iter_strings(value, (*keys, key))
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            yield from iter_strings(value, (*keys, i))
+
+
+def is_word(text: str, start: int, end: int) -> bool:
+    """True if text[start:end] is not part of a longer word."""
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+def quoted_spans(text: str) -> list[tuple[int, int]]:
+    return [m.span() for m in _QUOTED.finditer(text)]
+
+
+def is_quoted(spans: list[tuple[int, int]], start: int, end: int) -> bool:
+    return any(s < start and end < e for s, e in spans)
+
+
+def lint_brief(brief: dict, extra: list[str] | None = None) -> tuple[list[Violation], dict[str, tuple]]:
+    """All banned-phrase violations in a brief, and the key path behind each reported path."""
+    matcher, sources = build_matcher(brief, extra)
+    violations = []
+    paths: dict[str, tuple] = {}
+    for keys, value in iter_strings(brief):
+        text = normalize(value)
+        spans = quoted_spans(text)
+        for start, end, index in matcher.find(text):
+            if not is_word(text, start, end) or is_quoted(spans, start, end):
+                continue
+            path = format_path(keys)
+            paths[path] = keys
+            excerpt_source = value if len(value) == len(text) else text
+            violations.append(Violation(
+                path=path,
+                phrase=matcher.phrases[index],
+                source=sources[index],
+                excerpt=excerpt_source[max(0, start - 40):end + 40].replace("\n", " "),
+            ))
+    return violations, paths
+
+
+def get_path(brief: dict, keys: tuple):
+    node = brief
+    for key in keys:
+        node = node[key]
+    return node
+
+
+def set_path(brief: dict, keys: tuple, value):
+    get_path(brief, keys[:-1])[keys[-1]] = value
+
+
+def build_lint_repair_prompt(brief: dict, violations: list[Violation], paths: dict[str, tuple]) -> str:
+    """Ask for rewrites of only the fields that contain banned phrases."""
+    fields: dict[str, dict] = {}
+    for violation in violations:
+        fields.setdefault(violation.path, {"text": get_path(brief, paths[violation.path]), "banned": []})
+        fields[violation.path]["banned"].append(violation.phrase)
+
+    return (
+        "These fields of a positioning brief use phrases the brief itself bans "
+        "(its what_not_to_say list) or generic AI filler. Rewrite each field so it "
+        "makes the same point without any banned phrase. Keep the meaning, specifics "
+        "and length; do not invent facts.\n\n"
+        f"{json.dumps(fields, indent=2, ensure_ascii=False)}\n\n"
+        "Return ONLY a JSON object mapping each field path to its rewritten text. "
+        "No markdown fencing, no extra keys."
+    )
+
+
+def apply_repairs(brief: dict, raw: str, paths: dict[str, tuple]) -> list[str]:
+    """Patch rewritten fields into the brief; return the paths that were patched."""
+    cleaned = raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    try:
+        rewrites = json.loads(cleaned)
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(rewrites, dict):
+        return []
+
+    patched = []
+    for path, text in rewrites.items():
+        if path in paths and isinstance(text, str) and text.strip():
+            set_path(brief, paths[path], text.strip())
+            patched.append(path)
+    return patched
+
+
+def print_violations(violations: list[Violation]):
+    for v in violations:
+        print(f"  {v.path}: \"{v.phrase}\" ({v.source}) ...{v.excerpt}...")
+
+
+def run(args):
+    with open(resolve_path(args.brief)) as f:
+        brief = json.load(f)
+
+    violations, _ = lint_brief(brief, args.phrase)
+
+    if args.json:
+        print(json.dumps([asdict(v) for v in violations], indent=2, ensure_ascii=False))
+    elif violations:
+        print(f"{len(violations)} banned phrase(s) in {args.brief}:")
+        print_violations(violations)
+    else:
+        print(f"No banned phrases in {args.brief}")
+
+    if violations:
+        sys.exit(1)
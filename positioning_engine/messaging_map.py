@@ -0,0 +1,184 @@
+"""
+Messaging Map Index
+
+references/neobank-messaging-map.md covers every major player, but a run
+only needs the target, its competitors and the players closest to them.
+This module parses the map once into an index keyed by normalized company
+name and alias ("Crypto.com", "crypto-com" and "cryptocom" are one key;
+"Bybit (MyBank)" also answers to "bybit" and "mybank") and renders an excerpt
+holding just those sections, their rows of the dimension score table and the
+map's general sections (unclaimed territories).
+
+The parsed index is cached per process and re-parsed only when the file's
+mtime or size changes.
+
+Nearest players are ranked by distance on the map's dimension scores, from
+the target's row or, when the target is not in the map, from the mean of
+the matched competitors' rows.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from positioning_engine.core import REFERENCES_DIR, load_text_file
+
+MESSAGING_MAP_PATH = REFERENCES_DIR / "neobank-messaging-map.md"
+NEAREST_PLAYERS = 2
+
+SCORE_ROW_RE = re.compile(r"^\|\s*([^|]+?)\s*\|((?:\s*\d+\s*\|)+)\s*$")
+
+
+def normalize_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", name.lower())
+
+
+def name_aliases(name: str) -> set[str]:
+    """Lookup keys for a map heading such as "Bybit (MyBank)"."""
+    aliases = {normalize_name(name)}
+    base, _, paren = name.partition("(")
+    aliases.add(normalize_name(base))
+    if paren:
+        aliases.add(normalize_name(paren.rstrip(")")))
+    return {a for a in aliases if a}
+
+
+@dataclass
+class MapEntry:
+    name: str
+    category: str
+    text: str
+    scores: list[int] = field(default_factory=list)
+
+
+@dataclass
+class MessagingMap:
+    preamble: str
+    entries: dict[str, MapEntry]  # heading name -> entry, in map order
+    aliases: dict[str, str]  # normalized alias -> heading name
+    score_heading: str = ""
+    score_header: list[str] = field(default_factory=list)
+    score_footer: str = ""
+    general: list[str] = field(default_factory=list)  # other "##" sections, verbatim
+
+    def find(self, name: str) -> MapEntry | None:
+        key = self.aliases.get(normalize_name(name))
+        return self.entries[key] if key else None
+
+
+def split_sections(text: str, marker: str) -> list[str]:
+    """Split markdown into chunks starting at lines that begin with `marker`."""
+    return re.split(rf"(?m)^(?={re.escape(marker)} )", text)
+
+
+def parse_messaging_map(text: str) -> MessagingMap:
+    chunks = split_sections(text, "##")
+    preamble = chunks[0].strip().removesuffix("---").strip()
+    mmap = MessagingMap(preamble=preamble, entries={}, aliases={})
+
+    for chunk in chunks[1:]:
+        body = chunk.strip().removesuffix("---").strip()
+        heading = body.splitlines()[0]
+        companies = split_sections(body, "###")[1:]
+
+        if companies:
+            category = heading.removeprefix("## ").strip()
+            for section in companies:
+                section = section.strip()
+                name = section.splitlines()[0].removeprefix("### ").strip()
+                mmap.entries[name] = MapEntry(name=name, category=category, text=section)
+                for alias in name_aliases(name):
+                    mmap.aliases.setdefault(alias, name)
+        elif any(SCORE_ROW_RE.match(line) for line in body.splitlines()):
+            mmap.score_heading = heading
+            lines = body.splitlines()[1:]
+            for line in lines:
+                match = SCORE_ROW_RE.match(line)
+                entry = mmap.find(match.group(1)) if match else None
+                if match and entry:
+                    entry.scores = [int(v) for v in match.group(2).split("|") if v.strip()]
+                elif line.startswith("|"):
+                    mmap.score_header.append(line)
+                elif line.strip():
+                    mmap.score_footer += line + "\n"
+        else:
+            mmap.general.append(body)
+
+    return mmap
+
+
+_cache: dict[Path, tuple[tuple[int, int], MessagingMap]] = {}
+
+
+def load_messaging_map(path: Path = MESSAGING_MAP_PATH) -> MessagingMap | None:
+    """Parsed messaging map, re-parsed only when the file changes."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    mmap = parse_messaging_map(load_text_file(path))
+    _cache[path] = (key, mmap)
+    return mmap
+
+
+def nearest_players(mmap: MessagingMap, anchor: list[float], exclude: set[str], limit: int) -> list[MapEntry]:
+    scored = [
+        (math.dist(anchor, entry.scores), i, entry)
+        for i, entry in enumerate(mmap.entries.values())
+        if entry.name not in exclude and len(entry.scores) == len(anchor)
+    ]
+    return [entry for _, _, entry in sorted(scored)[:limit]]
+
+
+def select_entries(mmap: MessagingMap, target: str, competitors: list[str], nearest: int) -> list[MapEntry]:
+    """Map entries for the target, the competitors and the players nearest to them."""
+    target_entry = mmap.find(target)
+    matched = [e for e in (mmap.find(c) for c in competitors) if e]
+    selected = {e.name: e for e in ([target_entry] if target_entry else []) + matched}
+
+    if target_entry and target_entry.scores:
+        anchor = [float(v) for v in target_entry.scores]
+    else:
+        rows = [e.scores for e in matched if e.scores]
+        anchor = [sum(col) / len(rows) for col in zip(*rows)] if rows else []
+    if anchor and nearest:
+        for entry in nearest_players(mmap, anchor, set(selected), nearest):
+            selected[entry.name] = entry
+
+    # Keep the map's own order
+    return [e for name, e in mmap.entries.items() if name in selected]
+
+
+def render_excerpt(mmap: MessagingMap, entries: list[MapEntry]) -> str:
+    parts = [mmap.preamble]
+    category = None
+    for entry in entries:
+        if entry.category != category:
+            category = entry.category
+            parts.append(f"## {category}")
+        parts.append(entry.text)
+
+    rows = [e for e in entries if e.scores]
+    if rows and mmap.score_header:
+        table = mmap.score_header + [
+            f"| {e.name} | " + " | ".join(str(v) for v in e.scores) + " |" for e in rows
+        ]
+        parts.append("\n".join([mmap.score_heading, "", *table, "", mmap.score_footer.strip()]).strip())
+
+    parts.extend(mmap.general)
+    return "\n\n".join(parts)
+
+
+def relevant_messaging_map(target: str, competitors: list[str], nearest: int = NEAREST_PLAYERS) -> str:
+    """Messaging map excerpt for one run; the whole map when no competitor is named."""
+    mmap = load_messaging_map()
+    if mmap is None:
+        return ""
+    if not competitors:
+        return load_text_file(MESSAGING_MAP_PATH)
+    return render_excerpt(mmap, select_entries(mmap, target, competitors, nearest))
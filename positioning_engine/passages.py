@@ -0,0 +1,234 @@
+"""
+Passage Retrieval
+
+Usage:
+    python -m positioning_engine passages output/kast-positioning.json --competitors revolut crypto-com
+    python -m positioning_engine analyze output/kast-positioning.json --competitors revolut crypto-com --passages
+
+The prompt carries the first MAX_BODY_CHARS_PER_PAGE characters of each
+page's body, which on many sites is navigation, cookie text and a hero
+carousel, while the differentiators sit further down the 15,000 scraped
+characters. Here each page body is split into passages of consecutive lines
+(about PASSAGE_CHARS each), and every company gets a BM25 index over the
+passages of all its pages, built once per snapshot and kept in memory.
+
+The index is queried with one term set per positioning topic (custody,
+yield, card, fees, regulation, countries). Each topic's scores are scaled
+to its best passage, so every topic counts the same, and a passage's value
+is the sum over topics. For a page whose body is over the budget, the
+highest-value passages that fit are kept, in page order with a "[...]"
+line wherever text was left out; budget left over goes to the earliest
+passages that match no topic. Pages within the budget are sent whole.
+
+`analyze --passages` sends the picked passages in place of the leading
+characters, so the prompt stays the same size.
+"""
+
+import json
+import math
+from collections import Counter
+
+from positioning_engine.core import resolve_path, slugify
+from positioning_engine.similarity import WORD_RE, terms
+
+PASSAGE_CHARS = 200
+GAP = "[...]"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Phrases are matched as word bigrams, as similarity.terms produces them
+TOPIC_TERMS = {
+    "custody": (
+        "custody", "custodial", "non-custodial", "self-custody", "keys", "private keys", "wallet",
+        "wallets", "seed phrase", "onchain", "on-chain", "segregated", "safeguarded",
+    ),
+    "yield": (
+        "yield", "apy", "apr", "interest", "earn", "earning", "rewards", "staking", "returns",
+        "savings", "vaults",
+    ),
+    "card": (
+        "card", "cards", "visa", "mastercard", "apple pay", "google pay", "atm", "atms", "spend",
+        "merchants", "contactless", "cashback", "virtual card",
+    ),
+    "fees": (
+        "fee", "fees", "free", "pricing", "price", "cost", "commission", "spread", "markup",
+        "exchange rate", "plan", "plans", "subscription", "hidden fees",
+    ),
+    "regulation": (
+        "regulated", "regulation", "licensed", "licence", "license", "authorised", "authorized",
+        "fca", "mica", "fincen", "sec", "compliance", "compliant", "insured", "audited", "audit",
+        "protection", "kyc",
+    ),
+    "countries": (
+        "countries", "country", "global", "globally", "worldwide", "international", "currencies",
+        "local", "abroad", "travel", "regions", "markets", "territories",
+    ),
+}
+
+
+def term_key(term: str) -> str:
+    return " ".join(WORD_RE.findall(term.lower()))
+
+
+TOPIC_KEYS = {topic: frozenset(term_key(t) for t in words) for topic, words in TOPIC_TERMS.items()}
+
+
+def split_passages(body: str) -> list[str]:
+    """Consecutive body lines joined until a passage reaches PASSAGE_CHARS."""
+    passages: list[str] = []
+    current: list[str] = []
+    size = 0
+    for line in body.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        current.append(line)
+        size += len(line) + 1
+        if size >= PASSAGE_CHARS:
+            passages.append("\n".join(current))
+            current, size = [], 0
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+class PassageIndex:
+    """BM25 index over the passages of one company's pages."""
+
+    def __init__(self, pages: list[dict]):
+        self.passages: list[list[str]] = [split_passages(p.get("body_text") or "") for p in pages]
+        self.docs: list[tuple[int, int, Counter]] = []  # (page, passage, term counts)
+        for page_index, passages in enumerate(self.passages):
+            for passage_index, text in enumerate(passages):
+                self.docs.append((page_index, passage_index, terms(text)))
+
+        lengths = [sum(c for t, c in counts.items() if " " not in t) for _, _, counts in self.docs]
+        self.lengths = lengths
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        df: Counter = Counter()
+        for _, _, counts in self.docs:
+            df.update(counts.keys())
+        n = len(self.docs)
+        self.idf = {t: math.log(1 + (n - d + 0.5) / (d + 0.5)) for t, d in df.items()}
+
+    def bm25(self, query: frozenset[str]) -> list[float]:
+        scores = []
+        for (_, _, counts), length in zip(self.docs, self.lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self.avg_length or 1))
+            score = 0.0
+            for term in query & counts.keys():
+                tf = counts[term]
+                score += self.idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def value(self) -> dict[tuple[int, int], float]:
+        """Topic-balanced value of every passage, keyed (page, passage)."""
+        total = [0.0] * len(self.docs)
+        for query in TOPIC_KEYS.values():
+            scores = self.bm25(query)
+            best = max(scores, default=0.0)
+            if best > 0:
+                total = [t + s / best for t, s in zip(total, scores)]
+        return {(page, passage): total[i] for i, (page, passage, _) in enumerate(self.docs)}
+
+    def select(self, budget: int) -> list[str]:
+        """Body text of every page cut to `budget` characters of its most valuable passages."""
+        value = self.value()
+        bodies = []
+        for page_index, passages in enumerate(self.passages):
+            whole = "\n".join(passages)
+            if len(whole) <= budget:
+                bodies.append(whole)
+                continue
+
+            # Most valuable first, then passages that match no topic in page order
+            order = sorted(range(len(passages)), key=lambda i: (-value[(page_index, i)], i))
+            chosen: set[int] = set()
+            for i in order:
+                if len(join_passages(passages, chosen | {i})) <= budget:
+                    chosen.add(i)
+            bodies.append(join_passages(passages, chosen))
+        return bodies
+
+
+def join_passages(passages: list[str], chosen: set[int]) -> str:
+    """Chosen passages in page order, with a GAP line wherever passages were left out."""
+    parts: list[str] = []
+    previous = -1
+    for i in sorted(chosen):
+        if i != previous + 1:
+            parts.append(GAP)
+        parts.append(passages[i])
+        previous = i
+    if chosen and previous != len(passages) - 1:
+        parts.append(GAP)
+    return "\n".join(parts)
+
+
+_indexes: dict[str, PassageIndex] = {}
+
+
+def company_index(slug: str, data: dict, db_path=None) -> PassageIndex:
+    """The company's index, built once per snapshot (store path and id, else scrape time)."""
+    if data.get("snapshot_id") is not None:
+        key = f"{slug}:{db_path}:{data['snapshot_id']}"  # snapshot ids are per store file
+    else:
+        key = f"{slug}:{data.get('scraped_at')}"
+    if key not in _indexes:
+        # The analyzer loads store bodies cut to the prompt budget; index the full copy
+        truncated = any(p.get("body_length", 0) > len(p.get("body_text") or "") for p in data.get("pages", []))
+        if db_path and truncated and data.get("snapshot_id") is not None:
+            from positioning_engine import store
+
+            data = store.load_snapshot(store.connect(db_path), slug, data["snapshot_id"]) or data
+        _indexes[key] = PassageIndex(data.get("pages", []))
+    return _indexes[key]
+
+
+def select_bodies(scraped_data: dict, budget: int, db_path=None) -> dict[str, list[str]]:
+    """Per-page prompt bodies keyed "target" and by competitor slug."""
+    companies = {"target": scraped_data["target"], **scraped_data["competitors"]}
+    bodies = {}
+    for key, data in companies.items():
+        slug = slugify(data.get("company", key)) if key == "target" else key
+        bodies[key] = company_index(slug, data, db_path).select(budget)
+    return bodies
+
+
+def run(args):
+    from positioning_engine.analyze import (
+        MAX_BODY_CHARS_PER_PAGE,
+        load_scraped_data,
+        load_scraped_data_from_store,
+    )
+
+    db_path = None
+    if args.store == "sqlite":
+        from positioning_engine.store import store_path
+
+        db_path = store_path(args)
+        scraped_data = load_scraped_data_from_store(db_path, args.input, args.competitors)
+    else:
+        scraped_data = load_scraped_data(resolve_path(args.input), args.competitors)
+
+    bodies = select_bodies(scraped_data, MAX_BODY_CHARS_PER_PAGE, db_path)
+    companies = {"target": scraped_data["target"], **scraped_data["competitors"]}
+    if args.json:
+        print(json.dumps({
+            companies[key].get("company", key): [
+                {"page_type": page.get("page_type"), "body": body}
+                for page, body in zip(companies[key].get("pages", []), page_bodies)
+            ]
+            for key, page_bodies in bodies.items()
+        }, indent=2, ensure_ascii=False))
+        return
+
+    for key, page_bodies in bodies.items():
+        data = companies[key]
+        print(f"## {data.get('company', key)}")
+        for page, body in zip(data.get("pages", []), page_bodies):
+            total = page.get("body_length", len(page.get("body_text") or ""))
+            print(f"\n### {page.get('page_type', 'unknown')} ({len(body)} of {total} chars)")
+            print(body)
+        print()
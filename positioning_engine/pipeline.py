@@ -0,0 +1,125 @@
+"""
+Positioning Pipeline Runner
+
+Usage:
+    python -m positioning_engine pipeline "KAST" "https://kast.xyz" --competitors "Revolut:https://revolut.com" "Crypto.com:https://crypto.com"
+
+Chains all three stages: scrape → analyze → render.
+Uses subprocess so each stage runs independently with its own argument parsing.
+"""
+
+import subprocess
+import sys
+
+from positioning_engine.core import OUTPUT_DIR, PROJECT_DIR, slugify
+
+
+def stage_cmd(*args: str) -> list[str]:
+    return [sys.executable, "-m", "positioning_engine", *args]
+
+
+def store_args(args) -> list[str]:
+    """Backend flags forwarded to the scrape and analyze stages."""
+    flags = ["--store", args.store]
+    if args.db:
+        flags.extend(["--db", args.db])
+    return flags
+
+
+def has_scraped_data(args, slug: str) -> bool:
+    if args.store == "sqlite":
+        from positioning_engine import store
+
+        return store.find_snapshot(store.connect(store.store_path(args)), slug) is not None
+    return (OUTPUT_DIR / f"{slug}-positioning.json").exists()
+
+
+def run_stage(cmd: list[str], label: str, allow_fail: bool = False) -> bool:
+    print(f"\n{'=' * 60}")
+    print(f"[{label}] {' '.join(cmd)}")
+    print("=" * 60)
+    result = subprocess.run(cmd, cwd=PROJECT_DIR)
+    if result.returncode != 0:
+        if allow_fail:
+            print(f"Warning: {label} failed (exit {result.returncode}), continuing...")
+            return False
+        else:
+            print(f"Error: {label} failed (exit {result.returncode}), aborting.")
+            sys.exit(result.returncode)
+    return True
+
+
+def run(args):
+    slug = slugify(args.company)
+
+    # Parse competitor pairs
+    competitors = []
+    for comp in args.competitors:
+        if ":" in comp:
+            name, url = comp.split(":", 1)
+            competitors.append((name.strip(), url.strip()))
+        else:
+            print(f"Warning: competitor '{comp}' missing URL (expected 'Name:URL'), skipping")
+
+    # Stage 1: Scrape
+    if not args.skip_scrape:
+        # Scrape target
+        run_stage(
+            stage_cmd("scrape", args.company, args.url, *store_args(args)),
+            f"Scrape {args.company}",
+        )
+
+        # Scrape competitors (failures are non-fatal)
+        for name, url in competitors:
+            run_stage(
+                stage_cmd("scrape", name, url, *store_args(args)),
+                f"Scrape {name}",
+                allow_fail=True,
+            )
+    else:
+        print("Skipping scrape stage (--skip-scrape)")
+
+    # Stage 2: Analyze
+    target_json = OUTPUT_DIR / f"{slug}-positioning.json"
+    if not has_scraped_data(args, slug):
+        print(f"Error: expected scraped data for {slug} ({args.store} store)")
+        sys.exit(1)
+
+    competitor_slugs = [slugify(name) for name, _ in competitors]
+    # Only include competitors whose scraped data exists
+    existing_slugs = [s for s in competitor_slugs if has_scraped_data(args, s)]
+
+    target_input = slug if args.store == "sqlite" else str(target_json)
+    analyze_cmd = stage_cmd("analyze", target_input, *store_args(args))
+    if existing_slugs:
+        analyze_cmd.extend(["--competitors"] + existing_slugs)
+    if args.model:
+        analyze_cmd.extend(["--model", args.model])
+    if args.provider:
+        analyze_cmd.extend(["--provider", args.provider])
+    if args.hedge_after is not None:
+        analyze_cmd.extend(["--hedge-after", str(args.hedge_after)])
+    for provider, seconds in args.timeout or []:
+        analyze_cmd.extend(["--timeout", f"{provider}={seconds}" if provider else str(seconds)])
+    if not args.failover:
+        analyze_cmd.append("--no-failover")
+
+    run_stage(analyze_cmd, "Analyze positioning")
+
+    # Stage 3: Render
+    brief_json = OUTPUT_DIR / f"{slug}-brief.json"
+    if not brief_json.exists():
+        print(f"Error: expected brief at {brief_json}")
+        sys.exit(1)
+
+    run_stage(
+        stage_cmd("render", str(brief_json)),
+        "Render brief",
+    )
+
+    print(f"\n{'=' * 60}")
+    print("Pipeline complete!")
+    print(f"  Scraped data: {target_json if args.store == 'json' else f'{slug} ({args.store} store)'}")
+    print(f"  Brief JSON:   {brief_json}")
+    print(f"  HTML/PDF:     {OUTPUT_DIR / f'{slug}-positioning-brief.html'}")
+    print("=" * 60)
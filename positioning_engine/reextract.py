@@ -0,0 +1,457 @@
+"""
+DOM Snapshots and Offline Re-Extraction
+
+Usage:
+    python -m positioning_engine scrape "KAST" "https://kast.xyz" --save-html
+    python -m positioning_engine reextract                      # every company, every saved scrape
+    python -m positioning_engine reextract kast --latest --store sqlite
+    python -m positioning_engine reextract --check              # compare with what the browser extracted
+
+Changing how `scrape_page` extracts a page (the heading selectors, the CTA
+selector list, the text node length filters) used to mean scraping every
+site again with Chromium. With `scrape --save-html`, each loaded page's
+rendered DOM (`page.content()`, taken right after the body text) is also
+saved gzipped:
+
+    output/html/{slug}/{scraped_at}/00-homepage.html.gz
+    output/html/{slug}/{scraped_at}/manifest.json
+
+The manifest lists every page the scraper loaded, in order, with the record
+the browser extracted from it, pages that were skipped included.
+
+`reextract` parses those files with the stdlib HTML parser across a process
+pool, builds the same page records as `extract_page` (title, meta
+description, H1-H3 headings, CTAs, body text nodes) and replays the
+scraper's page selection (duplicate page types, `page_problem`), so the
+result is the company's scraped data as if it had been scraped again with
+the current extraction code. Without a browser or network, a company takes
+well under a second.
+
+A serialized DOM closes every element explicitly, so a plain element stack
+rebuilds the browser's tree. Body text comes from the DOM's text nodes
+exactly, as the TreeWalker sees them. Headings and CTAs use `innerText`,
+which depends on CSS the snapshot does not have: `inner_text` hides only
+what the UA stylesheet, the `hidden` attribute or an inline
+`display: none` hides, and knows nothing of `text-transform`. `--check`
+reports the pages whose re-extracted record differs from the browser's.
+
+Each re-extracted scrape is written to positioning.json next to its
+manifest; the latest one per company also replaces
+output/{slug}-positioning.json, or, with `--store sqlite`, every one is
+saved as a new store snapshot. Pages the live scrape never loaded (an
+"about-us" page after "about" succeeded) cannot be recovered.
+"""
+
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+
+from positioning_engine.core import OUTPUT_DIR, slugify, write_json_atomic
+
+HTML_DIR = OUTPUT_DIR / "html"
+MAX_HEADINGS = 30
+MAX_CTAS = 20
+MAX_BODY_CHARS = 15000
+
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+    "source", "track", "wbr",
+))
+# Serialized without escaping; noscript because the scraping browser runs scripts
+RAW_TEXT_TAGS = ("noscript", "iframe", "noembed", "noframes", "xmp")
+# display: none in the UA stylesheet
+UNRENDERED_TAGS = frozenset((
+    "head", "title", "meta", "link", "base", "style", "script", "noscript", "template",
+    "datalist", "noembed", "noframes", "param", "rp",
+))
+BLOCK_TAGS = frozenset((
+    "address", "article", "aside", "blockquote", "center", "dd", "details", "dialog", "div",
+    "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "hgroup", "hr", "legend", "li", "main", "menu", "nav", "ol", "pre",
+    "section", "summary", "table", "tbody", "thead", "tfoot", "tr", "ul",
+))
+HEADING_TAGS = ("h1", "h2", "h3")
+DISPLAY_NONE_RE = re.compile(r"display\s*:\s*none", re.IGNORECASE)
+COLLAPSE_RE = re.compile(r"[ \t\n\r\f]+")
+BR = "\x00"  # placeholder for <br> while whitespace is collapsed
+ASCII_SPACE = " \t\n\r\f"
+
+
+def run_dir(data: dict) -> Path:
+    return HTML_DIR / slugify(data["company"]) / str(data["scraped_at"]).replace(":", "-")
+
+
+class SnapshotWriter:
+    """Gzipped DOM of every page one scrape loads, plus its manifest."""
+
+    def __init__(self, data: dict):
+        self.dir = run_dir(data)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = {k: data[k] for k in ("company", "website", "scraped_at")}
+        self.manifest["pages"] = []
+        self.file: str | None = None
+
+    def capture(self, page_type: str, html: str):
+        self.file = f"{len(self.manifest['pages']):02d}-{page_type}.html.gz"
+        (self.dir / self.file).write_bytes(gzip.compress(html.encode("utf-8"), compresslevel=6))
+
+    def page(self, page_data: dict):
+        """Record one loaded page, kept or not, with the browser's record of it."""
+        self.manifest["pages"].append({"file": self.file, "record": page_data})
+        self.file = None
+        write_json_atomic(self.dir / "manifest.json", self.manifest, indent=2, ensure_ascii=False, default=str)
+
+
+# --- DOM -------------------------------------------------------------------
+
+
+class Element:
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag: str, attrs: dict[str, str], parent: "Element | None"):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: list[Element | str] = []
+        self.parent = parent
+
+
+class DomBuilder(HTMLParser):
+    """Element tree of a serialized DOM, with text nodes as plain strings."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document", {}, None)
+        self.current = self.root
+        self.text: list[str] = []
+
+    def flush(self):
+        if self.text:
+            self.current.children.append("".join(self.text))
+            self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        element = Element(tag, {k: v or "" for k, v in attrs}, self.current)
+        self.current.children.append(element)
+        if tag not in VOID_TAGS:
+            self.current = element
+            if tag in RAW_TEXT_TAGS:
+                self.set_cdata_mode(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.flush()
+        self.current.children.append(Element(tag, {k: v or "" for k, v in attrs}, self.current))
+
+    def handle_endtag(self, tag):
+        self.flush()
+        node: Element | None = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+    def handle_comment(self, data):
+        self.flush()  # a comment node splits the text around it
+
+    def close(self):
+        super().close()
+        self.flush()
+
+
+def parse_dom(html: str) -> Element:
+    builder = DomBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def iter_elements(node: Element):
+    """Elements in document order, not entering template contents."""
+    stack = [node]
+    while stack:
+        element = stack.pop()
+        yield element
+        if element.tag != "template":
+            stack.extend(c for c in reversed(element.children) if isinstance(c, Element))
+
+
+def find_first(root: Element, tag: str) -> Element | None:
+    return next((e for e in iter_elements(root) if e.tag == tag), None)
+
+
+def text_nodes(node: Element):
+    """Text nodes under `node` in document order, as a TreeWalker with SHOW_TEXT yields them."""
+    for child in node.children:
+        if isinstance(child, str):
+            yield child
+        elif child.tag != "template":
+            yield from text_nodes(child)
+
+
+def js_len(text: str) -> int:
+    """String length in UTF-16 code units, as JavaScript counts it."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def js_trim(text: str) -> str:
+    return text.strip().strip("﻿").strip()
+
+
+def hidden(element: Element) -> bool:
+    return (
+        element.tag in UNRENDERED_TAGS
+        or "hidden" in element.attrs
+        or bool(DISPLAY_NONE_RE.search(element.attrs.get("style", "")))
+    )
+
+
+def rendered(element: Element) -> bool:
+    node: Element | None = element
+    while node is not None:
+        if hidden(node):
+            return False
+        node = node.parent
+    return True
+
+
+def inner_text(element: Element) -> str:
+    """`innerText` as far as markup alone decides it; unrendered elements give textContent."""
+    if not rendered(element):
+        return "".join(text_nodes(element))
+
+    items: list[str | int] = []  # text, or a number of required line breaks
+
+    def collect(node: Element):
+        for child in node.children:
+            if isinstance(child, str):
+                items.append(child)
+            elif child.tag == "br":
+                items.append(BR)
+            elif not hidden(child):
+                breaks = 2 if child.tag == "p" else 1 if child.tag in BLOCK_TAGS else 0
+                if breaks:
+                    items.append(breaks)
+                collect(child)
+                if breaks:
+                    items.append(breaks)
+
+    collect(element)
+    parts: list[str] = []
+    pending = 0
+    run: list[str] = []
+    for item in [*items, 0]:
+        if isinstance(item, str):
+            run.append(item)
+            continue
+        lines = COLLAPSE_RE.sub(" ", "".join(run)).split(BR)
+        text = "\n".join(line.strip(ASCII_SPACE) for line in lines).strip(ASCII_SPACE) if run else ""
+        run = []
+        if text:
+            if pending and parts:
+                parts.append("\n" * pending)
+            parts.append(text)
+            pending = 0
+        pending = max(pending, item)
+    return "".join(parts)
+
+
+def is_cta(element: Element) -> bool:
+    """button, a[class*="btn"], a[class*="cta"], [role="button"]"""
+    if element.tag == "button" or element.attrs.get("role") == "button":
+        return True
+    classes = element.attrs.get("class", "")
+    return element.tag == "a" and ("btn" in classes or "cta" in classes)
+
+
+# --- Page records ------------------------------------------------------------
+
+
+def extract_html(html: str, url: str, page_type: str) -> dict:
+    """The page record `scrape.extract_page` would have built from this DOM."""
+    root = parse_dom(html)
+    result: dict = {
+        "url": url,
+        "page_type": page_type,
+        "title": "",
+        "meta_description": "",
+        "headings": [],
+        "body_text": "",
+        "links_text": [],
+        "error": None,
+    }
+
+    title = find_first(root, "title")
+    if title is not None:
+        result["title"] = COLLAPSE_RE.sub(" ", "".join(text_nodes(title))).strip(ASCII_SPACE)
+
+    elements = list(iter_elements(root))
+    meta = next((e for e in elements if e.tag == "meta" and e.attrs.get("name") == "description"), None)
+    if meta is not None:
+        result["meta_description"] = meta.attrs.get("content") or ""
+
+    headings = []
+    for element in elements:
+        if element.tag in HEADING_TAGS:
+            text = js_trim(inner_text(element))
+            if 0 < js_len(text) < 200:
+                headings.append({"tag": element.tag.upper(), "text": text})
+    result["headings"] = headings[:MAX_HEADINGS]
+
+    ctas: list[str] = []
+    for element in elements:
+        if is_cta(element):
+            text = js_trim(inner_text(element))
+            if 0 < js_len(text) < 60 and text not in ctas:
+                ctas.append(text)
+    result["links_text"] = ctas[:MAX_CTAS]
+
+    body = find_first(root, "body")
+    if body is not None:
+        lines = []
+        for node in text_nodes(body):
+            text = js_trim(node)
+            if 10 < js_len(text) < 500:
+                lines.append(text)
+        result["body_text"] = js_slice("\n".join(lines), MAX_BODY_CHARS)
+
+    return result
+
+
+def js_slice(text: str, limit: int) -> str:
+    """text[:limit] in UTF-16 code units, as `String.slice` cuts it."""
+    if len(text) * 2 <= limit or js_len(text) <= limit:
+        return text
+    return text.encode("utf-16-le")[: limit * 2].decode("utf-16-le", errors="ignore")
+
+
+def extract_file(path: str, url: str, page_type: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return extract_html(f.read(), url, page_type)
+
+
+# --- Scrape replay -------------------------------------------------------------
+
+
+def find_runs(companies: list[str], latest: bool) -> list[Path]:
+    """Manifest paths, oldest scrape first, of the given company slugs (default: all)."""
+    slugs = [slugify(c) for c in companies] or sorted(p.name for p in HTML_DIR.glob("*") if p.is_dir())
+    runs = []
+    for slug in slugs:
+        manifests = sorted((HTML_DIR / slug).glob("*/manifest.json"))
+        runs.extend(manifests[-1:] if latest else manifests)
+    return sorted(runs, key=lambda p: p.parent.name)
+
+
+def extract_runs(manifests: list[Path], workers: int) -> list[tuple[Path, dict, list[dict | None]]]:
+    """Re-extract every snapshot file of the runs; records are None for pages without one."""
+    loaded = []
+    jobs = []
+    for path in manifests:
+        with open(path) as f:
+            manifest = json.load(f)
+        loaded.append((path, manifest))
+        for entry in manifest["pages"]:
+            if entry["file"]:
+                record = entry["record"]
+                jobs.append((str(path.parent / entry["file"]), record["url"], record["page_type"]))
+
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            records = list(pool.map(extract_file, *zip(*jobs), chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        records = [extract_file(*job) for job in jobs]
+
+    results = []
+    it = iter(records)
+    for path, manifest in loaded:
+        results.append((path, manifest, [next(it) if e["file"] else None for e in manifest["pages"]]))
+    return results
+
+
+def replay(manifest: dict, records: list[dict | None]) -> dict:
+    """The company's scraped data, selecting pages as `scrape_pages` does."""
+    from positioning_engine.scrape import page_problem
+
+    data: dict = {k: manifest[k] for k in ("company", "website", "scraped_at")}
+    data["pages"] = []
+    seen_types = set()
+    for entry, record in zip(manifest["pages"], records):
+        page_data = record or entry["record"]  # load errors have no snapshot
+        if page_data["page_type"] in seen_types and page_data["page_type"] != "homepage":
+            continue
+        if page_problem(page_data):
+            continue
+        data["pages"].append(page_data)
+        seen_types.add(page_data["page_type"])
+    return data
+
+
+def differences(live: dict, record: dict) -> list[str]:
+    return [k for k in ("title", "meta_description", "headings", "links_text", "body_text") if live.get(k) != record.get(k)]
+
+
+def check(results: list[tuple[Path, dict, list[dict | None]]]) -> int:
+    """Print the pages whose re-extracted record differs from the browser's; return how many."""
+    compared = mismatched = 0
+    for path, manifest, records in results:
+        for entry, record in zip(manifest["pages"], records):
+            if record is None:
+                continue
+            compared += 1
+            fields = differences(entry["record"], record)
+            if fields:
+                mismatched += 1
+                print(f"{path.parent.relative_to(HTML_DIR)}/{entry['file']}: {', '.join(fields)} differ")
+    print(f"{compared - mismatched} of {compared} page(s) match the browser's extraction")
+    return mismatched
+
+
+def run(args):
+    manifests = find_runs(args.companies, args.latest)
+    if not manifests:
+        print(f"Error: no saved HTML in {HTML_DIR} (scrape with --save-html first)")
+        sys.exit(1)
+
+    workers = max(1, args.workers or os.cpu_count() or 1)
+    start = time.perf_counter()
+    results = extract_runs(manifests, workers)
+    pages = sum(r is not None for _, _, records in results for r in records)
+    print(f"Re-extracted {pages} page(s) from {len(results)} scrape(s) in {time.perf_counter() - start:.2f}s")
+
+    if args.check:
+        if check(results):
+            sys.exit(1)
+        return
+
+    conn = None
+    if args.store == "sqlite":
+        from positioning_engine import store
+
+        conn = store.connect(store.store_path(args))
+
+    latest: dict[str, dict] = {}
+    for path, manifest, records in results:
+        data = replay(manifest, records)
+        write_json_atomic(path.parent / "positioning.json", data, indent=2, ensure_ascii=False, default=str)
+        if conn is not None:
+            snapshot_id = store.save_snapshot(conn, data)
+            print(f"{data['company']} ({data['scraped_at']}): {len(data['pages'])} page(s), snapshot {snapshot_id}")
+        else:
+            print(f"{data['company']} ({data['scraped_at']}): {len(data['pages'])} page(s)")
+        latest[slugify(data["company"])] = data
+
+    if conn is None:
+        for slug, data in latest.items():
+            output_path = OUTPUT_DIR / f"{slug}-positioning.json"
+            write_json_atomic(output_path, data, indent=2, default=str)
+            print(f"Saved to: {output_path}")
@@ -0,0 +1,323 @@
+"""
+Provider Routing
+
+Usage:
+    python -m positioning_engine analyze output/kast-positioning.json --hedge-after 20
+    python -m positioning_engine analyze kast --store sqlite --timeout 90 --timeout openrouter=150
+    python -m positioning_engine analyze output/kast-positioning.json --no-failover
+
+The analysis request is sent along a route: the chosen provider first and,
+when the other provider's key is set too, that provider as a second leg
+(claude-sonnet-4-5-... on Anthropic is anthropic/claude-sonnet-4-5-... on
+OpenRouter).
+
+- Failover: when a leg fails (API error, connection error or its timeout),
+  the next leg is sent straight away.
+- Hedging: with a hedge delay, the next leg is also sent when the running
+  one has not answered within that delay. Both requests then race; the
+  first response that parses into a valid brief wins and the other request
+  is cancelled, which closes its connection.
+- Timeouts are per provider (`--timeout 90` for all, `--timeout
+  anthropic=60` for one).
+- Each provider has a circuit breaker: after BREAKER_FAILURES consecutive
+  failed requests its legs are skipped for BREAKER_COOLDOWN seconds, then a
+  single trial request decides whether it closes again. Responses that do
+  not parse are not failures of the provider. Breakers are per process, so
+  they matter most in the long-running `serve` mode.
+
+Requests run on the async SDK clients on one background event loop. When
+every leg answered but none parsed, the first answer goes back to
+run_analysis for the usual repair prompt.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from positioning_engine import trace
+from positioning_engine.analyze import (
+    CLIENT_ENV,
+    DEFAULT_MODEL_ANTHROPIC,
+    OPENROUTER_BASE_URL,
+    anthropic_request,
+    openrouter_request,
+    parse_and_validate,
+    response_text,
+)
+
+DEFAULT_TIMEOUT = 300.0
+BREAKER_FAILURES = 3
+BREAKER_COOLDOWN = 60.0
+SDK_MAX_RETRIES = 1  # the route itself fails over, so keep the SDK's own retries short
+
+
+@dataclass
+class Leg:
+    provider: str
+    model: str
+    timeout: float = DEFAULT_TIMEOUT
+
+
+@dataclass
+class Route:
+    legs: list[Leg]
+    hedge_after: float | None = None
+    winner: Leg | None = None  # set by send()
+
+
+@dataclass
+class Outcome:
+    leg: Leg
+    brief: dict | None
+    raw: str = ""
+    error: Exception | None = None
+    hedged: bool = False
+
+
+def counterpart_model(model: str, provider: str) -> str | None:
+    """The same model under the other provider's naming, if it has one."""
+    if provider == "openrouter":
+        return model if "/" in model else f"anthropic/{model}"
+    if model.startswith("anthropic/"):
+        return model.removeprefix("anthropic/")
+    return None if "/" in model else DEFAULT_MODEL_ANTHROPIC
+
+
+def plan_route(
+    provider: str,
+    model: str,
+    hedge_after: float | None = None,
+    timeouts: list[tuple[str | None, float]] | None = None,
+    failover: bool = True,
+) -> Route:
+    """Route for one analysis: `provider` first, then the other configured provider.
+
+    `timeouts` holds (provider or None for all, seconds) pairs; later pairs win.
+    """
+    limits: dict[str, float] = {}
+    for name, seconds in timeouts or []:
+        for p in CLIENT_ENV:
+            if name in (None, p):
+                limits[p] = seconds
+
+    legs = [Leg(provider, model, limits.get(provider, DEFAULT_TIMEOUT))]
+    other = "openrouter" if provider == "anthropic" else "anthropic"
+    other_model = counterpart_model(model, other)
+    if failover and other_model and os.environ.get(CLIENT_ENV[other][0]):
+        legs.append(Leg(other, other_model, limits.get(other, DEFAULT_TIMEOUT)))
+    return Route(legs, hedge_after)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed, open for `cooldown` seconds, then one trial."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def admit(self) -> str | None:
+        """"closed" or "trial" when a request may be sent, None while open or a trial runs."""
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return "closed"
+            if state == "half-open" and not self.trial:
+                self.trial = True
+                return "trial"
+            return None
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def release_trial(self):
+        """Give up a trial whose request was cancelled or whose result was dropped."""
+        with self.lock:
+            self.trial = False
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.trial = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(provider: str) -> CircuitBreaker:
+    with _breakers_lock:
+        return _breakers.setdefault(provider, CircuitBreaker())
+
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+_clients: dict[tuple, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """The background event loop the async SDK clients live on."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="provider-router", daemon=True).start()
+        return _loop
+
+
+def get_async_client(provider: str) -> Any:
+    """Async SDK client per provider, keyed like analyze.get_client; awaited on the router loop."""
+    key = (provider, *(os.environ.get(name) for name in CLIENT_ENV[provider]))
+    with _clients_lock:
+        if key in _clients:
+            return _clients[key]
+        if provider == "anthropic":
+            from anthropic import AsyncAnthropic
+
+            _clients[key] = AsyncAnthropic(max_retries=SDK_MAX_RETRIES)
+        else:
+            from openai import AsyncOpenAI
+
+            _clients[key] = AsyncOpenAI(
+                api_key=os.environ["OPENROUTER_API_KEY"],
+                base_url=os.environ.get("OPENROUTER_BASE_URL", OPENROUTER_BASE_URL),
+                max_retries=SDK_MAX_RETRIES,
+            )
+        return _clients[key]
+
+
+async def call_leg(leg: Leg, system: str, user: str, hedged: bool) -> str:
+    # A fallback leg's SDK is only imported once that leg is sent, off the loop thread
+    client = await asyncio.get_running_loop().run_in_executor(None, get_async_client, leg.provider)
+    label = "Anthropic" if leg.provider == "anthropic" else "OpenRouter"
+    print(f"Calling {label} API ({leg.model}){' as hedge' if hedged else ''}...")
+
+    with trace.span(
+        f"call_{leg.provider}", model=leg.model, prompt_chars=len(system) + len(user), hedged=hedged
+    ) as span:
+        if leg.provider == "anthropic":
+            request = client.messages.create(**anthropic_request(system, user, leg.model))
+        else:
+            request = client.chat.completions.create(**openrouter_request(system, user, leg.model))
+        response = await asyncio.wait_for(request, leg.timeout)
+        return response_text(leg.provider, response, span)
+
+
+def describe(error: BaseException) -> str:
+    if isinstance(error, asyncio.TimeoutError):
+        return "timed out"
+    return f"{type(error).__name__}: {error}"
+
+
+async def race(system: str, user: str, route: Route, failures: list[str]) -> Outcome | None:
+    """Winning outcome, the first unparsed answer if no answer parsed, or None if every leg failed."""
+    loop = asyncio.get_running_loop()
+    waiting = list(route.legs)
+    running: dict[asyncio.Task, tuple[Leg, bool, bool]] = {}  # leg, hedged, breaker trial
+    unparsed: list[Outcome] = []
+    hedge_at: float | None = None
+
+    def launch(hedged: bool):
+        nonlocal hedge_at
+        while waiting:
+            leg = waiting.pop(0)
+            admitted = breaker(leg.provider).admit()
+            if admitted is None:
+                print(f"Skipping {leg.provider}: circuit open after repeated failures")
+                failures.append(f"{leg.provider}: circuit open")
+                continue
+            task = asyncio.create_task(call_leg(leg, system, user, hedged))
+            running[task] = (leg, hedged, admitted == "trial")
+            if route.hedge_after is not None:
+                hedge_at = loop.time() + route.hedge_after
+            return
+
+    launch(hedged=False)
+    try:
+        while running:
+            timeout = None
+            if waiting and hedge_at is not None:
+                timeout = max(0.0, hedge_at - loop.time())
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"No response after {route.hedge_after:g}s, hedging with {waiting[0].provider}")
+                launch(hedged=True)
+                continue
+
+            for task in done:
+                leg, hedged, _ = running.pop(task)
+                try:
+                    raw = task.result()
+                except Exception as e:
+                    breaker(leg.provider).failure()
+                    failures.append(f"{leg.provider}: {describe(e)}")
+                    print(f"{leg.provider} request failed ({describe(e)})")
+                    continue
+
+                breaker(leg.provider).success()
+                try:
+                    return Outcome(leg, parse_and_validate(raw), raw, hedged=hedged)
+                except (json.JSONDecodeError, ValueError) as e:
+                    print(f"{leg.provider} response did not parse: {e}")
+                    unparsed.append(Outcome(leg, None, raw, e, hedged))
+
+            if not running:
+                # Fail over to the next leg
+                launch(hedged=False)
+    finally:
+        # Legs still running, or finished alongside the winner, never report to their breaker
+        for task, (leg, _, trial) in running.items():
+            task.cancel()
+            if trial:
+                breaker(leg.provider).release_trial()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+            print(f"Cancelled the slower request to {', '.join(leg.provider for leg, _, _ in running.values())}")
+
+    return unparsed[0] if unparsed else None
+
+
+def send(system: str, user: str, route: Route) -> Outcome:
+    """Send the request along `route`; the first valid brief wins."""
+    try:
+        get_async_client(route.legs[0].provider)
+    except ImportError:
+        print(f"Error: pip install {'anthropic' if route.legs[0].provider == 'anthropic' else 'openai'}")
+        sys.exit(1)
+
+    failures: list[str] = []
+    with trace.span("route", legs=len(route.legs), hedge_after=route.hedge_after) as span:
+        coro = race(system, user, route, failures)
+        outcome = asyncio.run_coroutine_threadsafe(coro, event_loop()).result()
+        if outcome is None:
+            span.set(failed=True)
+            print("Error: no provider returned a response")
+            for line in failures:
+                print(f"  {line}")
+            sys.exit(1)
+        route.winner = outcome.leg
+        span.set(provider=outcome.leg.provider, hedged=outcome.hedged, valid=outcome.brief is not None)
+    return outcome
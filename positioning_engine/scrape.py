@@ -0,0 +1,292 @@
+"""
+Neobank Positioning Scraper
+
+Usage:
+    python -m positioning_engine scrape "Company Name" "https://website.com"
+
+Scrapes a company's website to extract positioning elements:
+headlines, value props, CTAs, proof points, feature claims,
+and brand voice signals.
+
+Outputs structured JSON to output/{slug}-positioning.json. Each page is
+also appended to output/{slug}-positioning.jsonl as soon as it is scraped
+(see stream.py), so a crash keeps the pages done so far and other processes
+can follow the scrape. With --save-html the rendered DOM of every loaded
+page is saved too, for offline re-extraction (see reextract.py).
+
+Requires: pip install playwright && playwright install chromium
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+
+from positioning_engine import trace
+from positioning_engine.core import OUTPUT_DIR, slugify, write_json_atomic
+from positioning_engine.stream import PageStream, finish_stream, recover_stream
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+MIN_BODY_CHARS = 200  # pages other than the homepage with less body text are skipped
+
+
+def candidate_pages(website_url: str) -> list[tuple[str, str]]:
+    """Pages to scrape, in priority order, as (url, page_type) pairs."""
+    return [
+        (website_url, "homepage"),
+        (f"{website_url}/about", "about"),
+        (f"{website_url}/about-us", "about"),
+        (f"{website_url}/features", "features"),
+        (f"{website_url}/pricing", "pricing"),
+        (f"{website_url}/products", "products"),
+        (f"{website_url}/why-us", "why"),
+    ]
+
+
+async def transferred_bytes(requests: list) -> int:
+    """Response header + body bytes of finished Playwright requests."""
+    total = 0
+    for request in requests:
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            continue
+        total += sizes["responseHeadersSize"] + sizes["responseBodySize"]
+    return total
+
+
+async def scrape_page(page, url: str, page_type: str, snapshot=None) -> dict:
+    """Scrape a single page for positioning content, saving its DOM to `snapshot` if given."""
+    if not trace.enabled():
+        return await extract_page(page, url, page_type, snapshot)
+
+    # Per-request size lookups cost a round trip each, so only when tracing
+    finished: list = []
+    listener = finished.append
+    with trace.span("scrape_page", url=url, page_type=page_type) as span:
+        page.on("requestfinished", listener)
+        try:
+            result = await extract_page(page, url, page_type, snapshot)
+        finally:
+            page.remove_listener("requestfinished", listener)
+        span.set(
+            bytes=await transferred_bytes(finished),
+            requests=len(finished),
+            body_chars=len(result["body_text"]),
+            page_error=result["error"],
+        )
+    return result
+
+
+async def extract_page(page, url: str, page_type: str, snapshot=None) -> dict:
+    """Load one page and extract its title, meta, headings, CTAs and body text.
+
+    Keep reextract.extract_html in step with any change to what is extracted.
+    """
+    result: dict = {
+        "url": url,
+        "page_type": page_type,
+        "title": "",
+        "meta_description": "",
+        "headings": [],
+        "body_text": "",
+        "links_text": [],
+        "error": None,
+    }
+    try:
+        response = await page.goto(url, timeout=20000, wait_until="domcontentloaded")
+        if response and response.status >= 400:
+            result["error"] = f"HTTP {response.status}"
+            return result
+
+        await asyncio.sleep(2)
+
+        # Extract structured content
+        result["title"] = await page.title()
+
+        # Meta description
+        meta = await page.query_selector('meta[name="description"]')
+        if meta:
+            result["meta_description"] = await meta.get_attribute("content") or ""
+
+        # All headings
+        headings = await page.evaluate("""
+            () => Array.from(document.querySelectorAll('h1, h2, h3')).map(h => ({
+                tag: h.tagName,
+                text: h.innerText.trim()
+            })).filter(h => h.text.length > 0 && h.text.length < 200)
+        """)
+        result["headings"] = headings[:30]
+
+        # Button/CTA text
+        ctas = await page.evaluate("""
+            () => Array.from(document.querySelectorAll('button, a[class*="btn"], a[class*="cta"], [role="button"]'))
+                .map(el => el.innerText.trim())
+                .filter(t => t.length > 0 && t.length < 60)
+                .filter((v, i, a) => a.indexOf(v) === i)
+        """)
+        result["links_text"] = ctas[:20]
+
+        # Visible body text (first 15000 chars)
+        body = await page.evaluate("""
+            () => {
+                const walker = document.createTreeWalker(
+                    document.body, NodeFilter.SHOW_TEXT, null
+                );
+                let text = [];
+                let node;
+                while (node = walker.nextNode()) {
+                    const t = node.textContent.trim();
+                    if (t.length > 10 && t.length < 500) text.push(t);
+                }
+                return text.join('\\n');
+            }
+        """)
+        result["body_text"] = body[:15000]
+
+        if snapshot is not None:
+            snapshot.capture(page_type, await page.content())
+
+    except Exception as e:
+        result["error"] = str(e)
+
+    return result
+
+
+def page_problem(page_data: dict) -> str | None:
+    """Why a scraped page is not kept (load error or thin content), or None."""
+    if page_data["error"]:
+        return page_data["error"]
+    body_len = len(page_data.get("body_text", ""))
+    if body_len < MIN_BODY_CHARS and page_data["page_type"] != "homepage":
+        return f"Thin content ({body_len} chars)"
+    return None
+
+
+def load_playwright():
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        print("Install playwright: pip install playwright && playwright install chromium")
+        sys.exit(1)
+    return async_playwright
+
+
+async def scrape_company(company_name: str, website_url: str, browser=None, save_html: bool = False) -> dict:
+    """Scrape the candidate pages of one company and return its positioning data.
+
+    Launches its own Chromium unless a running `browser` is passed in (the
+    service keeps a pool of them warm). `save_html` keeps each loaded page's
+    DOM under output/html/ for `reextract`.
+    """
+    with trace.span("scrape_company", company=company_name, warm=browser is not None) as span:
+        if browser is None:
+            async with load_playwright()() as p:
+                browser = await p.chromium.launch(headless=True)
+                data = await scrape_pages(browser, company_name, website_url, save_html)
+                await browser.close()
+        else:
+            data = await scrape_pages(browser, company_name, website_url, save_html)
+        span.set(pages=len(data["pages"]))
+
+    return data
+
+
+async def scrape_pages(browser, company_name: str, website_url: str, save_html: bool = False) -> dict:
+    context = await browser.new_context(
+        user_agent=USER_AGENT,
+        viewport={"width": 1280, "height": 800},
+    )
+    page = await context.new_page()
+
+    data: dict = {
+        "company": company_name,
+        "website": website_url,
+        "scraped_at": datetime.now().isoformat(),
+        "pages": [],
+    }
+    stream = PageStream(data)
+    snapshot = None
+    if save_html:
+        from positioning_engine.reextract import SnapshotWriter
+
+        snapshot = SnapshotWriter(data)
+
+    try:
+        seen_types = set()
+        for url, page_type in candidate_pages(website_url):
+            # Skip duplicate page types that already returned content
+            if page_type in seen_types and page_type != "homepage":
+                continue
+
+            print(f"\n[Scraping] {page_type}: {url}")
+            page_data = await scrape_page(page, url, page_type, snapshot)
+            if snapshot is not None:
+                snapshot.page(page_data)
+
+            problem = page_problem(page_data)
+            if problem:
+                print(f"  Skipped: {problem}")
+                continue
+
+            body_len = len(page_data.get("body_text", ""))
+            data["pages"].append(page_data)
+            stream.page(page_data)
+            seen_types.add(page_type)
+            print(f"  Got {body_len} chars, {len(page_data['headings'])} headings, {len(page_data['links_text'])} CTAs")
+    finally:
+        stream.close()
+        await context.close()
+    return data
+
+
+def save_scraped(data: dict, store_kind: str = "json", db_path=None) -> str:
+    """Save scraped data to output/{slug}-positioning.json or the SQLite store; return where.
+
+    A stored snapshot's id is set on `data`, as `store.load_snapshot` would.
+    The company's page stream gets its end record once the data is saved.
+    """
+    if store_kind == "sqlite":
+        from positioning_engine import store
+
+        snapshot_id = store.save_snapshot(store.connect(db_path), data)
+        data["snapshot_id"] = snapshot_id
+        saved_to = f"{db_path or store.DEFAULT_STORE_PATH} (snapshot {snapshot_id})"
+    else:
+        output_path = OUTPUT_DIR / f"{slugify(data['company'])}-positioning.json"
+        write_json_atomic(output_path, data, indent=2, default=str)
+        saved_to = str(output_path)
+
+    finish_stream(data["company"], len(data["pages"]), saved_to)
+    return saved_to
+
+
+def run(args):
+    company_name = args.company
+    website_url = args.url.rstrip("/")
+
+    print(f"Scraping positioning data for: {company_name}")
+    print(f"Website: {website_url}")
+    print("=" * 50)
+
+    try:
+        data = asyncio.run(scrape_company(company_name, website_url, save_html=args.save_html))
+    except Exception as e:
+        # A browser crash loses nothing that already reached the page stream
+        recovered = recover_stream(company_name)
+        if recovered is None:
+            raise
+        data = recovered
+        print(f"\nScrape failed ({e}), saving the {len(data['pages'])} page(s) already streamed")
+
+    # Save output
+    db_path = None
+    if args.store == "sqlite":
+        from positioning_engine.store import store_path
+
+        db_path = store_path(args)
+    saved_to = save_scraped(data, args.store, db_path)
+
+    print(f"\n{'=' * 50}")
+    print(f"Saved to: {saved_to}")
+    print(f"Pages scraped: {len(data['pages'])}")
+    print("\nNext: read this file and run the positioning extraction (Phase 2 in SKILL.md)")
@@ -0,0 +1,620 @@
+"""
+Positioning Service
+
+Usage:
+    python -m positioning_engine serve                      # http://127.0.0.1:8765
+    python -m positioning_engine serve --socket output/positioning.sock --workers 2 --browsers 3
+
+    curl -X POST localhost:8765/jobs -d '{"company": "KAST", "url": "https://kast.xyz",
+        "competitors": [{"company": "Revolut", "url": "https://revolut.com"}]}'
+    curl localhost:8765/jobs/7
+    curl localhost:8765/jobs/7/artifacts/brief.json
+
+Long-running form of `pipeline` for tools that ask for briefs on demand. A
+`pipeline` run pays for a new interpreter per stage, a new Chromium per
+company, new API clients and re-reading the context files; the service pays
+for them once:
+
+- Jobs live in a SQLite queue (output/service.sqlite), so queued work and
+  finished results survive a restart. Jobs that were running when the
+  service stopped are queued again on start.
+- A pool of Chromium instances stays running on one asyncio thread. A job
+  scrapes its target and competitors concurrently on the pool.
+- API clients are shared per provider (see analyze.get_client), and the
+  context files and example brief are loaded once at start. Provider
+  circuit breakers (see router.py) carry over from job to job.
+- A job whose company, inputs and options match a queued or running job is
+  coalesced into it: the caller gets the existing job id. For skip_scrape
+  jobs the inputs include a hash of the stored scraped data.
+
+API (JSON):
+    GET  /health
+    POST /jobs                          202 with the new job, or 200 with the job it joined
+    GET  /jobs                          most recent jobs
+    GET  /jobs/{id}                     status, error and artifact names
+    GET  /jobs/{id}/artifacts/{name}    brief.json, brief.html, brief.pdf, log
+
+POST /jobs fields: company, url, competitors (list of {company, url} or
+"Name:URL"; slugs with skip_scrape), skip_scrape, provider, model, prescore,
+compact, extract, passages, lint. Artifacts are written to output/jobs/{id}/.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import io
+import json
+import signal
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from positioning_engine.core import OUTPUT_DIR, load_env, resolve_path, slugify
+
+DEFAULT_QUEUE_PATH = OUTPUT_DIR / "service.sqlite"
+JOBS_DIR = OUTPUT_DIR / "jobs"
+RECENT_JOBS = 50
+CONTENT_TYPES = {".json": "application/json", ".html": "text/html", ".pdf": "application/pdf"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    company TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,          -- queued | running | done | failed
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    artifacts TEXT                 -- JSON {name: path}
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status);
+"""
+
+
+class JobError(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Per-job logs
+# ---------------------------------------------------------------------------
+
+class JobLog:
+    """A job's stdout: written to output/jobs/{id}/log, last lines kept for errors."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.file = open(path, "a", buffering=1)
+        self.tail: deque[str] = deque(maxlen=20)
+
+    def write(self, text: str):
+        self.file.write(text)
+        self.tail.extend(line for line in text.splitlines() if line.strip())
+
+    def last_error(self) -> str:
+        for line in reversed(self.tail):
+            if line.startswith("Error"):
+                return line
+        return self.tail[-1] if self.tail else ""
+
+    def close(self):
+        self.file.close()
+
+
+current_log: contextvars.ContextVar[JobLog | None] = contextvars.ContextVar("job_log", default=None)
+
+
+class JobStdout(io.TextIOBase):
+    """sys.stdout replacement that sends prints made while running a job to the job's log."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        log = current_log.get()
+        (log or self.stream).write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+# ---------------------------------------------------------------------------
+# Job queue
+# ---------------------------------------------------------------------------
+
+class JobQueue:
+    """Persistent FIFO of pipeline jobs in SQLite, shared by the HTTP and worker threads."""
+
+    def __init__(self, path: Path = DEFAULT_QUEUE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.cond = threading.Condition()
+
+    def recover(self) -> int:
+        """Queue jobs again that were running when the service last stopped."""
+        with self.cond, self.conn:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            )
+        return cur.rowcount
+
+    def submit(self, key: str, company: str, params: dict) -> tuple[dict, bool]:
+        """Queue a job, or return the in-flight job with the same key; (job, coalesced)."""
+        with self.cond, self.conn:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE key = ? AND status IN ('queued', 'running') ORDER BY id LIMIT 1",
+                (key,),
+            ).fetchone()
+            if row:
+                return job_record(row), True
+            cur = self.conn.execute(
+                "INSERT INTO jobs (key, company, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (key, company, json.dumps(params), time.time()),
+            )
+            self.cond.notify()
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (cur.lastrowid,)).fetchone()
+        return job_record(row), False
+
+    def claim(self, timeout: float) -> tuple[int, dict] | None:
+        """Mark the oldest queued job running and return (id, params); None after `timeout`."""
+        with self.cond:
+            row = self.next_queued()
+            if row is None:
+                self.cond.wait(timeout)
+                row = self.next_queued()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                    (time.time(), row["id"]),
+                )
+        return row["id"], json.loads(row["params"])
+
+    def next_queued(self):
+        return self.conn.execute(
+            "SELECT id, params FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+        ).fetchone()
+
+    def finish(self, job_id: int, artifacts: dict[str, str], error: str | None = None):
+        with self.cond, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ?, artifacts = ? WHERE id = ?",
+                ("failed" if error else "done", time.time(), error, json.dumps(artifacts), job_id),
+            )
+
+    def get(self, job_id: int) -> dict | None:
+        with self.cond:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return job_record(row) if row else None
+
+    def artifact(self, job_id: int, name: str) -> Path | None:
+        job = self.get(job_id)
+        path = (job or {}).get("_artifacts", {}).get(name)
+        return Path(path) if path else None
+
+    def recent(self, limit: int = RECENT_JOBS) -> list[dict]:
+        with self.cond:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [job_record(row) for row in rows]
+
+
+def job_record(row: sqlite3.Row) -> dict:
+    artifacts = json.loads(row["artifacts"] or "{}")
+    return {
+        "id": row["id"],
+        "company": row["company"],
+        "status": row["status"],
+        "params": json.loads(row["params"]),
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "error": row["error"],
+        "artifacts": sorted(artifacts),
+        "_artifacts": artifacts,
+    }
+
+
+def public(job: dict) -> dict:
+    return {k: v for k, v in job.items() if not k.startswith("_")}
+
+
+# ---------------------------------------------------------------------------
+# Warm browser pool
+# ---------------------------------------------------------------------------
+
+class BrowserPool:
+    """Chromium instances kept running on a dedicated asyncio thread.
+
+    Started on the first scrape. Each scrape borrows one browser for its own
+    browser context; a browser that has crashed is replaced.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.lock = threading.Lock()
+        self.playwright: Any = None
+        self.idle: asyncio.Queue | None = None
+
+    def start(self):
+        with self.lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(self.launch(), loop).result()
+            self.loop = loop
+
+    async def launch(self):
+        from positioning_engine.scrape import load_playwright
+
+        self.playwright = await load_playwright()().start()
+        self.idle = asyncio.Queue()
+        for _ in range(self.size):
+            await self.idle.put(await self.playwright.chromium.launch(headless=True))
+        print(f"Browser pool: {self.size} Chromium instance(s) running")
+
+    def scrape(self, company: str, url: str) -> Future:
+        """Scrape one company on a pooled browser; the future resolves to its data."""
+        self.start()
+        assert self.loop is not None
+        return asyncio.run_coroutine_threadsafe(self.scrape_on_pool(company, url, current_log.get()), self.loop)
+
+    async def scrape_on_pool(self, company: str, url: str, log: JobLog | None) -> dict:
+        from positioning_engine.scrape import scrape_company
+
+        current_log.set(log)
+        assert self.idle is not None
+        browser = await self.idle.get()
+        try:
+            if not browser.is_connected():
+                browser = await self.playwright.chromium.launch(headless=True)
+            return await scrape_company(company, url, browser)
+        finally:
+            await self.idle.put(browser)
+
+    def close(self):
+        if self.loop is None:
+            return
+
+        async def shutdown():
+            while self.idle is not None and not self.idle.empty():
+                await (await self.idle.get()).close()
+            await self.playwright.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout=30)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+def parse_competitors(raw: list) -> list[tuple[str, str | None]]:
+    """[{company, url}] / "Name:URL" / slug entries as (name, url or None) pairs."""
+    competitors = []
+    for item in raw:
+        if isinstance(item, dict):
+            competitors.append((str(item.get("company", "")), item.get("url")))
+        elif ":" in str(item) and not str(item).startswith("http"):
+            name, url = str(item).split(":", 1)
+            competitors.append((name.strip(), url.strip()))
+        else:
+            competitors.append((str(item), None))
+    return [(name, url.rstrip("/") if url else None) for name, url in competitors if name]
+
+
+class Service:
+    def __init__(self, args):
+        from positioning_engine import analyze
+
+        load_env()
+        self.store = args.store
+        self.db_path = None
+        if args.store == "sqlite":
+            from positioning_engine.store import store_path
+
+            self.db_path = store_path(args)
+        self.provider = args.provider
+        self.model = args.model
+        self.routing = {"hedge_after": args.hedge_after, "timeouts": args.timeout, "failover": args.failover}
+        self.queue = JobQueue(resolve_path(args.queue_db) if args.queue_db else DEFAULT_QUEUE_PATH)
+        self.browsers = BrowserPool(args.browsers)
+        self.slug_locks: dict[str, threading.Lock] = {}
+        self.slug_locks_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.context = analyze.load_context_files()
+        self.example_brief = analyze.load_example_brief()
+
+    # -- submission -------------------------------------------------------
+
+    def normalize(self, request: dict) -> dict:
+        company = str(request.get("company") or "").strip()
+        if not company:
+            raise JobError("company is required")
+        skip_scrape = bool(request.get("skip_scrape"))
+        url = str(request.get("url") or "").rstrip("/")
+        if not skip_scrape and not url:
+            raise JobError("url is required unless skip_scrape is set")
+        competitors = parse_competitors(request.get("competitors") or [])
+        if not skip_scrape and any(u is None for _, u in competitors):
+            raise JobError("competitors need a url (\"Name:URL\" or {company, url}) unless skip_scrape is set")
+        return {
+            "company": company,
+            "url": url,
+            "competitors": competitors,
+            "skip_scrape": skip_scrape,
+            "provider": request.get("provider") or self.provider,
+            "model": request.get("model") or self.model,
+            "prescore": bool(request.get("prescore")),
+            "compact": bool(request.get("compact")),
+            "extract": bool(request.get("extract")),
+            "passages": bool(request.get("passages")),
+            "lint": request.get("lint") or "repair",
+        }
+
+    def input_hashes(self, params: dict) -> dict[str, str]:
+        """Digest of the stored scraped data a skip_scrape job would analyze."""
+        if not params["skip_scrape"]:
+            return {}
+        slugs = [slugify(params["company"])] + [slugify(n) for n, _ in params["competitors"]]
+        hashes = {}
+        if self.store == "sqlite":
+            from positioning_engine import store
+
+            conn = store.connect(self.db_path)
+            for slug in slugs:
+                row = store.find_snapshot(conn, slug)
+                hashes[slug] = f"snapshot-{row['id']}" if row else "missing"
+        else:
+            for slug in slugs:
+                path = OUTPUT_DIR / f"{slug}-positioning.json"
+                hashes[slug] = hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest() if path.exists() else "missing"
+        return hashes
+
+    def submit(self, request: dict) -> tuple[dict, bool]:
+        params = self.normalize(request)
+        identity = {**params, "company": slugify(params["company"]), "inputs": self.input_hashes(params)}
+        key = hashlib.blake2b(json.dumps(identity, sort_keys=True).encode(), digest_size=16).hexdigest()
+        return self.queue.submit(key, params["company"], params)
+
+    # -- execution --------------------------------------------------------
+
+    def worker(self):
+        while not self.stopping.is_set():
+            claimed = self.queue.claim(timeout=1.0)
+            if claimed is None:
+                continue
+            job_id, params = claimed
+            print(f"[job {job_id}] {params['company']}: running")
+            self.execute(job_id, params)
+            print(f"[job {job_id}] {params['company']}: {self.queue.get(job_id)['status']}")  # type: ignore[index]
+
+    def execute(self, job_id: int, params: dict):
+        out_dir = JOBS_DIR / str(job_id)
+        log = JobLog(out_dir / "log")
+        token = current_log.set(log)
+        artifacts = {"log": str(log.path)}
+        error = None
+        try:
+            artifacts.update(self.run_pipeline(params, out_dir))
+        except SystemExit:
+            error = log.last_error() or "stage exited"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Error: {error}")
+        finally:
+            current_log.reset(token)
+            log.close()
+        self.queue.finish(job_id, artifacts, error)
+
+    def slug_lock(self, slug: str) -> threading.Lock:
+        with self.slug_locks_lock:
+            return self.slug_locks.setdefault(slug, threading.Lock())
+
+    def scrape_and_save(self, company: str, url: str, required: bool = False) -> dict:
+        """Scrape one company on the browser pool and save it.
+
+        Held under a per-slug lock from the first page to the saved file, so
+        two jobs sharing a competitor never write its page stream or scraped
+        data at the same time.
+        """
+        from positioning_engine.scrape import save_scraped
+
+        with self.slug_lock(slugify(company)):
+            data = self.browsers.scrape(company, url).result()
+            if required and not data["pages"]:
+                raise JobError(f"no pages scraped from {url}")
+            print(f"Saved {company} to {save_scraped(data, self.store, self.db_path)}")
+        return data
+
+    def scrape_all(self, params: dict) -> dict:
+        """Scrape the target and every competitor concurrently on the browser pool."""
+        with ThreadPoolExecutor(max_workers=1 + len(params["competitors"]), thread_name_prefix="scrape") as pool:
+            # each thread runs in a copy of this job's context, so its output lands in the job log
+            target_future = pool.submit(
+                contextvars.copy_context().run, self.scrape_and_save, params["company"], params["url"], True
+            )
+            competitor_futures = [
+                (name, pool.submit(contextvars.copy_context().run, self.scrape_and_save, name, url))
+                for name, url in params["competitors"]
+            ]
+
+            target = target_future.result()
+            competitors = {}
+            for name, future in competitor_futures:
+                try:
+                    competitors[slugify(name)] = future.result()
+                except Exception as e:  # competitor failures are non-fatal, as in `pipeline`
+                    print(f"Warning: scrape of {name} failed ({e}), continuing...")
+        return {"target": target, "competitors": competitors}
+
+    def load_stored(self, params: dict) -> dict:
+        from positioning_engine.analyze import load_scraped_data, load_scraped_data_from_store
+
+        slug = slugify(params["company"])
+        competitor_slugs = [slugify(name) for name, _ in params["competitors"]]
+        if self.store == "sqlite":
+            assert self.db_path is not None
+            return load_scraped_data_from_store(self.db_path, slug, competitor_slugs)
+        return load_scraped_data(OUTPUT_DIR / f"{slug}-positioning.json", competitor_slugs)
+
+    def run_pipeline(self, params: dict, out_dir: Path) -> dict[str, str]:
+        from positioning_engine.analyze import generate_brief, resolve_provider, snapshot_ids
+        from positioning_engine.render import write_outputs
+        from positioning_engine.router import plan_route
+
+        scraped_data = self.load_stored(params) if params["skip_scrape"] else self.scrape_all(params)
+
+        provider, model = resolve_provider(params["provider"], params["model"])
+        brief, _ = generate_brief(
+            scraped_data,
+            provider,
+            model,
+            self.context,
+            self.example_brief,
+            prescore=params["prescore"],
+            compact=params.get("compact", False),
+            extract=params.get("extract", False),
+            passages=params.get("passages", False),
+            lint=params["lint"],
+            db_path=self.db_path,
+            route=plan_route(provider, model, **self.routing),
+        )
+
+        brief_path = out_dir / "brief.json"
+        with open(brief_path, "w") as f:
+            json.dump(brief, f, indent=2, ensure_ascii=False)
+        if self.db_path and "snapshot_id" in scraped_data["target"]:
+            from positioning_engine import store
+
+            slug = slugify(scraped_data["target"]["company"])
+            store.save_brief(store.connect(self.db_path), slug, brief, snapshot_ids(scraped_data))
+
+        artifacts = {"brief.json": str(brief_path)}
+        html_path, pdf_path = write_outputs(brief, out_dir)
+        artifacts["brief.html"] = str(html_path)
+        if pdf_path:
+            artifacts["brief.pdf"] = str(pdf_path)
+        return artifacts
+
+    def stop(self):
+        self.stopping.set()
+        self.browsers.close()
+
+
+# ---------------------------------------------------------------------------
+# HTTP API
+# ---------------------------------------------------------------------------
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    service: Service  # set on the handler subclass in serve()
+
+    def do_GET(self):
+        parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+        queue = self.service.queue
+
+        if parts == ["health"]:
+            self.send_json(200, {"status": "ok"})
+        elif parts == ["jobs"]:
+            self.send_json(200, {"jobs": [public(j) for j in queue.recent()]})
+        elif len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            job = queue.get(int(parts[1]))
+            if job:
+                self.send_json(200, public(job))
+            else:
+                self.send_json(404, {"error": "no such job"})
+        elif len(parts) == 4 and parts[0] == "jobs" and parts[1].isdigit() and parts[2] == "artifacts":
+            path = queue.artifact(int(parts[1]), parts[3])
+            if path is None or not path.exists():
+                self.send_json(404, {"error": "no such artifact"})
+                return
+            self.send_bytes(200, path.read_bytes(), CONTENT_TYPES.get(path.suffix, "text/plain; charset=utf-8"))
+        else:
+            self.send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            self.send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise JobError("request body must be a JSON object")
+            job, coalesced = self.service.submit(request)
+        except (json.JSONDecodeError, JobError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        self.send_json(200 if coalesced else 202, {**public(job), "coalesced": coalesced})
+
+    def send_json(self, status: int, body: dict):
+        self.send_bytes(status, json.dumps(body, indent=2).encode("utf-8"), "application/json")
+
+    def send_bytes(self, status: int, payload: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def stop_on_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(args):
+    service = Service(args)
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
+    handler = type("Handler", (ServiceHandler,), {"service": service})
+
+    if args.socket:
+        socket_path = resolve_path(args.socket)
+        socket_path.unlink(missing_ok=True)
+        server: socketserver.BaseServer = UnixHTTPServer(str(socket_path), handler)
+        where = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), handler)
+        where = f"http://{args.host}:{server.server_address[1]}"
+
+    sys.stdout = JobStdout(sys.stdout)
+    recovered = service.queue.recover()
+    if recovered:
+        print(f"Re-queued {recovered} job(s) interrupted by the last shutdown")
+    for i in range(args.workers):
+        threading.Thread(target=service.worker, name=f"worker-{i}", daemon=True).start()
+
+    print(f"Positioning service on {where} ({args.workers} worker(s), {args.browsers} browser(s))")
+    print("Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        if args.socket:
+            socket_path.unlink(missing_ok=True)
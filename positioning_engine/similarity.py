@@ -0,0 +1,258 @@
+"""
+Competitor Test Scoring
+
+Usage:
+    python -m positioning_engine competitor-test output/kast-brief.json
+    python -m positioning_engine competitor-test output/kast-brief.json --competitors revolut crypto-com \\
+        --threshold 0.4 --json
+
+Rule 3 of the skill ("could a competitor say the exact same thing?") as a
+local check. Each competitor's scraped copy (title, meta description,
+headings, link/CTA text and body lines) is split into segments and turned
+into TF-IDF vectors over word unigrams and bigrams. Every positioning
+statement, one-liner and value proposition headline/supporting line of a
+brief is scored against all competitor segments at once: the competitor
+segments form a sparse matrix (an inverted index), so scoring is one sparse
+matrix product followed by a max per competitor. Entries whose closest
+competitor segment reaches the threshold are flagged.
+
+Tokenized segments are cached per snapshot under output/cache/, keyed by
+store path and snapshot id or, for JSON files, by scrape time.
+
+The analyzer runs this after the banned-phrase lint and prints the flagged
+entries; it never triggers another model call.
+"""
+
+import hashlib
+import json
+import math
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+from positioning_engine.core import OUTPUT_DIR, resolve_path, slugify
+
+CACHE_DIR = OUTPUT_DIR / "cache" / "competitor-test"
+CACHE_VERSION = 1
+DEFAULT_THRESHOLD = 0.5
+MIN_SEGMENT_TERMS = 2
+
+WORD_RE = re.compile(r"[a-z0-9]+(?:['.][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our so that the their "
+    "them they this to us we with you your".split()
+)
+
+
+def terms(text: str) -> Counter:
+    """Unigram and bigram counts of the content words in `text`."""
+    words = [w for w in WORD_RE.findall(text.lower().replace("’", "'")) if w not in STOPWORDS]
+    counts = Counter(words)
+    counts.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return counts
+
+
+def company_segments(data: dict) -> list[str]:
+    """Distinct copy segments of a scraped company, in page order."""
+    seen: dict[str, None] = {}
+    for page in data.get("pages", []):
+        candidates = [page.get("title", ""), page.get("meta_description", "")]
+        candidates += [h.get("text", "") for h in page.get("headings", [])]
+        candidates += page.get("links_text", [])
+        candidates += (page.get("body_text") or "").split("\n")
+        for text in candidates:
+            text = " ".join(text.split())
+            if text:
+                seen.setdefault(text, None)
+    return list(seen)
+
+
+def cache_path(slug: str, data: dict, db_path: Path | None = None) -> Path | None:
+    if data.get("snapshot_id") is not None:
+        from positioning_engine.store import DEFAULT_STORE_PATH
+
+        # Snapshot ids are per store file, so two --db files would otherwise share entries
+        store_key = hashlib.sha1(str(Path(db_path or DEFAULT_STORE_PATH).resolve()).encode()).hexdigest()[:12]
+        key = f"snapshot-{store_key}-{data['snapshot_id']}"
+    elif data.get("scraped_at"):
+        key = re.sub(r"[^0-9A-Za-z]+", "", str(data["scraped_at"]))
+    else:
+        return None
+    return CACHE_DIR / f"{slug}-{key}.json"
+
+
+def load_segments(slug: str, data: dict, db_path: Path | None = None) -> list[tuple[str, Counter]]:
+    """(segment text, term counts) for one competitor, cached per snapshot."""
+    path = cache_path(slug, data, db_path)
+    if path and path.exists():
+        with open(path) as f:
+            cached = json.load(f)
+        if cached.get("version") == CACHE_VERSION:
+            return [(text, Counter(counts)) for text, counts in cached["segments"]]
+
+    # The analyzer loads store bodies cut to the prompt budget; index the full copy
+    truncated = any(p.get("body_length", 0) > len(p.get("body_text") or "") for p in data.get("pages", []))
+    if db_path and truncated and data.get("snapshot_id") is not None:
+        from positioning_engine import store
+
+        data = store.load_snapshot(store.connect(db_path), slug, data["snapshot_id"]) or data
+
+    segments = []
+    for text in company_segments(data):
+        counts = terms(text)
+        if sum(1 for t in counts if " " not in t) >= MIN_SEGMENT_TERMS:
+            segments.append((text, counts))
+
+    if path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"version": CACHE_VERSION, "segments": segments}, f, ensure_ascii=False)
+    return segments
+
+
+def brief_candidates(brief: dict) -> list[tuple[str, str]]:
+    """(JSON path, text) of every messaging entry the competitor test applies to."""
+    framework = brief.get("messaging_framework", {})
+    candidates = []
+    for i, item in enumerate(framework.get("positioning_statements", [])):
+        text = item.get("text", "") if isinstance(item, dict) else str(item)
+        candidates.append((f"$.messaging_framework.positioning_statements[{i}].text", text))
+    for i, item in enumerate(framework.get("one_liners", [])):
+        candidates.append((f"$.messaging_framework.one_liners[{i}]", str(item)))
+    for i, item in enumerate(framework.get("value_propositions", [])):
+        if isinstance(item, dict):
+            for key in ("headline", "supporting"):
+                if item.get(key):
+                    candidates.append((f"$.messaging_framework.value_propositions[{i}].{key}", item[key]))
+    return [(path, text) for path, text in candidates if text.strip()]
+
+
+def weigh(counts: Counter, idf: dict[str, float]) -> dict[str, float]:
+    """Sublinear TF-IDF vector, L2-normalized."""
+    vector = {t: (1 + math.log(c)) * idf[t] for t, c in counts.items() if t in idf}
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {t: w / norm for t, w in vector.items()} if norm else {}
+
+
+def score_brief(brief: dict, competitors: dict[str, list[tuple[str, Counter]]]) -> list[dict]:
+    """Closest competitor segment for every messaging entry, highest score first."""
+    candidates = brief_candidates(brief)
+    if not candidates or not competitors:
+        return []
+
+    # Column index over every competitor segment: owner, text, and term -> postings
+    owners: list[str] = []
+    texts: list[str] = []
+    seg_counts: list[Counter] = []
+    for slug, segments in competitors.items():
+        for text, counts in segments:
+            owners.append(slug)
+            texts.append(text)
+            seg_counts.append(counts)
+    query_counts = [terms(text) for _, text in candidates]
+
+    df: Counter = Counter()
+    for counts in seg_counts + query_counts:
+        df.update(counts.keys())
+    n_docs = len(seg_counts) + len(query_counts)
+    idf = {t: math.log((1 + n_docs) / (1 + d)) + 1 for t, d in df.items()}
+
+    postings: dict[str, list[tuple[int, float]]] = {}
+    for col, counts in enumerate(seg_counts):
+        for term, weight in weigh(counts, idf).items():
+            postings.setdefault(term, []).append((col, weight))
+
+    results: list[dict] = []
+    for (path, text), counts in zip(candidates, query_counts):
+        row: dict[int, float] = {}
+        for term, weight in weigh(counts, idf).items():
+            for col, seg_weight in postings.get(term, ()):
+                row[col] = row.get(col, 0.0) + weight * seg_weight
+
+        best: dict[str, tuple[float, int]] = {}
+        for col, score in row.items():
+            if score > best.get(owners[col], (0.0, -1))[0]:
+                best[owners[col]] = (score, col)
+        ranked = sorted(best.items(), key=lambda kv: -kv[1][0])
+
+        top_slug, (top_score, top_col) = ranked[0] if ranked else ("", (0.0, -1))
+        results.append({
+            "path": path,
+            "text": text,
+            "score": round(top_score, 3),
+            "competitor": top_slug,
+            "closest": texts[top_col] if top_col >= 0 else "",
+            "scores": {slug: round(s, 3) for slug, (s, _) in ranked},
+        })
+
+    results.sort(key=lambda r: -r["score"])
+    return results
+
+
+def competitor_test(
+    brief: dict,
+    competitor_data: dict[str, dict],
+    threshold: float = DEFAULT_THRESHOLD,
+    db_path: Path | None = None,
+) -> tuple[list[dict], list[dict]]:
+    """All scored entries and the flagged subset (score >= threshold)."""
+    competitors = {slug: load_segments(slug, data, db_path) for slug, data in competitor_data.items()}
+    results = score_brief(brief, competitors)
+    return results, [r for r in results if r["score"] >= threshold]
+
+
+def print_flagged(flagged: list[dict], names: dict[str, str]):
+    for r in flagged:
+        name = names.get(r["competitor"], r["competitor"])
+        print(f"  {r['path']} ({r['score']:.2f} vs {name}): \"{r['text'][:80]}\"")
+        print(f"      {name}: \"{r['closest'][:80]}\"")
+
+
+def load_competitor_data(args, brief: dict) -> tuple[dict[str, dict], Path | None]:
+    slugs = args.competitors or [slugify(name) for name in brief.get("competitors", [])]
+    data: dict[str, dict] = {}
+    if args.store == "sqlite":
+        from positioning_engine import store
+
+        db_path = store.store_path(args)
+        conn = store.connect(db_path)
+        for slug in slugs:
+            snapshot = store.load_snapshot(conn, slug)
+            if snapshot is not None:
+                data[slug] = snapshot
+        return data, db_path
+
+    for slug in slugs:
+        path = OUTPUT_DIR / f"{slug}-positioning.json"
+        if path.exists():
+            with open(path) as f:
+                data[slug] = json.load(f)
+    return data, None
+
+
+def run(args):
+    with open(resolve_path(args.brief)) as f:
+        brief = json.load(f)
+
+    competitor_data, db_path = load_competitor_data(args, brief)
+    if not competitor_data:
+        print("Error: no scraped competitor data found (pass --competitors with scraped slugs)")
+        sys.exit(1)
+
+    results, flagged = competitor_test(brief, competitor_data, args.threshold, db_path)
+
+    if args.json:
+        print(json.dumps({"threshold": args.threshold, "results": results}, indent=2, ensure_ascii=False))
+    else:
+        names = {slug: d.get("company", slug) for slug, d in competitor_data.items()}
+        print(f"Competitor test: {len(results)} entries vs {', '.join(names.values())}")
+        if flagged:
+            print(f"{len(flagged)} too close to competitor copy (>= {args.threshold}):")
+            print_flagged(flagged, names)
+        else:
+            closest = results[0]["score"] if results else 0.0
+            print(f"All entries pass (closest {closest:.2f} < {args.threshold})")
+
+    if flagged:
+        sys.exit(1)
@@ -0,0 +1,129 @@
+"""
+CLI Cold-Start Budget Check
+
+Usage:
+    python -m positioning_engine.startup [--budget-ms 60] [--runs 5]
+
+Runs `python -X importtime -m positioning_engine <subcommand> --help` in fresh
+interpreters, for the top-level help and every subcommand the CLI parser
+defines, and compares the import cost against a bare `python -X importtime
+-c pass` baseline. Exits 1 if the CLI adds more than the budget, or if printing
+help imports any heavy dependency. CI runs this as the cold-start regression gate.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+from positioning_engine.core import PROJECT_DIR
+
+# Must never be imported just to parse arguments or print help.
+HEAVY_MODULES = ("playwright", "anthropic", "openai", "weasyprint", "httpx", "asyncio")
+
+DEFAULT_BUDGET_MS = 60.0
+
+
+def help_commands() -> list[list[str]]:
+    """`--help` plus `<subcommand> --help` for every subcommand, read from the CLI parser."""
+    from positioning_engine.cli import build_parser
+
+    commands = [["--help"]]
+    for action in build_parser()._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            commands += [[name, "--help"] for name in action.choices]
+    return commands
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Map each imported module to its self import time in microseconds."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header row
+        modules[fields[2].strip()] = int(fields[0])
+    return modules
+
+
+def measure(cmd_args: list[str]) -> dict[str, int]:
+    """Run one fresh interpreter with -X importtime and return its module timings."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *cmd_args],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd_args)} exited {result.returncode}:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def check_startup(budget_ms: float = DEFAULT_BUDGET_MS, runs: int = 5) -> list[str]:
+    """Measure every help command against the baseline; return budget violations."""
+    baselines = [measure(["-c", "pass"]) for _ in range(runs)]
+    baseline_modules = set().union(*baselines)
+    baseline_ms = statistics.median(sum(m.values()) for m in baselines) / 1000
+
+    failures = []
+    for help_args in help_commands():
+        samples = [measure(["-m", "positioning_engine", *help_args]) for _ in range(runs)]
+        total_ms = statistics.median(sum(m.values()) for m in samples) / 1000
+        added_ms = total_ms - baseline_ms
+        label = " ".join(help_args)
+
+        extra = set(samples[0]) - baseline_modules
+        heavy = sorted(
+            name for name in extra
+            if name.split(".")[0] in HEAVY_MODULES
+        )
+        top = sorted(
+            ((samples[0][name], name) for name in extra),
+            reverse=True,
+        )[:5]
+
+        print(f"{label:<24} +{added_ms:6.1f} ms over baseline, {len(extra)} extra modules")
+        print("  slowest: " + ", ".join(f"{name} {us / 1000:.1f}ms" for us, name in top))
+
+        if heavy:
+            failures.append(f"'{label}' imports heavy modules: {', '.join(heavy)}")
+        if added_ms > budget_ms:
+            failures.append(f"'{label}' adds {added_ms:.1f} ms of imports (budget {budget_ms:.0f} ms)")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enforce the CLI cold-start import budget")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help=f"Max import time the CLI may add over a bare interpreter (default: {DEFAULT_BUDGET_MS:.0f})",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="Interpreter launches per command; the median is compared (default: 5)",
+    )
+    args = parser.parse_args()
+
+    print(f"Python: {sys.executable}")
+    print(f"Budget: {args.budget_ms:.0f} ms of imports over `python -c pass`")
+    print("=" * 50)
+
+    failures = check_startup(args.budget_ms, args.runs)
+
+    print("=" * 50)
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("Cold-start budget OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+SQLite storage backend for scraped positioning data.
+
+Usage:
+    python -m positioning_engine scrape "KAST" "https://kast.xyz" --store sqlite
+    python -m positioning_engine analyze kast --competitors revolut --store sqlite
+    python -m positioning_engine store import output/*-positioning.json
+    python -m positioning_engine store list [slug]
+    python -m positioning_engine store export kast [--snapshot ID]
+
+The JSON backend rewrites output/{slug}-positioning.json on every scrape and
+the analyzer parses each file in full. This backend keeps every scrape as a
+snapshot in output/positioning.sqlite instead:
+
+- snapshots are indexed by (slug, scraped_at), pages by (page_type, snapshot)
+- body text is split into lines and stored content-addressed: each distinct
+  line (nav, cookie banners, footers, unchanged copy) is stored once across
+  all pages and snapshots, and a page keeps a packed array of line ids
+- readers ask for a body budget, so the analyzer fetches only the lines that
+  fit in its per-page character limit
+
+Loaded snapshots have the same shape as the JSON files. A page whose body was
+cut to the budget carries `body_length` with the full length. Generated
+briefs are stored alongside, with the snapshot ids they were built from, so
+`diff` and `analyze --delta` can tell what changed since.
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+from positioning_engine.core import OUTPUT_DIR, resolve_path, slugify
+
+DEFAULT_STORE_PATH = OUTPUT_DIR / "positioning.sqlite"
+BLOCK_FETCH = 64  # line ids resolved per query while filling a body budget
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL,
+    company TEXT NOT NULL,
+    website TEXT NOT NULL,
+    scraped_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_slug ON snapshots (slug, scraped_at);
+
+CREATE TABLE IF NOT EXISTS pages (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    page_type TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    meta_description TEXT NOT NULL,
+    headings TEXT NOT NULL,
+    links_text TEXT NOT NULL,
+    body_length INTEGER NOT NULL,
+    body_blocks BLOB NOT NULL,
+    PRIMARY KEY (snapshot_id, position)
+);
+CREATE INDEX IF NOT EXISTS pages_by_type ON pages (page_type, snapshot_id);
+
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    digest BLOB NOT NULL UNIQUE,
+    text TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS briefs (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    snapshot_ids TEXT NOT NULL,
+    brief TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS briefs_by_slug ON briefs (slug, created_at);
+"""
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or DEFAULT_STORE_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def block_id(conn: sqlite3.Connection, text: str) -> int:
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    row = conn.execute("SELECT id FROM blocks WHERE digest = ?", (digest,)).fetchone()
+    if row:
+        return row[0]
+    cursor = conn.execute("INSERT INTO blocks (digest, text) VALUES (?, ?)", (digest, text))
+    return cursor.lastrowid or 0
+
+
+def save_snapshot(conn: sqlite3.Connection, data: dict) -> int:
+    """Store one scrape (the JSON backend's dict) and return its snapshot id."""
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO snapshots (slug, company, website, scraped_at) VALUES (?, ?, ?, ?)",
+            (slugify(data["company"]), data["company"], data.get("website", ""), str(data.get("scraped_at", ""))),
+        )
+        snapshot_id = cursor.lastrowid or 0
+        for position, page in enumerate(data.get("pages", [])):
+            body = page.get("body_text", "")
+            ids = array("I", (block_id(conn, line) for line in body.split("\n")) if body else ())
+            conn.execute(
+                "INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    snapshot_id,
+                    position,
+                    page.get("page_type", "unknown"),
+                    page.get("url", ""),
+                    page.get("title", ""),
+                    page.get("meta_description", ""),
+                    json.dumps(page.get("headings", []), ensure_ascii=False),
+                    json.dumps(page.get("links_text", []), ensure_ascii=False),
+                    len(body),
+                    ids.tobytes(),
+                ),
+            )
+    return snapshot_id
+
+
+def read_body(conn: sqlite3.Connection, blocks: bytes, body_chars: int | None) -> str:
+    """Rebuild a page body from its line ids, stopping once `body_chars` are filled."""
+    ids = unpack_blocks(blocks)
+    lines: list[str] = []
+    size = 0
+    for start in range(0, len(ids), BLOCK_FETCH):
+        chunk = ids[start:start + BLOCK_FETCH]
+        placeholders = ",".join("?" * len(chunk))
+        texts = dict(conn.execute(f"SELECT id, text FROM blocks WHERE id IN ({placeholders})", list(chunk)))
+        for i in chunk:
+            lines.append(texts[i])
+            size += len(texts[i]) + 1
+            if body_chars is not None and size > body_chars:
+                return "\n".join(lines)[:body_chars]
+    return "\n".join(lines)
+
+
+def find_snapshot(conn: sqlite3.Connection, slug: str, snapshot_id: int | None = None) -> sqlite3.Row | None:
+    """The requested snapshot of a company, or its latest."""
+    if snapshot_id is not None:
+        return conn.execute(
+            "SELECT * FROM snapshots WHERE id = ? AND slug = ?", (snapshot_id, slug)
+        ).fetchone()
+    return conn.execute(
+        "SELECT * FROM snapshots WHERE slug = ? ORDER BY scraped_at DESC, id DESC LIMIT 1", (slug,)
+    ).fetchone()
+
+
+def load_snapshot(
+    conn: sqlite3.Connection,
+    slug: str,
+    snapshot_id: int | None = None,
+    body_chars: int | None = None,
+    page_types: list[str] | None = None,
+) -> dict | None:
+    """Load a snapshot in the JSON backend's shape, with bodies cut to `body_chars`."""
+    snapshot = find_snapshot(conn, slug, snapshot_id)
+    if snapshot is None:
+        return None
+
+    query = "SELECT * FROM pages WHERE snapshot_id = ?"
+    params: list = [snapshot["id"]]
+    if page_types:
+        query += f" AND page_type IN ({','.join('?' * len(page_types))})"
+        params.extend(page_types)
+
+    pages = []
+    for row in conn.execute(query + " ORDER BY position", params):
+        page = {
+            "url": row["url"],
+            "page_type": row["page_type"],
+            "title": row["title"],
+            "meta_description": row["meta_description"],
+            "headings": json.loads(row["headings"]),
+            "body_text": read_body(conn, row["body_blocks"], body_chars),
+            "links_text": json.loads(row["links_text"]),
+            "error": None,
+        }
+        if len(page["body_text"]) < row["body_length"]:
+            page["body_length"] = row["body_length"]
+        pages.append(page)
+
+    return {
+        "company": snapshot["company"],
+        "website": snapshot["website"],
+        "scraped_at": snapshot["scraped_at"],
+        "snapshot_id": snapshot["id"],
+        "pages": pages,
+    }
+
+
+def page_rows(conn: sqlite3.Connection, snapshot_id: int) -> list[sqlite3.Row]:
+    """Raw page rows of a snapshot, bodies still as packed line ids."""
+    return conn.execute(
+        "SELECT * FROM pages WHERE snapshot_id = ? ORDER BY position", (snapshot_id,)
+    ).fetchall()
+
+
+def unpack_blocks(blocks: bytes) -> array:
+    ids = array("I")
+    ids.frombytes(blocks)
+    return ids
+
+
+def block_texts(conn: sqlite3.Connection, ids) -> dict[int, str]:
+    """Text of each line id, fetched in chunks."""
+    ids = list(dict.fromkeys(ids))
+    texts: dict[int, str] = {}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        texts.update(conn.execute(f"SELECT id, text FROM blocks WHERE id IN ({placeholders})", chunk))
+    return texts
+
+
+def save_brief(conn: sqlite3.Connection, slug: str, brief: dict, snapshot_ids: dict[str, int]) -> int:
+    """Store a generated brief with the snapshot id of every company it was built from.
+
+    `slug` is the scraped target's, not one derived from the brief's "company",
+    which the model may have spelled differently.
+    """
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO briefs (slug, created_at, snapshot_ids, brief) VALUES (?, ?, ?, ?)",
+            (
+                slug,
+                datetime.now().isoformat(),
+                json.dumps(snapshot_ids),
+                json.dumps(brief, ensure_ascii=False),
+            ),
+        )
+    return cursor.lastrowid or 0
+
+
+def latest_brief(conn: sqlite3.Connection, slug: str) -> tuple[dict, dict[str, int]] | None:
+    """The most recent stored brief for a company and the snapshots it was built from."""
+    row = conn.execute(
+        "SELECT brief, snapshot_ids FROM briefs WHERE slug = ? ORDER BY created_at DESC, id DESC LIMIT 1",
+        (slug,),
+    ).fetchone()
+    if row is None:
+        return None
+    return json.loads(row["brief"]), json.loads(row["snapshot_ids"])
+
+
+def list_snapshots(conn: sqlite3.Connection, slug: str | None = None) -> list[sqlite3.Row]:
+    query = """
+        SELECT s.id, s.slug, s.company, s.scraped_at, COUNT(p.position) AS pages,
+               COALESCE(SUM(p.body_length), 0) AS body_chars
+        FROM snapshots s LEFT JOIN pages p ON p.snapshot_id = s.id
+    """
+    params: tuple = ()
+    if slug:
+        query += " WHERE s.slug = ?"
+        params = (slug,)
+    query += " GROUP BY s.id ORDER BY s.slug, s.scraped_at"
+    return conn.execute(query, params).fetchall()
+
+
+def store_path(args) -> Path:
+    return resolve_path(args.db) if getattr(args, "db", None) else DEFAULT_STORE_PATH
+
+
+def run(args):
+    db_path = store_path(args)
+    conn = connect(db_path)
+
+    if args.store_command == "import":
+        size_before = db_path.stat().st_size
+        json_bytes = 0
+        for name in args.files:
+            path = resolve_path(name)
+            with open(path) as f:
+                data = json.load(f)
+            snapshot_id = save_snapshot(conn, data)
+            json_bytes += path.stat().st_size
+            print(f"Imported {path.name} as snapshot {snapshot_id} ({len(data.get('pages', []))} pages)")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        growth = db_path.stat().st_size - size_before
+        print(f"JSON: {json_bytes:,} bytes -> store grew {growth:,} bytes ({db_path})")
+
+    elif args.store_command == "list":
+        rows = list_snapshots(conn, slugify(args.slug) if args.slug else None)
+        if not rows:
+            print("No snapshots")
+        for row in rows:
+            print(f"{row['id']:>5}  {row['slug']:<20} {row['scraped_at']:<28} {row['pages']} pages, {row['body_chars']:,} body chars")
+
+    elif args.store_command == "export":
+        data = load_snapshot(conn, slugify(args.slug), args.snapshot)
+        if data is None:
+            print(f"Error: no snapshot for {args.slug}")
+            sys.exit(1)
+        json.dump(data, sys.stdout, indent=2, ensure_ascii=False)
+        print()
@@ -0,0 +1,189 @@
+"""
+Streaming Scrape Output
+
+Usage:
+    python -m positioning_engine tail kast                  # follow a running scrape
+    python -m positioning_engine tail kast --json --no-follow
+
+While a company is scraped, every accepted page record is appended to
+output/{slug}-positioning.jsonl as soon as it is extracted, one JSON object
+per line, flushed and fsynced:
+
+    {"type": "start", "company": "KAST", "website": "https://kast.xyz", "scraped_at": "..."}
+    {"type": "page", "page": {"url": ..., "page_type": "homepage", ...}}
+    {"type": "end", "pages": 3, "saved_to": "output/kast-positioning.json"}
+
+The end record is written once the scraped data has been saved, to the
+usual JSON file (through a temporary file and a rename, so readers never
+see half a file) or to the SQLite store. A crash or kill part way through
+leaves every page scraped so far in the stream: `scrape` saves them when
+the browser crashes, and `analyze` reads the stream when the company has no
+JSON file.
+
+`follow()` yields the records while they are written, so a consumer can
+start on the first pages before the last one is scraped. A new scrape of
+the same company truncates the stream and starts again with a start record.
+"""
+
+import json
+import os
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO
+
+from positioning_engine.core import OUTPUT_DIR, slugify
+
+POLL_INTERVAL = 0.2  # seconds between checks for new records while following
+
+
+def stream_path(company: str) -> Path:
+    return OUTPUT_DIR / f"{slugify(company)}-positioning.jsonl"
+
+
+class PageStream:
+    """Append-only JSONL record of one company's scrape, durable after every page.
+
+    Opening a stream truncates the company's previous one, so there must be one
+    writer per company at a time; the service holds a per-slug lock for this
+    (see Service.scrape_and_save).
+    """
+
+    def __init__(self, data: dict):
+        self.path = stream_path(data["company"])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file: IO[str] | None = open(self.path, "w", encoding="utf-8")
+        self.write({"type": "start", **{k: data[k] for k in ("company", "website", "scraped_at")}})
+
+    def write(self, record: dict):
+        assert self.file is not None
+        self.file.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def page(self, page: dict):
+        self.write({"type": "page", "page": page})
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def finish_stream(company: str, pages: int, saved_to: str):
+    """Append the end record once the company's scraped data is saved."""
+    path = stream_path(company)
+    if not path.exists():
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"type": "end", "pages": pages, "saved_to": saved_to}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_records(path: Path) -> list[dict]:
+    """Complete records of a stream; a line cut off by a crash is dropped."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+def assemble(records: list[dict]) -> tuple[dict | None, bool]:
+    """Scraped data in the positioning.json format, and whether the scrape finished."""
+    data: dict | None = None
+    finished = False
+    for record in records:
+        if record["type"] == "start":
+            data = {k: v for k, v in record.items() if k != "type"}
+            data["pages"] = []
+            finished = False
+        elif record["type"] == "page" and data is not None:
+            data["pages"].append(record["page"])
+        elif record["type"] == "end":
+            finished = True
+    return data, finished
+
+
+def recover_stream(company: str, path: Path | None = None) -> dict | None:
+    """Scraped data of the company's last stream, if it holds any page."""
+    path = path or stream_path(company)
+    if not path.exists():
+        return None
+    data, _ = assemble(read_records(path))
+    return data if data and data["pages"] else None
+
+
+def load_unfinished(json_path: Path) -> dict | None:
+    """Pages of an interrupted scrape, for a positioning.json path that does not exist."""
+    data = recover_stream("", json_path.with_suffix(".jsonl"))
+    if data is not None:
+        print(f"Note: {json_path.name} not found, using {len(data['pages'])} streamed page(s)")
+    return data
+
+
+def follow(path: Path, wait: bool = True, poll: float = POLL_INTERVAL) -> Iterator[dict]:
+    """Records of a stream as they are written, up to its end record.
+
+    Waits for the file to appear. With `wait=False`, stops at the current end
+    of the file instead.
+    """
+    offset = 0
+    buffer = b""
+    while True:
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = None
+        if size is not None:
+            if size < offset:
+                # Truncated by a new scrape: start over
+                offset, buffer = 0, b""
+            if size > offset:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    chunk = f.read()
+                offset += len(chunk)
+                *lines, buffer = (buffer + chunk).split(b"\n")
+                for line in lines:
+                    record = json.loads(line)
+                    yield record
+                    if record["type"] == "end":
+                        return
+        if not wait:
+            return
+        time.sleep(poll)
+
+
+def describe(record: dict) -> str:
+    if record["type"] == "start":
+        return f"[start] {record['company']} ({record['website']}) at {record['scraped_at']}"
+    if record["type"] == "page":
+        page = record["page"]
+        return (
+            f"[page] {page['page_type']}: {page['url']} - {len(page.get('body_text', ''))} chars, "
+            f"{len(page.get('headings', []))} headings, {len(page.get('links_text', []))} CTAs"
+        )
+    return f"[end] {record['pages']} page(s) saved to {record['saved_to']}"
+
+
+def run(args):
+    path = stream_path(args.company.removesuffix("-positioning.jsonl").rsplit("/", 1)[-1])
+    if not args.follow and not path.exists():
+        print(f"Error: {path} not found")
+        sys.exit(1)
+    if args.follow and not path.exists():
+        print(f"Waiting for {path}...", flush=True)
+
+    try:
+        for record in follow(path, wait=args.follow):
+            print(json.dumps(record, ensure_ascii=False) if args.json else describe(record), flush=True)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,507 @@
+"""
+Distributed Scrape Sweep
+
+Usage:
+    python -m positioning_engine sweep "KAST:https://kast.xyz" "Revolut:https://revolut.com" --workers 8
+    python -m positioning_engine sweep --file sites.txt --store sqlite   # one "Name:URL" per line
+    python -m positioning_engine sweep                                   # resume an interrupted sweep
+    python -m positioning_engine sweep --status
+
+Scrapes many companies at once across processes. A `scrape` runs one
+Chromium and one page at a time, so a market-wide sweep of 100+ sites is
+bound to a single core. Here the coordinator writes one job per (company,
+candidate page URL) to a SQLite queue (output/sweep.sqlite), and N worker
+processes, each with its own Chromium, lease jobs from it and write the
+page records back. Every job loads in a new browser context, so no cookies
+or storage pass from one site to the next:
+
+- Leases: a claimed job belongs to its worker for LEASE_SECONDS. A worker
+  that hangs loses the job when the lease expires, and a late result from
+  it is ignored. Leases of a worker process that died are released at
+  once.
+- Politeness: at most `--per-domain` pages of one domain load at a time,
+  and page loads on a domain start at least `--interval` seconds apart.
+  HTTP 429 holds the whole domain back for the retry delay.
+- Retries: timeouts, connection errors, 408, 429 and 5xx are retried up to
+  `--retries` attempts, RETRY_BASE * 2^(attempt - 1) seconds apart (with
+  jitter). Other HTTP errors and thin pages are final, as in `scrape`.
+- Fallback pages (/about-us after /about) only run when the page before
+  them kept nothing, so a sweep loads the same pages as `scrape` does.
+
+When all of a company's jobs are finished the coordinator saves it like
+`scrape` (JSON file or `--store sqlite` snapshot, plus the page stream).
+The queue survives a crash of any process: running `sweep` again without
+sites resumes the companies that were not saved.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+from positioning_engine import trace
+from positioning_engine.core import OUTPUT_DIR, resolve_path, slugify
+
+DEFAULT_QUEUE_PATH = OUTPUT_DIR / "sweep.sqlite"
+LEASE_SECONDS = 90.0  # longer than a page load (20s goto timeout + settle + extraction)
+RETRY_BASE = 5.0
+POLL_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    slug TEXT PRIMARY KEY,
+    company TEXT NOT NULL,
+    website TEXT NOT NULL,
+    status TEXT NOT NULL,          -- scraping | saved
+    queued_at REAL NOT NULL,
+    saved_to TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL,
+    position INTEGER NOT NULL,     -- order in scrape.candidate_pages
+    url TEXT NOT NULL,
+    page_type TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    fallback_of INTEGER,           -- runs only if that job kept no page
+    status TEXT NOT NULL,          -- queued | leased | done | empty | failed | skipped
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    page TEXT,                     -- JSON page record when done
+    finished_at REAL,              -- when the page was kept or found empty
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, not_before);
+CREATE INDEX IF NOT EXISTS jobs_domain ON jobs (domain, status);
+CREATE INDEX IF NOT EXISTS jobs_slug ON jobs (slug, status);
+CREATE TABLE IF NOT EXISTS domains (
+    domain TEXT PRIMARY KEY,
+    next_at REAL NOT NULL          -- earliest start of the next page load
+);
+"""
+
+CLAIM_SQL = """
+SELECT j.* FROM jobs j
+WHERE j.status = 'queued' AND j.not_before <= :now
+  AND (j.fallback_of IS NULL
+       OR (SELECT f.status FROM jobs f WHERE f.id = j.fallback_of) IN ('empty', 'failed'))
+  AND (SELECT COUNT(*) FROM jobs o WHERE o.domain = j.domain AND o.status = 'leased') < :per_domain
+  AND COALESCE((SELECT d.next_at FROM domains d WHERE d.domain = j.domain), 0) <= :now
+ORDER BY j.id
+LIMIT 1
+"""
+
+
+def domain_of(url: str) -> str:
+    host = urlparse(url).hostname or url
+    return host.removeprefix("www.")
+
+
+def retry_delay(attempts: int) -> float:
+    return RETRY_BASE * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+
+
+def retryable(error: str) -> bool:
+    """Load errors worth another attempt: timeouts, connection errors, 408, 429 and 5xx."""
+    if error.startswith("HTTP "):
+        status = int(error.split()[1])
+        return status in (408, 429) or status >= 500
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Job queue
+# ---------------------------------------------------------------------------
+
+class SweepQueue:
+    """Page jobs with leases in SQLite, shared by the coordinator and worker processes."""
+
+    def __init__(self, path: Path = DEFAULT_QUEUE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        if "finished_at" not in {row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")}:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN finished_at REAL")  # queues from before the column
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so two workers never claim the same job
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def enqueue(self, company: str, website: str) -> int:
+        """Queue a company's candidate pages; 0 if it is already queued and not yet saved."""
+        from positioning_engine.scrape import candidate_pages
+
+        slug = slugify(company)
+        with self.transaction() as conn:
+            row = conn.execute("SELECT status FROM companies WHERE slug = ?", (slug,)).fetchone()
+            if row and row["status"] == "scraping":
+                return 0
+            conn.execute("DELETE FROM jobs WHERE slug = ?", (slug,))
+            conn.execute(
+                "INSERT OR REPLACE INTO companies (slug, company, website, status, queued_at) "
+                "VALUES (?, ?, ?, 'scraping', ?)",
+                (slug, company, website, time.time()),
+            )
+            last_of_type: dict[str, int] = {}
+            pages = candidate_pages(website)
+            for position, (url, page_type) in enumerate(pages):
+                cur = conn.execute(
+                    "INSERT INTO jobs (slug, position, url, page_type, domain, fallback_of, status) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 'queued')",
+                    (slug, position, url, page_type, domain_of(url), last_of_type.get(page_type)),
+                )
+                if page_type != "homepage":
+                    last_of_type[page_type] = cur.lastrowid or 0
+        return len(pages)
+
+    def reap(self, max_attempts: int, now: float) -> int:
+        """Queue jobs again whose lease expired; fail them after `max_attempts`. Inside a transaction."""
+        self.conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'lease expired', worker = NULL "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, max_attempts),
+        )
+        expired = self.conn.execute(
+            "SELECT id, attempts FROM jobs WHERE status = 'leased' AND lease_expires < ?", (now,)
+        ).fetchall()
+        for row in expired:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, not_before = ?, error = 'lease expired' "
+                "WHERE id = ?",
+                (now + retry_delay(row["attempts"]), row["id"]),
+            )
+        return len(expired)
+
+    def claim(self, worker: str, per_domain: int, interval: float, max_attempts: int) -> dict | None:
+        """Lease the oldest job whose domain is free; None if nothing can run now."""
+        now = time.time()
+        with self.transaction() as conn:
+            self.reap(max_attempts, now)
+            row = conn.execute(CLAIM_SQL, {"now": now, "per_domain": per_domain}).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (worker, now + LEASE_SECONDS, row["id"]),
+            )
+            self.hold_domain(row["domain"], now + interval)
+        return {**dict(row), "attempts": row["attempts"] + 1}
+
+    def hold_domain(self, domain: str, until: float):
+        self.conn.execute(
+            "INSERT INTO domains (domain, next_at) VALUES (?, ?) "
+            "ON CONFLICT (domain) DO UPDATE SET next_at = MAX(next_at, excluded.next_at)",
+            (domain, until),
+        )
+
+    def complete(self, job: dict, worker: str, page: dict | None, error: str | None = None) -> bool:
+        """Record a job's page (done) or why it kept none (empty); False if its lease was lost."""
+        with self.transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, page = ?, error = ?, worker = NULL, finished_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                ("done" if page else "empty", json.dumps(page) if page else None, error, time.time(), job["id"], worker),
+            )
+            if cur.rowcount and page:
+                # Fallbacks of a kept page are not needed
+                conn.execute(
+                    "UPDATE jobs SET status = 'skipped' WHERE slug = ? AND page_type = ? AND status = 'queued'",
+                    (job["slug"], job["page_type"]),
+                )
+        return cur.rowcount > 0
+
+    def retry(self, job: dict, worker: str, error: str, max_attempts: int) -> float | None:
+        """Queue a failed load again after its backoff delay; None once it is out of attempts."""
+        delay = retry_delay(job["attempts"])
+        final = job["attempts"] >= max_attempts
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, not_before = ?, error = ?, worker = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                ("failed" if final else "queued", time.time() + delay, error, job["id"], worker),
+            )
+            if error.startswith("HTTP 429"):
+                self.hold_domain(job["domain"], time.time() + delay)
+        return None if final else delay
+
+    def release(self, worker: str, max_attempts: int) -> int:
+        """Queue the jobs leased by a worker process that is gone; fail those out of attempts."""
+        with self.transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "worker = NULL, error = 'worker exited' WHERE worker = ? AND status = 'leased'",
+                (max_attempts, worker),
+            )
+        return cur.rowcount
+
+    def leased_workers(self) -> list[str]:
+        rows = self.conn.execute("SELECT DISTINCT worker FROM jobs WHERE status = 'leased'").fetchall()
+        return [row[0] for row in rows]
+
+    def pending(self) -> int:
+        row = self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'leased')").fetchone()
+        return row[0]
+
+    def finished_companies(self) -> list[sqlite3.Row]:
+        """Companies still marked scraping whose jobs have all finished."""
+        return self.conn.execute(
+            "SELECT * FROM companies c WHERE c.status = 'scraping' AND NOT EXISTS "
+            "(SELECT 1 FROM jobs j WHERE j.slug = c.slug AND j.status IN ('queued', 'leased'))"
+        ).fetchall()
+
+    def company_data(self, company: sqlite3.Row) -> dict:
+        """Scraped data in the positioning.json format, pages in candidate order.
+
+        scraped_at is when the last page was scraped, not when the company was
+        queued, which for a resumed sweep can be days earlier.
+        """
+        rows = self.conn.execute(
+            "SELECT page, finished_at FROM jobs WHERE slug = ? AND status = 'done' ORDER BY position",
+            (company["slug"],),
+        ).fetchall()
+        finished = max((row["finished_at"] for row in rows if row["finished_at"]), default=company["queued_at"])
+        return {
+            "company": company["company"],
+            "website": company["website"],
+            "scraped_at": datetime.fromtimestamp(finished).isoformat(),
+            "pages": [json.loads(row["page"]) for row in rows],
+        }
+
+    def mark_saved(self, slug: str, saved_to: str):
+        with self.transaction() as conn:
+            conn.execute("UPDATE companies SET status = 'saved', saved_to = ? WHERE slug = ?", (saved_to, slug))
+
+    def counts(self) -> dict[str, int]:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+async def work(queue: SweepQueue, name: str, options: dict):
+    """Claim and scrape page jobs on one browser until the queue has no work left."""
+    from positioning_engine.scrape import USER_AGENT, load_playwright, page_problem, scrape_page
+
+    async with load_playwright()() as p:
+        # Launched before the first claim, so a worker that cannot start a browser holds no job
+        browser = await p.chromium.launch(headless=True)
+        while True:
+            job = queue.claim(name, options["per_domain"], options["interval"], options["retries"])
+            if job is None:
+                if not queue.pending():
+                    break
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+
+            if not browser.is_connected():
+                browser = await p.chromium.launch(headless=True)
+
+            # A fresh context per job, so no cookies, consent or storage carry over between sites
+            label = f"[{name}] {job['slug']} {job['page_type']} (attempt {job['attempts']})"
+            context = await browser.new_context(user_agent=USER_AGENT, viewport={"width": 1280, "height": 800})
+            try:
+                page_data = await scrape_page(await context.new_page(), job["url"], job["page_type"])
+            finally:
+                await context.close()
+            error = page_data["error"]
+            if error and retryable(error):
+                delay = queue.retry(job, name, error, options["retries"])
+                if delay is None:
+                    print(f"{label}: {error}, giving up", flush=True)
+                else:
+                    print(f"{label}: {error}, retrying in {delay:.0f}s", flush=True)
+                continue
+
+            problem = page_problem(page_data)
+            if not queue.complete(job, name, None if problem else page_data, problem):
+                print(f"{label}: lease lost, result dropped", flush=True)
+            elif problem:
+                print(f"{label}: skipped ({problem})", flush=True)
+            else:
+                print(f"{label}: {len(page_data['body_text'])} chars", flush=True)
+
+        await browser.close()
+
+
+def worker_alive(worker: str) -> bool:
+    """Whether the local worker process behind a "worker-{pid}" lease still runs."""
+    try:
+        os.kill(int(worker.rpartition("-")[2]), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def worker_main(queue_path: str, options: dict):
+    name = f"worker-{os.getpid()}"
+    try:
+        asyncio.run(work(SweepQueue(Path(queue_path)), name, options))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        # The coordinator queues this worker's leased job again and may start a replacement
+        print(f"Error: {name} stopped: {str(e).strip().splitlines()[0]}", flush=True)
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+def parse_sites(entries: list[str]) -> list[tuple[str, str]]:
+    """"Name:URL" entries as (name, url) pairs."""
+    sites = []
+    for entry in entries:
+        name, sep, url = entry.partition(":")
+        if not sep or not url.strip().startswith("http"):
+            print(f'Error: expected "Name:URL", got {entry!r}')
+            sys.exit(1)
+        sites.append((name.strip(), url.strip().rstrip("/")))
+    return sites
+
+
+def read_sites_file(path: Path) -> list[str]:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def save_company(queue: SweepQueue, company: sqlite3.Row, store_kind: str, db_path) -> str:
+    from positioning_engine.scrape import save_scraped
+    from positioning_engine.stream import PageStream
+
+    data = queue.company_data(company)
+    # Same page stream a single-company scrape leaves behind, for tail and analyze
+    stream = PageStream(data)
+    for page in data["pages"]:
+        stream.page(page)
+    stream.close()
+
+    saved_to = save_scraped(data, store_kind, db_path)
+    queue.mark_saved(company["slug"], saved_to)
+    print(f"Saved {data['company']}: {len(data['pages'])} page(s) to {saved_to}", flush=True)
+    return saved_to
+
+
+def print_status(queue: SweepQueue):
+    counts = queue.counts()
+    print("Jobs: " + (", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "none"))
+    rows = queue.conn.execute(
+        "SELECT c.company, c.status, c.saved_to, "
+        "SUM(j.status = 'done') AS pages, SUM(j.status IN ('queued', 'leased')) AS open "
+        "FROM companies c LEFT JOIN jobs j ON j.slug = c.slug GROUP BY c.slug ORDER BY c.queued_at"
+    ).fetchall()
+    for row in rows:
+        where = row["saved_to"] if row["status"] == "saved" else f"{row['open']} job(s) open"
+        print(f"  {row['company']}: {row['pages'] or 0} page(s), {row['status']} - {where}")
+
+
+def run(args):
+    queue_path = resolve_path(args.queue_db) if args.queue_db else DEFAULT_QUEUE_PATH
+    queue = SweepQueue(queue_path)
+    if args.status:
+        print_status(queue)
+        return
+
+    # Leases of workers from an earlier run that was killed need not wait to expire
+    for worker in queue.leased_workers():
+        if not worker_alive(worker):
+            queue.release(worker, args.retries)
+
+    entries = list(args.sites)
+    if args.file:
+        entries += read_sites_file(resolve_path(args.file))
+    for name, url in parse_sites(entries):
+        queued = queue.enqueue(name, url)
+        print(f"{name}: {f'{queued} page job(s) queued' if queued else 'resuming'}")
+    if not queue.pending() and not queue.finished_companies():
+        print("Nothing to scrape: give sites as \"Name:URL\" or --file")
+        return
+
+    db_path = None
+    if args.store == "sqlite":
+        from positioning_engine.store import store_path
+
+        db_path = store_path(args)
+
+    options = {"per_domain": args.per_domain, "interval": args.interval, "retries": args.retries}
+    workers = max(1, args.workers or os.cpu_count() or 1)
+    # Fresh interpreters: no SQLite connection or event loop is carried over a fork
+    ctx = multiprocessing.get_context("spawn")
+    print(f"Sweep: {queue.pending()} page job(s), {workers} worker(s), queue {queue_path}")
+    print("=" * 50, flush=True)
+
+    saved = 0
+    restarts = 0
+    start = time.perf_counter()
+    with trace.span("sweep", workers=workers, jobs=queue.pending()) as span:
+        procs = []
+        for _ in range(workers):
+            proc = ctx.Process(target=worker_main, args=(str(queue_path), options), daemon=True)
+            proc.start()
+            procs.append(proc)
+        try:
+            while True:
+                for company in queue.finished_companies():
+                    save_company(queue, company, args.store, db_path)
+                    saved += 1
+
+                for proc in [p for p in procs if not p.is_alive()]:
+                    procs.remove(proc)
+                    released = queue.release(f"worker-{proc.pid}", args.retries)
+                    if released:
+                        print(f"worker-{proc.pid} exited (code {proc.exitcode}), {released} job(s) queued again")
+                    if proc.exitcode and queue.pending() and restarts < workers:
+                        restarts += 1
+                        replacement = ctx.Process(target=worker_main, args=(str(queue_path), options), daemon=True)
+                        replacement.start()
+                        procs.append(replacement)
+
+                if not procs:
+                    break
+                time.sleep(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            print("\nInterrupted: unfinished jobs stay queued, run sweep again to resume")
+            for proc in procs:
+                proc.terminate()
+                proc.join()
+                queue.release(f"worker-{proc.pid}", args.retries)
+            sys.exit(130)
+
+        for company in queue.finished_companies():
+            save_company(queue, company, args.store, db_path)
+            saved += 1
+        counts = queue.counts()
+        span.set(saved=saved, pages=counts.get("done", 0), failed=counts.get("failed", 0))
+
+    elapsed = time.perf_counter() - start
+    print(f"\n{'=' * 50}")
+    print(f"Saved {saved} company(ies) in {elapsed:.1f}s")
+    print_status(queue)
+    if queue.pending():
+        print("Error: workers stopped with jobs left; run sweep again to resume")
+        sys.exit(1)
@@ -0,0 +1,225 @@
+"""
+Territory Pre-Scoring
+
+Usage:
+    python -m positioning_engine territory output/kast-positioning.json --competitors revolut crypto-com
+    python -m positioning_engine territory kast --competitors revolut --store sqlite --json
+
+Places every company on the four territory_map dimensions of the skill
+(Audience Spectrum, Trust Model, Value Proposition Core, Brand Personality)
+from keyword lexicons, without a model call. Each dimension has a lexicon per
+pole ("self-custody", "your keys" vs "insured", "regulated"; "APY", "earn" vs
+"spend", "tap to pay"; ...). All lexicon terms are compiled into one regex,
+so a company's scraped copy is counted in a single pass, giving a
+company x pole count matrix. Counts are turned into rates per 1,000 words,
+each pole column is normalized by its mean across the companies being
+compared (a company scored on its own keeps its raw rates), and the balance of the two poles maps to a 1-10 score
+(1 = left pole, 10 = right pole), pulled towards the middle when it rests
+on only a few hits. A dimension with no hits on either pole scores None.
+
+`analyze` attaches the result to `territory_map.baseline` of every brief so
+the renderer can show it next to the model's placements. With
+`analyze --prescore` the scores also go into the prompt and competitor pages
+are sent without their body text.
+"""
+
+import json
+import re
+from collections import Counter
+
+from positioning_engine.core import resolve_path
+
+# (key, name, left pole, right pole, left lexicon, right lexicon); regex fragments
+DIMENSIONS = (
+    (
+        "audience_spectrum", "Audience Spectrum", "Crypto Native", "Mainstream Consumer",
+        ("defi", "on-?chain", "web3", "stablecoins?", "usdc", "usdt", "tokens?", "wallets?",
+         "multi-?chain", "solana", "ethereum", "bitcoin", "btc", "eth", "dapps?", "gas fees?",
+         "bridge", "off-?ramp", "on-?ramp", "seed phrase", "degens?"),
+        ("everyday", "salary", "bills", "family", "kids", "budget(?:ing)?", "shopping",
+         "travel", "insurance", "savings account", "money app", "bank account", "current account",
+         "millions of customers", "customers", "no jargon", "in minutes", "easy", "simple"),
+    ),
+    (
+        "trust_model", "Trust Model", "Self-Custody", "Full Custodial",
+        ("self-?custod(?:y|ial)", "non-?custodial", "your keys", "own your keys", "seed phrase",
+         "smart wallets?", "passkeys?", "mpc", "you control", "you own", "fully onchain",
+         "withdraw anytime", "permissionless"),
+        ("insured", "fdic", "licen[cs]ed?", "licen[cs]es", "regulated", "regulation",
+         "protected", "safeguard(?:ed|ing)?", "deposit protection", "compliance", "compliant",
+         "e-money", "custodian", "we handle", "fully managed", "authori[sz]ed"),
+    ),
+    (
+        "value_prop_core", "Value Proposition Core", "Yield/Returns", "Utility/Spending",
+        ("apy", "apr", "yield", "earn", "earning", "interest", "returns?", "staking", "stake",
+         "passive income", "grow your", "rewards?", "cashback", "savings rate", "vaults?"),
+        ("spend", "spending", "pay", "payments?", "cards?", "tap", "merchants", "atms?",
+         "apple pay", "google pay", "checkout", "send money", "transfers?", "remit(?:tance)?s?",
+         "anywhere", "countries", "abroad", "swipe"),
+    ),
+    (
+        "brand_personality", "Brand Personality", "Technical/Builder", "Lifestyle/Consumer",
+        ("zk", "zero-?knowledge", "proofs?", "protocol", "api", "sdk", "open[- ]source",
+         "audit(?:ed|s)?", "smart contracts?", "architecture", "developers?", "infrastructure",
+         "layer ?[12]", "chain abstraction", "encryption", "non-?custodial", "built on"),
+        ("lifestyle", "simplified", "effortless", "freedom", "your life", "experiences",
+         "enjoy", "dreams?", "love", "join", "community", "perks", "style", "vibes?",
+         "made easy", "live", "adventure"),
+    ),
+)
+
+WORD_RE = re.compile(r"\w+")
+SHRINK_HITS = 2  # a dimension with n hits keeps n / (n + 2) of its lean
+
+
+def build_lexicon() -> tuple[re.Pattern, list[tuple[str, list[tuple[int, int]]]]]:
+    """One alternation regex over every term, and per group: (term, [(dimension, pole)])."""
+    poles: dict[str, list[tuple[int, int]]] = {}
+    for d, (_, _, _, _, left, right) in enumerate(DIMENSIONS):
+        for pole, terms in enumerate((left, right)):
+            for term in terms:
+                poles.setdefault(term, []).append((d, pole))
+    groups = list(poles.items())
+    # Longer fragments first so "smart wallets?" wins over "wallets?"
+    order = sorted(range(len(groups)), key=lambda i: -len(groups[i][0]))
+    pattern = "|".join(f"(?P<t{i}>{groups[i][0]})" for i in order)
+    return re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE), groups
+
+
+LEXICON_RE, LEXICON_GROUPS = build_lexicon()
+
+
+def company_text(data: dict) -> str:
+    parts = []
+    for page in data.get("pages", []):
+        parts += [page.get("title", ""), page.get("meta_description", "")]
+        parts += [h.get("text", "") for h in page.get("headings", [])]
+        parts += page.get("links_text", [])
+        parts.append(page.get("body_text") or "")
+    return "\n".join(p for p in parts if p)
+
+
+def count_terms(text: str) -> tuple[Counter, dict[int, str]]:
+    """Lexicon group index -> occurrences in one pass over `text`, and a surface form per group."""
+    counts: Counter = Counter()
+    surface: dict[int, str] = {}
+    for match in LEXICON_RE.finditer(text):
+        group = int(match.lastgroup[1:])  # type: ignore[index]
+        counts[group] += 1
+        surface.setdefault(group, match.group().lower())
+    return counts, surface
+
+
+def pole_matrix(counts: Counter) -> list[list[int]]:
+    """[dimension][pole] hit totals from a term count vector."""
+    matrix = [[0, 0] for _ in DIMENSIONS]
+    for group, n in counts.items():
+        for d, pole in LEXICON_GROUPS[group][1]:
+            matrix[d][pole] += n
+    return matrix
+
+
+def top_terms(counts: Counter, surface: dict[int, str], d: int, pole: int, limit: int = 3) -> list[str]:
+    hits = [(n, surface[g]) for g, n in counts.items() if (d, pole) in LEXICON_GROUPS[g][1]]
+    hits.sort(key=lambda h: (-h[0], h[1]))
+    return [f"{term}×{n}" for n, term in hits[:limit]]
+
+
+def score_companies(companies: dict[str, dict]) -> dict:
+    """Keyword-lexicon placement of each company (name -> scraped data) on every dimension."""
+    names = list(companies)
+    counts = {}
+    surfaces = {}
+    hits = {}
+    rates = {}
+    for name in names:
+        text = company_text(companies[name])
+        words = max(len(WORD_RE.findall(text)), 1)
+        counts[name], surfaces[name] = count_terms(text)
+        hits[name] = pole_matrix(counts[name])
+        rates[name] = [[n * 1000 / words for n in poles] for poles in hits[name]]
+
+    # Mean rate of every pole across companies, so a large lexicon does not tilt a dimension.
+    # A company on its own would only be compared with itself (every pole rate becomes 1.0),
+    # so it is scored on its raw rates.
+    if len(names) < 2:
+        means = [[1.0, 1.0] for _ in DIMENSIONS]
+    else:
+        means = [
+            [sum(rates[n][d][pole] for n in names) / len(names) for pole in (0, 1)]
+            for d in range(len(DIMENSIONS))
+        ]
+
+    scores: dict[str, dict] = {}
+    evidence: dict[str, dict] = {}
+    for name in names:
+        scores[name] = {}
+        evidence[name] = {}
+        for d, (key, *_) in enumerate(DIMENSIONS):
+            left, right = (
+                rates[name][d][pole] / means[d][pole] if means[d][pole] else 0.0 for pole in (0, 1)
+            )
+            total = sum(hits[name][d])
+            if left + right == 0:
+                scores[name][key] = None
+            else:
+                # Shrink towards the middle when the lean rests on a handful of hits
+                lean = (right - left) / (right + left) * total / (total + SHRINK_HITS)
+                scores[name][key] = round(5.5 + 4.5 * lean)
+            evidence[name][key] = {
+                "left": top_terms(counts[name], surfaces[name], d, 0),
+                "right": top_terms(counts[name], surfaces[name], d, 1),
+            }
+
+    return {
+        "method": "keyword lexicon",
+        "scale": "1 = left pole, 10 = right pole",
+        "dimensions": [
+            {"key": key, "name": name, "left": left, "right": right}
+            for key, name, left, right, _, _ in DIMENSIONS
+        ],
+        "scores": scores,
+        "evidence": evidence,
+    }
+
+
+def scraped_companies(scraped_data: dict) -> dict[str, dict]:
+    """Company name -> scraped data for the target and every competitor."""
+    companies = {scraped_data["target"].get("company", "Target"): scraped_data["target"]}
+    for slug, data in scraped_data["competitors"].items():
+        companies[data.get("company", slug)] = data
+    return companies
+
+
+def format_scores(baseline: dict) -> str:
+    """Compact plain-text table of a baseline, used in the prompt and the CLI."""
+    dims = baseline["dimensions"]
+    lines = [f"Scale: {baseline['scale']}. Dimensions: " + "; ".join(
+        f"{d['name']} ({d['left']} → {d['right']})" for d in dims
+    )]
+    for name, scores in baseline["scores"].items():
+        cells = []
+        for d in dims:
+            score = scores.get(d["key"])
+            ev = baseline["evidence"][name][d["key"]]
+            terms = ", ".join(ev["left"] + ev["right"])
+            cells.append(f"{d['name']} {score if score is not None else '?'}" + (f" [{terms}]" if terms else ""))
+        lines.append(f"- {name}: " + "; ".join(cells))
+    return "\n".join(lines)
+
+
+def run(args):
+    from positioning_engine.analyze import load_scraped_data, load_scraped_data_from_store
+
+    if args.store == "sqlite":
+        from positioning_engine.store import store_path
+
+        scraped_data = load_scraped_data_from_store(store_path(args), args.input, args.competitors)
+    else:
+        scraped_data = load_scraped_data(resolve_path(args.input), args.competitors)
+
+    baseline = score_companies(scraped_companies(scraped_data))
+    if args.json:
+        print(json.dumps(baseline, indent=2, ensure_ascii=False))
+    else:
+        print(format_scores(baseline))
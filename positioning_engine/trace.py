@@ -0,0 +1,202 @@
+"""
+Structured per-stage timing and resource spans.
+
+Usage:
+    python -m positioning_engine --trace output/trace.jsonl pipeline "KAST" "https://kast.xyz"
+    python -m positioning_engine trace-summary output/trace.jsonl
+
+Stages wrap their work in `span()`:
+
+    with span("call_anthropic", model=model) as s:
+        response = client.messages.create(...)
+        s.set(input_tokens=response.usage.input_tokens)
+
+When POSITIONING_TRACE names a file, every span appends one JSON line with
+its wall time, peak RSS, status and attributes (bytes, pages, tokens,
+retries...). The variable is inherited by subprocesses, so a pipeline run
+traces all of its stages into the same file under one run id. When tracing
+is off, `span()` only creates the attribute holder.
+"""
+
+import itertools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+TRACE_ENV = "POSITIONING_TRACE"
+RUN_ID_ENV = "POSITIONING_RUN_ID"
+
+# Attributes summed per stage by trace-summary
+COUNTERS = ("bytes", "pages", "input_tokens", "output_tokens", "retries")
+
+_current_span: ContextVar[str | None] = ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+_write_lock = threading.Lock()
+
+
+def enable(path: str | Path):
+    """Turn tracing on for this process and any subprocess it starts."""
+    os.environ[TRACE_ENV] = str(Path(path).resolve())
+    os.environ.setdefault(RUN_ID_ENV, uuid.uuid4().hex[:12])
+
+
+def trace_path() -> Path | None:
+    value = os.environ.get(TRACE_ENV)
+    return Path(value) if value else None
+
+
+def enabled() -> bool:
+    return TRACE_ENV in os.environ
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MiB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Span:
+    """Attribute holder handed to the body of a `span()` block."""
+
+    def __init__(self, stage: str, attrs: dict):
+        self.stage = stage
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: float = 1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+
+def write_record(path: Path, record: dict):
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+@contextmanager
+def span(stage: str, **attrs) -> Iterator[Span]:
+    """Time a block and append it to the trace file, if tracing is enabled."""
+    current = Span(stage, attrs)
+    path = trace_path()
+    if path is None:
+        yield current
+        return
+
+    span_id = f"{os.getpid()}-{next(_span_ids)}"
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    started_at = datetime.now().isoformat(timespec="milliseconds")
+    start = time.perf_counter()
+    status, error = "ok", None
+    try:
+        yield current
+    except BaseException as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        write_record(path, {
+            "run_id": os.environ.get(RUN_ID_ENV),
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "stage": stage,
+            "started_at": started_at,
+            "wall_ms": round((time.perf_counter() - start) * 1000, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "status": status,
+            "error": error,
+            **current.attrs,
+        })
+
+
+def load_spans(path: Path, run_id: str | None = None) -> list[dict]:
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a concurrent writer's partial line
+            if run_id is None or record.get("run_id") == run_id:
+                spans.append(record)
+    return spans
+
+
+def percentile(values: list[float], pct: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def summarize_spans(spans: list[dict]) -> dict[str, dict]:
+    """Aggregate spans into per-stage counts, p50/p95 wall time, counters and peak RSS."""
+    by_stage: dict[str, list[dict]] = defaultdict(list)
+    for record in spans:
+        by_stage[record["stage"]].append(record)
+
+    summary = {}
+    for stage, records in by_stage.items():
+        wall = [r["wall_ms"] for r in records]
+        rss = [r["peak_rss_mb"] for r in records if r.get("peak_rss_mb") is not None]
+        summary[stage] = {
+            "count": len(records),
+            "errors": sum(1 for r in records if r.get("status") == "error"),
+            "p50_ms": round(percentile(wall, 50), 3),
+            "p95_ms": round(percentile(wall, 95), 3),
+            "total_ms": round(sum(wall), 3),
+            "peak_rss_mb": max(rss) if rss else None,
+            **{
+                key: sum(r.get(key) or 0 for r in records)
+                for key in COUNTERS
+                if any(key in r for r in records)
+            },
+        }
+    return summary
+
+
+def run_summary(args):
+    path = Path(args.trace_file)
+    if not path.exists():
+        print(f"Error: {path} not found")
+        sys.exit(1)
+
+    spans = load_spans(path, args.run_id)
+    summary = summarize_spans(spans)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    runs = {s.get("run_id") for s in spans}
+    print(f"{len(spans)} spans from {len(runs)} run(s) in {path}")
+    print("=" * 78)
+    print(f"{'stage':<18}{'count':>6}{'err':>5}{'p50 ms':>11}{'p95 ms':>11}{'rss MB':>9}  counters")
+    for stage, row in sorted(summary.items(), key=lambda kv: -kv[1]["total_ms"]):
+        counters = ", ".join(f"{k}={row[k]:,}" for k in COUNTERS if k in row)
+        rss = f"{row['peak_rss_mb']:.0f}" if row["peak_rss_mb"] is not None else "-"
+        print(
+            f"{stage:<18}{row['count']:>6}{row['errors']:>5}"
+            f"{row['p50_ms']:>11.1f}{row['p95_ms']:>11.1f}{rss:>9}  {counters}"
+        )
@@ -0,0 +1,204 @@
+"""
+Compact Wire Schema
+
+Usage:
+    python -m positioning_engine analyze output/kast-positioning.json --compact
+
+Output tokens dominate analysis latency, and most of a pretty-printed brief
+is key names and indentation repeated for every company, score and list
+item. With `--compact` the model writes the brief as minified JSON with
+short keys and positional arrays instead:
+
+    {"c":"KAST","d":"2026-02-17","w":"https://www.kast.xyz","k":["Revolut"],"x":"...",
+     "pe":[["KAST","<positioning_claim>","<category>",...]],
+     "tm":{"dm":[["Audience Spectrum","<left_label>","<right_label>","<description>"]],
+           "sc":[["KAST",7,5,3,4,"<notes>"]],"ki":"<key_insight>"},
+     "ws":[["<territory>","<rationale>"]],
+     "mf":{"ps":[["<angle>","<text>"]],"ol":["..."],"vp":[[...]],"am":[[...]],"wn":[[...]],"cr":[[...]]}}
+
+The prompt spells out every position and shows a shortened example
+(the first rows of examples/kast-brief.json in this form) in place of the
+whole pretty-printed brief. `expand_brief` restores the regular schema
+(kast-brief.json's key names), and `analyze.parse_and_validate` expands any
+response in this form before validating it, so the renderer, the lint and
+the stored briefs never see the compact form.
+"""
+
+import json
+
+WIRE_MARKER = "compact wire schema"
+EXAMPLE_ROWS = 2  # rows kept per list in the prompt's example
+
+ELEMENT_FIELDS = (
+    "positioning_claim", "category", "target_audience", "claimed_benefits", "proof_points",
+    "differentiation_claim", "brand_voice", "cta_language", "omissions",
+)
+DIMENSION_FIELDS = ("name", "left_label", "right_label", "description")
+SCORE_FIELDS = ("audience_spectrum", "trust_model", "value_prop_core", "brand_personality")
+WHITE_SPACE_FIELDS = ("territory", "rationale")
+
+# compact key -> (messaging_framework key, row fields; None for a list of strings)
+FRAMEWORK_LISTS = {
+    "ps": ("positioning_statements", ("angle", "text")),
+    "ol": ("one_liners", None),
+    "vp": ("value_propositions", ("headline", "supporting", "proof_point")),
+    "am": ("audience_messaging", ("segment", "their_language", "hook", "proof", "cta")),
+    "wn": ("what_not_to_say", ("phrase", "reason")),
+    "cr": ("competitive_responses", ("competitor", "their_strength", "their_weakness", "our_counter")),
+}
+
+
+def dumps(wire: dict) -> str:
+    return json.dumps(wire, ensure_ascii=False, separators=(",", ":"))
+
+
+def is_compact(data) -> bool:
+    return isinstance(data, dict) and "pe" in data and "mf" in data and "company" not in data
+
+
+def pick(item, fields: tuple[str, ...], aliases: dict[str, str] | None = None) -> list:
+    """Values of `fields` from a brief object, in order."""
+    if not isinstance(item, dict):
+        return [item]
+    aliases = aliases or {}
+    return [item.get(f, item.get(aliases.get(f, ""), "")) for f in fields]
+
+
+def compact_brief(brief: dict) -> dict:
+    """The wire form of a regular brief."""
+    territory = brief.get("territory_map") or {}
+    framework = brief.get("messaging_framework") or {}
+    wire: dict = {
+        "c": brief.get("company", ""),
+        "d": brief.get("date", ""),
+        "w": brief.get("website", ""),
+        "k": list(brief.get("competitors", [])),
+        "x": brief.get("executive_summary", ""),
+        "pe": [[name, *pick(fields, ELEMENT_FIELDS)] for name, fields in brief.get("positioning_elements", {}).items()],
+        "tm": {
+            "dm": [
+                pick(d, DIMENSION_FIELDS, {"left_label": "left", "right_label": "right"})
+                for d in territory.get("dimensions", [])
+            ],
+            # Older briefs use other score keys; the scores are in dimension order either way
+            "sc": [
+                [name, *[v for k, v in scores.items() if k != "notes"][: len(SCORE_FIELDS)], scores.get("notes", "")]
+                for name, scores in territory.get("scores", {}).items()
+                if isinstance(scores, dict)
+            ],
+            "ki": territory.get("key_insight") or territory.get("analysis") or "",
+        },
+        "ws": [pick(item, WHITE_SPACE_FIELDS) for item in brief.get("white_space", [])],
+        "mf": {},
+    }
+    for key, (name, fields) in FRAMEWORK_LISTS.items():
+        items = framework.get(name, [])
+        wire["mf"][key] = list(items) if fields is None else [pick(item, fields) for item in items]
+    return wire
+
+
+def rows(value, path: str) -> list:
+    if not isinstance(value, list):
+        raise ValueError(f"compact brief: {path} must be an array")
+    return value
+
+
+def expand_row(row, fields: tuple[str, ...], path: str) -> dict:
+    """Object from a positional row; missing trailing values become empty strings."""
+    if isinstance(row, dict):
+        return row
+    values = rows(row, path)
+    return {f: values[i] if i < len(values) else "" for i, f in enumerate(fields)}
+
+
+def expand_brief(wire: dict) -> dict:
+    """The regular brief schema from its wire form. Raises ValueError when malformed."""
+    territory = wire.get("tm") or {}
+    framework = wire.get("mf") or {}
+    if not isinstance(territory, dict) or not isinstance(framework, dict):
+        raise ValueError("compact brief: tm and mf must be objects")
+
+    elements = {}
+    for i, row in enumerate(rows(wire.get("pe", []), "pe")):
+        name, *values = rows(row, f"pe[{i}]")
+        elements[name] = expand_row(values, ELEMENT_FIELDS, f"pe[{i}]")
+
+    scores = {}
+    for i, row in enumerate(rows(territory.get("sc", []), "tm.sc")):
+        name, *values = rows(row, f"tm.sc[{i}]")
+        scores[name] = expand_row(values, (*SCORE_FIELDS, "notes"), f"tm.sc[{i}]")
+
+    brief = {
+        "company": wire.get("c", ""),
+        "date": wire.get("d", ""),
+        "website": wire.get("w", ""),
+        "competitors": rows(wire.get("k", []), "k"),
+        "executive_summary": wire.get("x", ""),
+        "positioning_elements": elements,
+        "territory_map": {
+            "dimensions": [
+                expand_row(row, DIMENSION_FIELDS, f"tm.dm[{i}]")
+                for i, row in enumerate(rows(territory.get("dm", []), "tm.dm"))
+            ],
+            "scores": scores,
+            "key_insight": territory.get("ki", ""),
+        },
+        "white_space": [
+            expand_row(row, WHITE_SPACE_FIELDS, f"ws[{i}]") for i, row in enumerate(rows(wire.get("ws", []), "ws"))
+        ],
+        "messaging_framework": {},
+    }
+    for key, (name, fields) in FRAMEWORK_LISTS.items():
+        items = rows(framework.get(key, []), f"mf.{key}")
+        brief["messaging_framework"][name] = (
+            items if fields is None else [expand_row(row, fields, f"mf.{key}[{i}]") for i, row in enumerate(items)]
+        )
+    return brief
+
+
+def describe_schema(counts: dict[str, int]) -> str:
+    """Position-by-position description of the wire form; `counts` are rows per list."""
+
+    def n(key: str) -> str:
+        return f" ({counts[key]} rows)" if key in counts else ""
+
+    framework = "\n".join(
+        f'  "{key}": {name}{n(key)}, '
+        + ("each a string" if fields is None else f"each [{', '.join(fields)}]")
+        for key, (name, fields) in FRAMEWORK_LISTS.items()
+    )
+    return "\n".join([
+        '"c": company, "d": date (YYYY-MM-DD), "w": website, "k": [competitor names], "x": executive_summary',
+        f'"pe": positioning_elements, one row per company (target first), each [company, {", ".join(ELEMENT_FIELDS)}]',
+        '"tm": territory_map:',
+        f'  "dm": dimensions{n("dm")}, each [{", ".join(DIMENSION_FIELDS)}]',
+        f'  "sc": scores, one row per company, each [company, {", ".join(SCORE_FIELDS)}, notes], scores 1-10',
+        '  "ki": key_insight',
+        f'"ws": white_space{n("ws")}, each [{", ".join(WHITE_SPACE_FIELDS)}]',
+        '"mf": messaging_framework:',
+        framework,
+    ])
+
+
+def schema_prompt(example_brief: str) -> str:
+    """Output schema section for the system prompt, with a shortened example."""
+    wire = compact_brief(json.loads(example_brief))
+    counts = {key: len(wire[key]) for key in ("ws",)}
+    counts["dm"] = len(wire["tm"]["dm"])
+    counts.update({key: len(items) for key, items in wire["mf"].items()})
+
+    example = dict(wire, pe=wire["pe"][:EXAMPLE_ROWS], ws=wire["ws"][:EXAMPLE_ROWS])
+    example["tm"] = dict(wire["tm"], dm=wire["tm"]["dm"][:EXAMPLE_ROWS], sc=wire["tm"]["sc"][:EXAMPLE_ROWS])
+    example["mf"] = {key: items[:EXAMPLE_ROWS] for key, items in wire["mf"].items()}
+
+    return "\n".join([
+        f"# Output Schema ({WIRE_MARKER})",
+        "Write the brief as a single line of minified JSON with short keys, where every repeated "
+        "object is an array of values in the order given below. It is expanded into the full brief "
+        "locally. All text values should be specific, evidence-based, and grounded in the scraped data.",
+        "",
+        describe_schema(counts),
+        "",
+        f"Example (lists cut to their first {EXAMPLE_ROWS} rows; write the full row counts above):",
+        dumps(example),
+    ])